@@ -40,7 +40,7 @@ if exist build_enhanced_only.bat del build_enhanced_only.bat
 
 echo.
 echo Cleanup complete! Keeping only essential files:
-echo - storage_monitor_stable_no_matplotlib.py (main source)
+echo - storage_monitor_stable.py (main source)
 echo - storage_monitor_console.py (console version)
 echo - build_exe_simple.bat (build script)
 echo - requirements.txt (dependencies)
@@ -1,4 +1,4 @@
 @echo off
 echo Starting Storage Monitor (GUI Version)...
-python storage_monitor_stable_no_matplotlib.py
+python storage_monitor_stable.py
 pause 
\ No newline at end of file
@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import queue
+import threading
+import collections
+from datetime import datetime
+from urllib.request import urlopen, Request
+
+import psutil
+
+from storage_bus import DROP_OLDEST
+from storage_config import ConfigError, data_dir, expand_path
+from storage_filters import normalize_extensions
+from storage_metrics import registry
+from storage_volumes import is_under
+
+
+class Alert:
+    def __init__(self, rule, message, timestamp, path=None):
+        self.rule = rule
+        self.message = message
+        self.timestamp = timestamp
+        self.path = path
+
+    def to_dict(self):
+        return {
+            'rule': self.rule,
+            'message': self.message,
+            'timestamp': self.timestamp.isoformat(),
+            'path': self.path,
+        }
+
+
+class AlertRule:
+    """A rule scoped to a path prefix and/or extensions (None matches everything)"""
+    kind = None
+
+    def __init__(self, name, path=None, extensions=None):
+        self.name = name
+        self.path = expand_path(path) if path else None
+        self.extensions = normalize_extensions(extensions)  # ".log", as on changes
+
+    def check(self, change, now):
+        """Message if this change triggers the rule, else None"""
+        return None
+
+
+class LargeFileRule(AlertRule):
+    """A file reaches min_bytes, by being created that big or by growing past it"""
+    kind = "large_file"
+
+    def __init__(self, name, min_bytes, path=None, extensions=None):
+        super().__init__(name, path, extensions)
+        self.min_bytes = min_bytes
+
+    def check(self, change, now):
+        size = change.size if change.size is not None else change.size_change
+        if change.change_type == 'deleted' or size < self.min_bytes:
+            return None
+        previous = 0 if change.change_type == 'created' else size - change.size_change
+        if previous >= self.min_bytes:
+            return None
+        return f"{change.path} reached {size / (1024 * 1024):,.0f} MB"
+
+
+class DirectoryGrowthRule(AlertRule):
+    """Files under path grow by more than min_bytes within window seconds"""
+    kind = "directory_growth"
+
+    def __init__(self, name, path, min_bytes, window, extensions=None):
+        if not path:
+            raise ConfigError(f"Alert rule '{name}' needs a path")
+        super().__init__(name, path, extensions)
+        self.min_bytes = min_bytes
+        self.window = window
+        self.seconds = collections.deque()  # [second, bytes]
+        self.total = 0
+        self.last_alert = 0
+
+    def check(self, change, now):
+        amount = change.size_change
+        if change.change_type == 'moved' and change.size and \
+                not (change.old_path and is_under(change.old_path, self.path)):
+            # The whole file arrived from outside the path
+            amount = change.size
+        second = int(now)
+        if self.seconds and self.seconds[-1][0] == second:
+            self.seconds[-1][1] += amount
+        else:
+            self.seconds.append([second, amount])
+        self.total += amount
+        while self.seconds[0][0] <= second - self.window:
+            self.total -= self.seconds.popleft()[1]
+        if self.total < self.min_bytes or now - self.last_alert < self.window:
+            return None
+        self.last_alert = now
+        return (f"{self.path} grew {self.total / (1024 * 1024):,.0f} MB "
+                f"within {self.window / 60:g} min")
+
+
+class FreeSpaceRule(AlertRule):
+    """Free space on volume drops below below_percent; re-armed once it recovers"""
+    kind = "free_space"
+
+    def __init__(self, name, volume, below_percent):
+        super().__init__(name)
+        self.volume = volume
+        self.below_percent = below_percent
+        self.armed = True
+
+    def check_volume(self):
+        usage = psutil.disk_usage(self.volume)
+        free_percent = 100.0 - usage.percent
+        if free_percent >= self.below_percent:
+            self.armed = True
+            return None
+        if not self.armed:
+            return None
+        self.armed = False
+        return f"Only {free_percent:.1f}% free on {self.volume} ({usage.free / (1024 ** 3):,.1f} GB)"
+
+
+def rule_from_dict(data):
+    kind = data.get("type")
+    name = data.get("name") or kind
+    megabytes = data.get("mb", 0) * 1024 * 1024
+    if kind == LargeFileRule.kind:
+        return LargeFileRule(name, megabytes, data.get("path"), data.get("extensions"))
+    if kind == DirectoryGrowthRule.kind:
+        return DirectoryGrowthRule(name, data.get("path"), megabytes,
+                                   data.get("minutes", 10) * 60, data.get("extensions"))
+    if kind == FreeSpaceRule.kind:
+        if "volume" not in data:
+            raise ConfigError(f"Alert rule '{name}' needs a volume")
+        return FreeSpaceRule(name, data["volume"], data.get("below_percent", 10))
+    raise ConfigError(f"Unknown alert rule type '{kind}'")
+
+
+class LogSink:
+    """Appends alerts to a JSON lines file"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "alerts.jsonl")
+
+    def send(self, alert):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert.to_dict()) + "\n")
+
+
+class WebhookSink:
+    """POSTs alerts as JSON to a URL from its own thread, so a slow endpoint can't hold up rules"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.pending = queue.Queue(maxsize=1000)
+        self.thread = threading.Thread(target=self.run, name="alert-webhook", daemon=True)
+        self.thread.start()
+
+    def send(self, alert):
+        try:
+            self.pending.put_nowait(alert)
+        except queue.Full:
+            registry.counter("alerts.dropped").inc()
+
+    def run(self):
+        while True:
+            alert = self.pending.get()
+            request = Request(self.url, json.dumps(alert.to_dict()).encode("utf-8"),
+                              {"Content-Type": "application/json"})
+            try:
+                with urlopen(request, timeout=self.timeout):
+                    pass
+            except Exception as e:
+                print(f"Error posting alert to {self.url}: {e}")
+
+
+class CallbackSink:
+    def __init__(self, callback):
+        self.callback = callback
+
+    def send(self, alert):
+        self.callback(alert)
+
+
+def sink_from_dict(data):
+    kind = data.get("type")
+    if kind == "log":
+        return LogSink(data.get("path"))
+    if kind == "webhook":
+        if "url" not in data:
+            raise ConfigError("Webhook alert sink needs a url")
+        return WebhookSink(data["url"], data.get("timeout", 5))
+    raise ConfigError(f"Unknown alert sink type '{kind}'")
+
+
+class AlertEngine:
+    """Evaluates threshold rules against the change stream and delivers alerts to sinks.
+
+    Rules are indexed by path prefix and by extension, so a change only
+    visits the rules that can match it: one dict lookup per parent
+    directory of the changed file, plus the rules for its extension.
+    Free space rules don't depend on changes and are checked on a timer.
+    """
+
+    def __init__(self, rules=(), sinks=(), free_space_interval=30):
+        self.by_prefix = {}  # normcased directory -> rules under it
+        self.by_extension = {}  # extension -> rules without a path
+        self.everywhere = []  # rules without a path or extensions
+        self.free_space_rules = []
+        self.sinks = list(sinks)
+        self.free_space_interval = free_space_interval
+        self.last_free_space_check = 0
+        self.recent = collections.deque(maxlen=100)
+        self.subscription = None
+        self.running = False
+        self.thread = None
+        for rule in rules:
+            self.add_rule(rule)
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("alerts")
+        if not settings.get("enabled", True) or not settings.get("rules"):
+            return None
+        rules = []
+        for entry in settings["rules"]:
+            try:
+                rules.append(rule_from_dict(entry))
+            except ConfigError as e:
+                print(f"Ignoring alert rule {entry}: {e}")
+        sinks = []
+        for entry in settings.get("sinks", [{"type": "log"}]):
+            try:
+                sinks.append(sink_from_dict(entry))
+            except ConfigError as e:
+                print(f"Ignoring alert sink {entry}: {e}")
+        return cls(rules, sinks, settings.get("free_space_interval", 30))
+
+    def add_rule(self, rule):
+        if isinstance(rule, FreeSpaceRule):
+            self.free_space_rules.append(rule)
+        elif rule.path is not None:
+            self.by_prefix.setdefault(os.path.normcase(rule.path), []).append(rule)
+        elif rule.extensions is not None:
+            for extension in rule.extensions:
+                self.by_extension.setdefault(extension, []).append(rule)
+        else:
+            self.everywhere.append(rule)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def rules_for(self, change):
+        rules = self.everywhere + self.by_extension.get(change.file_extension, [])
+        if self.by_prefix:
+            directory = os.path.normcase(os.path.dirname(change.path))
+            while True:
+                rules += self.by_prefix.get(directory, ())
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+        return rules
+
+    def evaluate(self, change, now=None):
+        now = now or time.time()
+        for rule in self.rules_for(change):
+            if rule.extensions is not None and change.file_extension not in rule.extensions:
+                continue
+            message = rule.check(change, now)
+            if message:
+                self.fire(rule, message, change.path)
+
+    def check_free_space(self, now=None):
+        now = now or time.time()
+        if now - self.last_free_space_check < self.free_space_interval:
+            return
+        self.last_free_space_check = now
+        for rule in self.free_space_rules:
+            try:
+                message = rule.check_volume()
+            except OSError:
+                continue
+            if message:
+                self.fire(rule, message, rule.volume)
+
+    def fire(self, rule, message, path=None):
+        alert = Alert(rule.name, message, datetime.now(), path)
+        registry.counter("alerts.raised").inc()
+        self.recent.append(alert)
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except Exception as e:
+                print(f"Error delivering alert: {e}")
+
+    def start(self, change_bus):
+        """Evaluate changes from its own subscription to change_bus"""
+        self.subscription = change_bus.subscribe("alerts", maxsize=50000, policy=DROP_OLDEST)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="alerts", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            with registry.timer("alerts.batch").time():
+                for change in self.subscription.get_batch(10000, timeout=0.5):
+                    self.evaluate(change)
+            self.check_free_space()
+
+    def stop(self):
+        self.running = False
+        if self.subscription is not None:
+            self.subscription.close()
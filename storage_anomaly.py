@@ -0,0 +1,197 @@
+import os
+import math
+import time
+import threading
+import collections
+from datetime import datetime
+
+from storage_bus import DROP_OLDEST
+from storage_metrics import registry
+
+
+class GrowthAnomaly:
+    def __init__(self, kind, key, rate, usual_rate, timestamp):
+        self.kind = kind  # 'directory' or 'process'
+        self.key = key
+        self.rate = rate  # bytes per second
+        self.usual_rate = usual_rate
+        self.timestamp = timestamp
+
+    def describe(self):
+        where = f"in {self.key}" if self.kind == 'directory' else f"from {self.key}"
+        return (f"Unusual growth {where}: {self.rate / (1024 * 1024):,.1f} MB/s "
+                f"(usually {self.usual_rate / (1024 * 1024):,.2f} MB/s)")
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'key': self.key,
+            'rate': round(self.rate),
+            'usual_rate': round(self.usual_rate),
+            'timestamp': self.timestamp.isoformat(),
+        }
+
+
+class _Stream:
+    """Growth statistics for one directory or process, in constant memory"""
+    __slots__ = ('bucket', 'pending', 'mean', 'variance', 'observed', 'streak', 'baseline', 'last_alert')
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.pending = 0  # bytes added in the current bucket
+        self.mean = 0.0  # EWMA of the bytes per second of past buckets
+        self.variance = 0.0  # exponentially weighted variance around mean
+        self.observed = 0  # buckets folded into mean, idle ones included
+        self.streak = 0  # consecutive abnormal buckets
+        self.baseline = 0.0  # mean before the streak started
+        self.last_alert = 0.0
+
+
+class GrowthDetector:
+    """Flags directories and processes that grow much faster than they usually do.
+
+    Growth is summed into fixed buckets of bucket_seconds per directory and
+    per process. As each bucket closes its rate is compared with that
+    stream's EWMA and variance, then folded into them, so memory per stream
+    is constant and nothing is re-read from history. A rate is abnormal when
+    it is above min_rate and more than threshold standard deviations above
+    the mean; sustain abnormal buckets in a row raise a GrowthAnomaly, which
+    is passed to every callback (at most once per cooldown for a stream).
+    A stream is only judged once warmup buckets have been folded in, so a
+    new directory or process isn't flagged against an empty history.
+    """
+
+    def __init__(self, bucket_seconds=2.0, alpha=0.05, threshold=4.0, min_rate=5 * 1024 * 1024,
+                 sustain=2, cooldown=300, max_streams=20000, max_age=60, warmup=30):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_rate = min_rate
+        self.sustain = sustain
+        self.cooldown = cooldown
+        self.max_streams = max_streams
+        self.max_age = max_age  # older changes (replayed history) are ignored
+        self.warmup = warmup
+        self.streams = {'directory': collections.OrderedDict(), 'process': collections.OrderedDict()}
+        self.active = set()  # (kind, key) with bytes in an open bucket
+        self.recent = collections.deque(maxlen=100)
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.subscription = None
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("anomalies")
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("bucket_seconds", 2.0), settings.get("alpha", 0.05),
+                   settings.get("threshold", 4.0),
+                   settings.get("min_mb_per_second", 5) * 1024 * 1024,
+                   settings.get("sustain", 2), settings.get("cooldown", 300),
+                   warmup=settings.get("warmup_buckets", 30))
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def observe(self, change, now=None):
+        """Count one change's growth; shrinking files and moves add nothing"""
+        now = now or time.time()
+        if change.size_change <= 0 or now - change.timestamp.timestamp() > self.max_age:
+            return
+        anomalies = []
+        with self.lock:
+            self._add('directory', os.path.dirname(change.path), change.size_change, now, anomalies)
+            if change.process_name not in (None, "Unknown"):
+                self._add('process', change.process_name, change.size_change, now, anomalies)
+        self._notify(anomalies)
+
+    def tick(self, now=None):
+        """Close buckets that ended without further changes"""
+        now = now or time.time()
+        bucket = int(now // self.bucket_seconds)
+        anomalies = []
+        with self.lock:
+            for kind, key in list(self.active):
+                stream = self.streams[kind].get(key)
+                if stream is None:
+                    self.active.discard((kind, key))
+                elif stream.bucket < bucket:
+                    self._close(kind, key, stream, bucket, now, anomalies)
+        self._notify(anomalies)
+
+    def _add(self, kind, key, amount, now, anomalies):
+        streams = self.streams[kind]
+        bucket = int(now // self.bucket_seconds)
+        stream = streams.get(key)
+        if stream is None:
+            stream = streams[key] = _Stream(bucket)
+            if len(streams) > self.max_streams:
+                old_key, _ = streams.popitem(last=False)
+                self.active.discard((kind, old_key))
+        else:
+            streams.move_to_end(key)
+            if stream.bucket < bucket:
+                self._close(kind, key, stream, bucket, now, anomalies)
+        stream.pending += amount
+        self.active.add((kind, key))
+
+    def _update(self, stream, rate):
+        diff = rate - stream.mean
+        increment = self.alpha * diff
+        stream.mean += increment
+        stream.variance = (1 - self.alpha) * (stream.variance + diff * increment)
+
+    def _close(self, kind, key, stream, bucket, now, anomalies):
+        """Judge and fold in the finished bucket, then the idle ones after it"""
+        rate = stream.pending / self.bucket_seconds
+        limit = stream.mean + self.threshold * math.sqrt(stream.variance)
+        if stream.observed >= self.warmup and rate >= self.min_rate and rate > limit:
+            if stream.streak == 0:
+                stream.baseline = stream.mean
+            stream.streak += 1
+            if stream.streak >= self.sustain and now - stream.last_alert >= self.cooldown:
+                stream.last_alert = now
+                anomalies.append(GrowthAnomaly(kind, key, rate, stream.baseline, datetime.fromtimestamp(now)))
+        else:
+            stream.streak = 0
+        self._update(stream, rate)
+        # Empty buckets count as zero growth; after ~200 the mean is gone anyway
+        idle = min(bucket - stream.bucket - 1, 200)
+        for _ in range(idle):
+            self._update(stream, 0.0)
+        stream.observed += 1 + idle
+        if bucket - stream.bucket > 1:
+            stream.streak = 0
+        stream.bucket = bucket
+        stream.pending = 0
+        self.active.discard((kind, key))
+
+    def _notify(self, anomalies):
+        for anomaly in anomalies:
+            registry.counter("anomalies.raised").inc()
+            self.recent.append(anomaly)
+            for callback in self.callbacks:
+                try:
+                    callback(anomaly)
+                except Exception as e:
+                    print(f"Error in anomaly callback: {e}")
+
+    def start(self, change_bus):
+        """Feed the detector from its own subscription to change_bus"""
+        self.subscription = change_bus.subscribe("anomalies", maxsize=10000, policy=DROP_OLDEST)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="anomalies", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            for change in self.subscription.get_batch(5000, timeout=0.5):
+                self.observe(change)
+            self.tick()
+
+    def stop(self):
+        self.running = False
+        if self.subscription is not None:
+            self.subscription.close()
@@ -0,0 +1,239 @@
+import time
+import queue
+import threading
+import collections
+
+from storage_engine import StorageChange
+from storage_metrics import registry
+
+# Overflow policies for a full subscriber buffer
+DROP_OLDEST = "drop_oldest"  # discard the oldest pending change
+COALESCE = "coalesce"        # merge pending changes to the same path, then drop oldest
+BLOCK = "block"              # make the publisher wait for the subscriber
+POLICIES = (DROP_OLDEST, COALESCE, BLOCK)
+
+
+def merge_changes(older, newer):
+    """Combine two changes to the same path into one net change"""
+    old_path = newer.old_path
+    if newer.change_type == 'moved' and newer.old_path == older.path:
+        # older happened at the source of the move: follow the file
+        if older.change_type == 'created':
+            change_type = 'created'
+        else:
+            change_type = 'moved'
+            if older.change_type == 'moved':
+                old_path = older.old_path
+    elif older.change_type == 'created' and newer.change_type != 'deleted':
+        change_type = 'created'
+    elif older.change_type == 'moved' and newer.change_type == 'modified':
+        # Still a move, now with a size change
+        change_type = 'moved'
+        old_path = older.old_path
+    elif older.change_type == 'moved' and newer.change_type == 'deleted' and older.old_path:
+        # Moved and then deleted: the file is gone from where it was before the move
+        return StorageChange(
+            older.old_path,
+            older.size_change + newer.size_change,
+            'deleted',
+            newer.timestamp,
+            newer.process_name if newer.process_name not in (None, "Unknown") else older.process_name,
+            None,
+            0
+        )
+    else:
+        change_type = newer.change_type
+    if change_type != 'moved':
+        old_path = None
+    process_name = newer.process_name
+    if process_name in (None, "Unknown"):
+        process_name = older.process_name
+    return StorageChange(
+        newer.path,
+        older.size_change + newer.size_change,
+        change_type,
+        newer.timestamp,
+        process_name,
+        old_path,
+        newer.size if newer.size is not None else older.size
+    )
+
+
+class Subscription:
+    """A bounded buffer of changes for a single consumer"""
+
+    def __init__(self, bus, name, maxsize=1000, policy=DROP_OLDEST, block_timeout=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}'")
+        self.bus = bus
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.closed = False
+        self.condition = threading.Condition()
+        if policy == COALESCE:
+            self.buffer = collections.OrderedDict()  # path -> (first publish time, change)
+        else:
+            self.buffer = collections.deque()  # (publish time, change)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked_seconds = 0.0
+
+    def _put(self, change):
+        now = time.time()
+        with self.condition:
+            if self.closed:
+                return
+            self.published += 1
+
+            if self.policy == COALESCE:
+                if change.change_type == 'moved' and change.old_path in self.buffer:
+                    # A pending change to the source moves along with the file
+                    first, earlier = self.buffer.pop(change.old_path)
+                    change = merge_changes(earlier, change)
+                    self.coalesced += 1
+                    now = first
+                pending = self.buffer.get(change.path)
+                if pending is not None:
+                    merged = merge_changes(pending[1], change)
+                    self.coalesced += 1
+                    if merged.path != change.path and merged.path not in self.buffer:
+                        # A move undone by a deletion is reported at the source path
+                        del self.buffer[change.path]
+                        self.buffer[merged.path] = (pending[0], merged)
+                    else:
+                        self.buffer[change.path] = (pending[0], merged)
+                    return
+                if len(self.buffer) >= self.maxsize:
+                    self.buffer.popitem(last=False)
+                    self.dropped += 1
+                self.buffer[change.path] = (now, change)
+
+            elif self.policy == BLOCK:
+                if len(self.buffer) >= self.maxsize:
+                    start = time.time()
+                    while len(self.buffer) >= self.maxsize and not self.closed:
+                        remaining = None
+                        if self.block_timeout is not None:
+                            remaining = self.block_timeout - (time.time() - start)
+                            if remaining <= 0:
+                                break
+                        self.condition.wait(remaining)
+                    self.blocked_seconds += time.time() - start
+                if self.closed:
+                    return
+                if len(self.buffer) >= self.maxsize:
+                    # Timed out waiting, fall back to dropping the oldest
+                    self.buffer.popleft()
+                    self.dropped += 1
+                self.buffer.append((now, change))
+
+            else:
+                if len(self.buffer) >= self.maxsize:
+                    self.buffer.popleft()
+                    self.dropped += 1
+                self.buffer.append((now, change))
+
+            self.condition.notify_all()
+
+    def _pop(self):
+        if self.policy == COALESCE:
+            return self.buffer.popitem(last=False)[1][1]
+        return self.buffer.popleft()[1]
+
+    def get(self, timeout=None):
+        """Return the next change, raising queue.Empty after timeout"""
+        with self.condition:
+            if not self.buffer and not self.closed:
+                self.condition.wait(timeout)
+            if not self.buffer:
+                raise queue.Empty
+            change = self._pop()
+            self.delivered += 1
+            self.condition.notify_all()
+            return change
+
+    def get_batch(self, max_items=1000, timeout=0):
+        """Return up to max_items pending changes, waiting up to timeout for the first"""
+        with self.condition:
+            if not self.buffer and timeout and not self.closed:
+                self.condition.wait(timeout)
+            batch = []
+            while self.buffer and len(batch) < max_items:
+                batch.append(self._pop())
+            self.delivered += len(batch)
+            if batch:
+                self.condition.notify_all()
+            return batch
+
+    @property
+    def lag(self):
+        """Number of changes published but not yet consumed"""
+        return len(self.buffer)
+
+    @property
+    def lag_seconds(self):
+        """Age of the oldest pending change"""
+        with self.condition:
+            if not self.buffer:
+                return 0.0
+            if self.policy == COALESCE:
+                oldest = next(iter(self.buffer.values()))[0]
+            else:
+                oldest = self.buffer[0][0]
+            return time.time() - oldest
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'policy': self.policy,
+            'maxsize': self.maxsize,
+            'lag': self.lag,
+            'lag_seconds': round(self.lag_seconds, 3),
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'blocked_seconds': round(self.blocked_seconds, 3),
+        }
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.bus.unsubscribe(self)
+
+
+class ChangeBus:
+    """Fans changes out to subscribers, each with its own bounded buffer.
+
+    A slow subscriber only ever costs its own maxsize entries; what happens
+    when it falls behind is decided by its overflow policy.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self.lock = threading.Lock()
+        self.published = registry.counter("bus.published")
+
+    def subscribe(self, name, maxsize=1000, policy=DROP_OLDEST, block_timeout=None):
+        subscription = Subscription(self, name, maxsize, policy, block_timeout)
+        with self.lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    def publish(self, change):
+        self.published.inc()
+        # Copy-on-write list, so publishing never takes the bus lock
+        for subscription in self.subscriptions:
+            subscription._put(change)
+
+    def stats(self):
+        return [subscription.stats() for subscription in self.subscriptions]
@@ -0,0 +1,169 @@
+import importlib
+from datetime import datetime
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QColor, QPainter, QPen, QFont, QPolygonF
+
+from storage_metrics import registry
+
+DEFAULT_BACKEND = "qpainter"
+COLORS = ["#0078d4", "#e81123", "#107c10", "#ff8c00", "#5c2d91", "#00b7c3", "#b4009e", "#7a7574"]
+
+
+def format_bytes(value):
+    for unit, size in (("TB", 1024 ** 4), ("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if abs(value) >= size:
+            return f"{value / size:.1f}{unit}"
+    return f"{value:.0f}B"
+
+
+def format_time(timestamp, span):
+    return datetime.fromtimestamp(timestamp).strftime("%H:%M" if span <= 2 * 86400 else "%d %b")
+
+
+class ChartSeries:
+    def __init__(self, label, points):
+        self.label = label
+        self.points = points  # [(unix time, value)], oldest first
+
+
+class QPainterChart(QWidget):
+    """Line chart drawn with QPainter; needs nothing beyond PyQt5"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = []
+        self.title = ""
+        self.setMinimumSize(400, 250)
+
+    def plot(self, series, title=""):
+        self.series = series
+        self.title = title
+        self.update()
+
+    def plot_width(self):
+        """Pixels available for the data, so callers can decimate to fit"""
+        return max(1, self.width() - 80)
+
+    @registry.timed("ui.chart_paint")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(43, 43, 43))
+        font = QFont()
+        font.setPointSize(8)
+        painter.setFont(font)
+        left, top, right, bottom = 70, 24, self.width() - 10, self.height() - 40
+        points = [point for series in self.series for point in series.points]
+        painter.setPen(QColor(255, 255, 255))
+        painter.drawText(left, 4, right - left, 18, Qt.AlignLeft | Qt.AlignVCenter, self.title)
+        if not points or right <= left or bottom <= top:
+            painter.drawText(self.rect(), Qt.AlignCenter, "No data yet")
+            return
+        x_min = min(x for x, _ in points)
+        x_max = max(x for x, _ in points)
+        y_min = min(y for _, y in points)
+        y_max = max(y for _, y in points)
+        if x_max == x_min:
+            x_max = x_min + 1
+        if y_max == y_min:
+            y_min, y_max = y_min - 1, y_max + 1
+        x_scale = (right - left) / (x_max - x_min)
+        y_scale = (bottom - top) / (y_max - y_min)
+
+        # Axes with a few labels
+        grid = QPen(QColor(80, 80, 80), 1)
+        for i in range(5):
+            y = bottom - i * (bottom - top) / 4
+            painter.setPen(grid)
+            painter.drawLine(left, int(y), right, int(y))
+            painter.setPen(QColor(200, 200, 200))
+            painter.drawText(0, int(y) - 8, left - 6, 16, Qt.AlignRight | Qt.AlignVCenter,
+                             format_bytes(y_min + i * (y_max - y_min) / 4))
+        for i in range(5):
+            x = left + i * (right - left) / 4
+            painter.drawText(int(x) - 40, bottom + 4, 80, 16, Qt.AlignCenter,
+                             format_time(x_min + i * (x_max - x_min) / 4, x_max - x_min))
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        for i, series in enumerate(self.series):
+            color = QColor(COLORS[i % len(COLORS)])
+            painter.setPen(QPen(color, 1.5))
+            painter.drawPolyline(QPolygonF([QPointF(left + (x - x_min) * x_scale, bottom - (y - y_min) * y_scale)
+                                            for x, y in series.points]))
+            painter.drawText(left + 130 * i, bottom + 20, 125, 16, Qt.AlignLeft | Qt.AlignVCenter,
+                             series.label)
+
+
+class MatplotlibChart(QWidget):
+    """Line chart on a matplotlib canvas; matplotlib is imported when the first one is made"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        backend = importlib.import_module("matplotlib.backends.backend_qt5agg")
+        figure = importlib.import_module("matplotlib.figure").Figure(figsize=(6, 3), tight_layout=True)
+        self.canvas = backend.FigureCanvasQTAgg(figure)
+        self.axes = figure.add_subplot(111)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.canvas)
+
+    def plot(self, series, title=""):
+        self.axes.clear()
+        self.axes.set_title(title, fontsize=9)
+        for i, item in enumerate(series):
+            if item.points:
+                self.axes.plot([datetime.fromtimestamp(x) for x, _ in item.points],
+                               [y for _, y in item.points], label=item.label, color=COLORS[i % len(COLORS)],
+                               linewidth=1)
+        self.axes.yaxis.set_major_formatter(lambda value, position: format_bytes(value))
+        if series:
+            self.axes.legend(fontsize=8, loc="upper left")
+        self.canvas.draw_idle()
+
+    def plot_width(self):
+        return max(1, self.canvas.width())
+
+
+class PyqtgraphChart(QWidget):
+    """Line chart on a pyqtgraph PlotWidget; pyqtgraph is imported when the first one is made"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        pg = importlib.import_module("pyqtgraph")
+        self.pg = pg
+        self.widget = pg.PlotWidget(axisItems={'bottom': pg.DateAxisItem()})
+        self.widget.addLegend()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.widget)
+
+    def plot(self, series, title=""):
+        self.widget.clear()
+        self.widget.setTitle(title)
+        for i, item in enumerate(series):
+            self.widget.plot([x for x, _ in item.points], [y for _, y in item.points],
+                             pen=self.pg.mkPen(COLORS[i % len(COLORS)], width=1), name=item.label)
+
+    def plot_width(self):
+        return max(1, self.widget.width())
+
+
+BACKENDS = {
+    "qpainter": QPainterChart,
+    "matplotlib": MatplotlibChart,
+    "pyqtgraph": PyqtgraphChart,
+}
+
+
+def create_chart(backend=DEFAULT_BACKEND, parent=None):
+    """A chart widget for the named backend, falling back to QPainter if it can't be loaded"""
+    chart_class = BACKENDS.get(backend)
+    if chart_class is None:
+        print(f"Unknown chart backend '{backend}', using {DEFAULT_BACKEND}")
+        chart_class = QPainterChart
+    try:
+        return chart_class(parent)
+    except ImportError as e:
+        print(f"Chart backend '{backend}' is not available ({e}), using {DEFAULT_BACKEND}")
+        return QPainterChart(parent)
@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import copy
+import secrets
+
+from storage_filters import PathFilter
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+CONFIG_ENV_VAR = "STORAGE_MONITOR_CONFIG"
+CONFIG_FILENAMES = ["storage_monitor.json", "storage_monitor.toml"]
+# POSTs to the daemon must carry the per-install token in this header
+DAEMON_TOKEN_HEADER = "X-Storage-Monitor-Token"
+
+# Scan modes: 'poll' roots are walked periodically by the polling engine,
+# 'watch' roots only get event-driven (watchdog) monitoring
+SCAN_MODES = ("poll", "watch")
+
+if os.name == "nt":
+    DEFAULT_ROOTS = [
+        {"path": "~\\AppData\\Local\\Temp", "mode": "poll"},
+        {"path": "~\\AppData\\Roaming", "mode": "poll"},
+        {"path": "~\\Downloads", "mode": "poll"},
+        {"path": "~\\Desktop", "mode": "poll"},
+        {"path": "C:\\Windows\\Temp", "mode": "poll"},
+        {"path": "C:\\Users\\Public\\Downloads", "mode": "poll"},
+        {"path": "~\\AppData\\Local", "mode": "watch"},
+        {"path": "~\\Documents", "mode": "watch"},
+        {"path": "C:\\Program Files", "mode": "watch"},
+        {"path": "C:\\Program Files (x86)", "mode": "watch"},
+        {"path": "C:\\Users\\Public\\Desktop", "mode": "watch"},
+    ]
+else:
+    DEFAULT_ROOTS = [
+        {"path": "/tmp", "mode": "poll"},
+        {"path": "~/Downloads", "mode": "poll"},
+        {"path": "~/Desktop", "mode": "poll"},
+        {"path": "~/Documents", "mode": "watch"},
+    ]
+
+DEFAULT_CONFIG = {
+    "poll_interval": 2,
+    "reload_interval": 5,
+    "filters": {},
+    "roots": DEFAULT_ROOTS,
+}
+
+
+class ConfigError(Exception):
+    pass
+
+
+def _merge_filters(base, override):
+    merged = copy.deepcopy(base or {})
+    for key, value in (override or {}).items():
+        if isinstance(value, list):
+            merged[key] = list(merged.get(key, [])) + list(value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def expand_path(path):
+    return os.path.normpath(os.path.expandvars(os.path.expanduser(path)))
+
+
+class RootConfig:
+    def __init__(self, path, mode="poll", interval=2, filters=None, enabled=True):
+        if mode not in SCAN_MODES:
+            raise ConfigError(f"Unknown scan mode '{mode}' for {path}")
+        self.path = expand_path(path)
+        self.mode = mode
+        self.interval = float(interval)
+        self.filters = filters or {}
+        self.enabled = enabled
+        self.path_filter = PathFilter.from_config(self.filters)
+
+    @property
+    def key(self):
+        return os.path.normcase(self.path)
+
+    def same_settings(self, other):
+        return (self.mode == other.mode and self.interval == other.interval
+                and self.filters == other.filters)
+
+    def __repr__(self):
+        return f"RootConfig({self.path!r}, mode={self.mode!r}, interval={self.interval})"
+
+
+class MonitorConfig:
+    def __init__(self, data=None, source=None):
+        data = data if data is not None else DEFAULT_CONFIG
+        self.source = source
+        self.poll_interval = float(data.get("poll_interval", DEFAULT_CONFIG["poll_interval"]))
+        self.reload_interval = float(data.get("reload_interval", DEFAULT_CONFIG["reload_interval"]))
+        self.filters = data.get("filters", {})
+        self.path_filter = PathFilter.from_config(self.filters)
+        self.extra = {k: v for k, v in data.items()
+                      if k not in ("poll_interval", "reload_interval", "filters", "roots")}
+
+        self.roots = []
+        seen = set()
+        for entry in data.get("roots", DEFAULT_ROOTS):
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            if "path" not in entry:
+                raise ConfigError(f"Root entry without a path: {entry}")
+            root = RootConfig(
+                entry["path"],
+                mode=entry.get("mode", "poll"),
+                interval=entry.get("interval", self.poll_interval),
+                filters=_merge_filters(self.filters, entry.get("filters")),
+                enabled=entry.get("enabled", True),
+            )
+            if root.enabled and root.key not in seen:
+                seen.add(root.key)
+                self.roots.append(root)
+
+    def section(self, name, default=None):
+        """Settings for optional subsystems (top-level keys other than roots)"""
+        return self.extra.get(name, {} if default is None else default)
+
+    @property
+    def poll_roots(self):
+        return [root for root in self.roots if root.mode == "poll"]
+
+    @property
+    def root_paths(self):
+        return [root.path for root in self.roots]
+
+    def nested_roots(self, root, roots=None):
+        """Paths of roots inside root, which are scanned on their own"""
+        prefix = root.key.rstrip(os.sep) + os.sep
+        return [other.path for other in (self.roots if roots is None else roots)
+                if other is not root and other.key.startswith(prefix)]
+
+    def root_for(self, path):
+        """Return the most specific root containing path, or None"""
+        path = os.path.normcase(path)
+        best = None
+        for root in self.roots:
+            if path == root.key or path.startswith(root.key.rstrip(os.sep) + os.sep):
+                if best is None or len(root.key) > len(best.key):
+                    best = root
+        return best
+
+
+def data_dir():
+    """Per-user directory for journals, indexes and other runtime data"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return os.path.join(base, "StorageMonitor")
+    base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, "storage-monitor")
+
+
+def daemon_token(settings=None):
+    """Secret the daemon requires on POST requests, from the "daemon" config section or
+    daemon.token in the data directory (created, readable only by this user, on first use)"""
+    if settings and settings.get("token"):
+        return settings["token"]
+    path = os.path.join(data_dir(), "daemon.token")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    os.makedirs(data_dir(), exist_ok=True)
+    token = secrets.token_hex(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another process created it first
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def default_config_path():
+    env_path = os.environ.get(CONFIG_ENV_VAR)
+    if env_path:
+        return env_path
+
+    # Next to the script, or next to the executable when frozen by PyInstaller
+    if getattr(sys, "frozen", False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for name in CONFIG_FILENAMES:
+        candidate = os.path.join(base_dir, name)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _read_config_file(path):
+    if path.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ConfigError("TOML config files require Python 3.11+, use JSON instead")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_config(path=None):
+    """Load the monitor configuration, falling back to the built-in defaults"""
+    path = path or default_config_path()
+    if not path:
+        return MonitorConfig()
+    try:
+        data = _read_config_file(path)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Could not read config {path}: {e}")
+    return MonitorConfig(data, source=path)
+
+
+def diff_roots(old_config, new_config):
+    """Compare two configs, returning (added, removed, changed) root lists"""
+    old_roots = {root.key: root for root in old_config.roots}
+    new_roots = {root.key: root for root in new_config.roots}
+    added = [root for key, root in new_roots.items() if key not in old_roots]
+    removed = [root for key, root in old_roots.items() if key not in new_roots]
+    changed = [root for key, root in new_roots.items()
+               if key in old_roots and not root.same_settings(old_roots[key])]
+    return added, removed, changed
+
+
+class ConfigWatcher:
+    """Polls the config file's mtime and reloads it when it changes.
+
+    check() is cheap (one stat at most every reload_interval seconds) so it
+    can be called from an existing monitoring loop instead of a new thread.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.source
+        self._mtime = self._get_mtime()
+        self._last_check = 0
+
+    def _get_mtime(self):
+        if not self.path:
+            return None
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def check(self, now):
+        """Return (new_config, added, removed, changed) if the file changed, else None"""
+        if not self.path or now - self._last_check < self.config.reload_interval:
+            return None
+        self._last_check = now
+
+        mtime = self._get_mtime()
+        if mtime is None or mtime == self._mtime:
+            return None
+        self._mtime = mtime
+
+        new_config = load_config(self.path)
+        added, removed, changed = diff_roots(self.config, new_config)
+        self.config = new_config
+        return new_config, added, removed, changed
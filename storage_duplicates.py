@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from storage_config import data_dir
+from storage_metrics import registry
+from storage_reader import LargeFileReader
+
+DEFAULT_BLOCK = 64 * 1024  # bytes hashed from each end of a file for the partial hash
+HASH_MODE = "blake2b-128"  # what LargeFileReader.hash computes; part of every cache key
+
+
+class HashCache:
+    """Hashes keyed by (path, size, mtime, mode), saved as JSON.
+
+    A file whose size or modification time changed misses the cache, so a
+    re-run only hashes files that changed since the last one. The mode
+    names the algorithm and, for partial hashes, the block size, so hashes
+    made with other settings are never compared with new ones.
+    """
+
+    def __init__(self, path=None, max_entries=200000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()  # path -> [size, mtime_ns, {mode: digest}]
+        self.lock = threading.Lock()
+        self.hits = 0
+        if path:
+            self.load()
+
+    def get(self, path, size, mtime, mode):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry[0] != size or entry[1] != mtime:
+                return None
+            digest = entry[2].get(mode)
+            if digest is not None:
+                self.hits += 1
+                self.entries.move_to_end(path)
+            return digest
+
+    def put(self, path, size, mtime, mode, digest):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry[0] != size or entry[1] != mtime:
+                entry = [size, mtime, {}]
+            entry[2][mode] = digest
+            self.entries[path] = entry
+            self.entries.move_to_end(path)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                # Entries from before hashes were keyed by mode are dropped
+                self.entries = collections.OrderedDict(
+                    (path, entry) for path, entry in json.load(f).items()
+                    if len(entry) == 3 and isinstance(entry[2], dict))
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.entries = collections.OrderedDict()
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self.lock:
+                data = json.dumps(self.entries)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            print(f"Error saving hash cache: {e}")
+
+
+class DuplicateGroup:
+    def __init__(self, size, digest, paths):
+        self.size = size
+        self.digest = digest
+        self.paths = sorted(paths)
+
+    @property
+    def wasted(self):
+        """Bytes that deleting all but one copy would free"""
+        return self.size * (len(self.paths) - 1)
+
+    def to_dict(self):
+        return {'size': self.size, 'hash': self.digest, 'paths': self.paths, 'wasted': self.wasted}
+
+
+class DuplicateFinder:
+    """Finds files with identical contents among (path, size) pairs.
+
+    Sizes come from the scan index, so only files sharing a size are ever
+    opened. Those are compared by a hash of their first and last blocks,
+    and only files that still match get a full hash. Hashing runs on a
+    thread pool (hashlib releases the GIL) through the shared reader, which
+    bounds how many files are read at once, and results are cached.
+    """
+
+    def __init__(self, cache=None, workers=4, min_size=1024 * 1024, block=DEFAULT_BLOCK, reader=None):
+        self.cache = cache
+        self.reader = reader or LargeFileReader(max_readers=workers)
+        self.workers = workers
+        self.min_size = min_size
+        self.block = block
+        self.stats = {}
+        self.lock = threading.Lock()  # one run at a time; a second caller then hits the cache
+
+    @classmethod
+    def from_config(cls, config, reader=None):
+        settings = config.section("duplicates")
+        cache = None
+        if settings.get("cache", True):
+            cache = HashCache(settings.get("cache_path") or os.path.join(data_dir(), "hash-cache.json"))
+        return cls(cache, settings.get("workers", min(4, os.cpu_count() or 1)),
+                   int(settings.get("min_size_mb", 1) * 1024 * 1024),
+                   int(settings.get("block_kb", DEFAULT_BLOCK // 1024) * 1024), reader)
+
+    def _hash(self, path, size, kind):
+        mode = f"{HASH_MODE}/{self.block}" if kind == "partial" else HASH_MODE
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if self.cache is not None:
+                digest = self.cache.get(path, size, mtime, mode)
+                if digest is not None:
+                    return path, digest
+            digest = self.reader.hash(path, size, self.block if kind == "partial" else None)
+            if self.cache is not None:
+                self.cache.put(path, size, mtime, mode, digest)
+            return path, digest
+        except (OSError, ValueError):
+            # Gone, locked or changed since it was indexed
+            return path, None
+
+    def _regroup(self, pool, groups, kind):
+        """Split each group of same-size paths by hash, dropping singletons"""
+        jobs = [(size, path) for size, paths in groups for path in paths]
+        self.stats[f'{kind}_hashed'] = len(jobs)
+        results = pool.map(lambda job: (job[0],) + self._hash(job[1], job[0], kind), jobs)
+        split = collections.defaultdict(list)
+        for size, path, digest in results:
+            if digest is not None:
+                split[(size, digest)].append(path)
+        return [(key, paths) for key, paths in split.items() if len(paths) > 1]
+
+    @registry.timed("duplicates.find")
+    def find(self, files):
+        """Groups of identical files, most wasted space first"""
+        with self.lock:
+            return self._find(files)
+
+    def _find(self, files):
+        start = time.time()
+        hits = self.cache.hits if self.cache is not None else 0
+        by_size = collections.defaultdict(list)
+        for path, size in files:
+            if size >= self.min_size:
+                by_size[size].append(path)
+        groups = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+        self.stats = {'files': sum(len(paths) for paths in by_size.values()),
+                      'same_size': sum(len(paths) for _, paths in groups)}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash") as pool:
+            partial = self._regroup(pool, groups, "partial")
+            # Files no bigger than two blocks were hashed whole already
+            done = [(key, paths) for key, paths in partial if key[0] <= 2 * self.block]
+            pending = [(key[0], paths) for key, paths in partial if key[0] > 2 * self.block]
+            full = done + self._regroup(pool, pending, "full")
+
+        if self.cache is not None:
+            self.stats['cache_hits'] = self.cache.hits - hits
+            self.cache.save()
+        self.stats['seconds'] = round(time.time() - start, 3)
+        duplicates = [DuplicateGroup(size, digest, paths) for (size, digest), paths in full]
+        return sorted(duplicates, key=lambda group: group.wasted, reverse=True)
+
+    def report(self, files, count=50):
+        """find() as a JSON-ready dict with the count largest groups"""
+        groups = self.find(files)
+        return {
+            'groups': [group.to_dict() for group in groups[:count]],
+            'group_count': len(groups),
+            'wasted': sum(group.wasted for group in groups),
+            'stats': dict(self.stats),
+        }
@@ -0,0 +1,696 @@
+import os
+import time
+import threading
+import collections
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import psutil
+
+from storage_filters import walk_files
+from storage_config import load_config, ConfigWatcher, ConfigError, MonitorConfig
+from storage_metrics import registry
+from storage_volumes import budgeted, budget_for, configured_volumes, is_under, volume_for
+from storage_growth import GrowthHistory
+
+
+class StorageChange:
+    def __init__(self, path, size_change, change_type, timestamp, process_name=None,
+                 old_path=None, size=None):
+        self.path = path
+        self.size_change = size_change
+        self.change_type = change_type  # 'created', 'modified', 'deleted', 'moved'
+        self.timestamp = timestamp
+        self.process_name = process_name
+        self.old_path = old_path  # where a 'moved' file came from
+        self.size = size  # file size after the change, when known
+        self.file_extension = self._get_extension()
+
+    def _get_extension(self):
+        try:
+            return Path(self.path).suffix.lower()
+        except:
+            return ""
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'size_change': self.size_change,
+            'change_type': self.change_type,
+            'timestamp': self.timestamp.isoformat(),
+            'process_name': self.process_name,
+            'file_extension': self.file_extension,
+            'old_path': self.old_path,
+            'size': self.size,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['path'],
+            data['size_change'],
+            data['change_type'],
+            datetime.fromisoformat(data['timestamp']),
+            data.get('process_name'),
+            data.get('old_path'),
+            data.get('size'),
+        )
+
+
+class GamingSession:
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.end_time = None
+        self.start_snapshot = {}
+        self.end_snapshot = {}
+        self.changes = []
+        self.total_size_change = 0
+
+    def add_change(self, change):
+        self.changes.append(change)
+        self.total_size_change += change.size_change
+
+    def to_dict(self):
+        return {
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'start_snapshot': self.start_snapshot,
+            'end_snapshot': self.end_snapshot,
+            'change_count': len(self.changes),
+            'total_size_change': self.total_size_change,
+        }
+
+
+class ProcessResolver:
+    """Finds the process holding a file open.
+
+    Every sweep over the processes' open files records all of them, not just
+    the file asked about, in a bounded history of path -> process and
+    directory -> process. Later lookups (and deleted files, which can't be
+    looked up at all once they're gone) are answered from that history in
+    O(1) instead of another sweep.
+    """
+
+    def __init__(self, cache_timeout=10, history_seconds=300, max_paths=50000, max_dirs=10000,
+                 min_sweep_interval=1.0):
+        self.cache_timeout = cache_timeout
+        self.history_seconds = history_seconds
+        self.max_paths = max_paths
+        self.max_dirs = max_dirs
+        self.min_sweep_interval = min_sweep_interval
+        self.recent_paths = collections.OrderedDict()  # normcased path -> (time, process name)
+        self.recent_dirs = collections.OrderedDict()  # normcased directory -> (time, process name)
+        self.last_sweep = 0
+        self.lock = threading.Lock()
+
+    def _lookup(self, history, key, max_age):
+        with self.lock:
+            entry = history.get(key)
+        if entry is not None and time.time() - entry[0] < max_age:
+            return entry[1]
+        return None
+
+    def _remember(self, history, key, now, name, limit):
+        history[key] = (now, name)
+        history.move_to_end(key)
+        if len(history) > limit:
+            history.popitem(last=False)
+
+    def sweep(self):
+        """Record every file currently open by any process"""
+        now = time.time()
+        self.last_sweep = now
+        registry.counter("attribution.sweeps").inc()
+        seen = []
+        for proc in psutil.process_iter(['pid', 'name']):
+            try:
+                for file in proc.open_files():
+                    seen.append((os.path.normcase(file.path), proc.info['name']))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            except Exception:
+                continue
+        with self.lock:
+            for path, name in seen:
+                self._remember(self.recent_paths, path, now, name, self.max_paths)
+                self._remember(self.recent_dirs, os.path.dirname(path), now, name, self.max_dirs)
+
+    @registry.timed("attribution.lookup")
+    def get_process_using_file(self, file_path):
+        key = os.path.normcase(file_path)
+        try:
+            name = self._lookup(self.recent_paths, key, self.cache_timeout)
+            if name is not None:
+                registry.counter("attribution.cache_hits").inc()
+                return name
+
+            if time.time() - self.last_sweep >= self.min_sweep_interval:
+                self.sweep()
+                name = self._lookup(self.recent_paths, key, self.cache_timeout)
+                if name is not None:
+                    return name
+        except Exception:
+            pass
+        return "Unknown"
+
+    def recent_process(self, file_path, max_age=None):
+        """Process last seen with file_path open, from the history only, or None"""
+        return self._lookup(self.recent_paths, os.path.normcase(file_path),
+                            self.history_seconds if max_age is None else max_age)
+
+    def get_deleted_file_process(self, file_path):
+        """Best guess for a file that is already gone, without sweeping"""
+        key = os.path.normcase(file_path)
+        name = self._lookup(self.recent_paths, key, self.history_seconds)
+        if name is None:
+            name = self._lookup(self.recent_dirs, os.path.dirname(key), self.history_seconds)
+        registry.counter("attribution.deleted_hits" if name else "attribution.deleted_misses").inc()
+        return name or "Unknown"
+
+
+class PollingScanner:
+    """Polling change detector for the configured 'poll' roots.
+
+    Front-ends provide callbacks instead of subclassing, so the same scanner
+    runs in the GUI's QThread and in the headless daemon. When a file_index
+    is given it is seeded from the baseline scan and kept current with every
+    size change the scanner sees; 'watch' roots are indexed once at start-up.
+
+    With a volume given, only the roots on that volume (out of volumes) are
+    scanned, and every file stat is charged to budget if there is one.
+    """
+
+    def __init__(self, config=None, on_change=None, on_status=None, on_config_reloaded=None,
+                 file_index=None, io_sampler=None, volume=None, volumes=(), budget=None,
+                 resolver=None, watch_config=True):
+        self.running = False
+        self.config = config or load_config()
+        self.config_watcher = ConfigWatcher(self.config) if watch_config else None
+        self.pending_configs = collections.deque()  # reloads handed over by VolumeScanners
+        self.volume = volume
+        self.volumes = list(volumes)
+        self.budget = budget
+        self.file_sizes = {}  # root key -> {file path: size}
+        self.file_ids = {}  # root key -> {file path: inode}, where available
+        self.file_times = {}  # root key -> {file path: mtime}
+        self.next_scan = {}  # root key -> time of the next poll
+        self.resolver = resolver or ProcessResolver(cache_timeout=10)
+        self.file_index = file_index
+        self.io_sampler = io_sampler
+        self.on_change = on_change or (lambda change: None)
+        self.on_status = on_status or (lambda status: None)
+        self.on_config_reloaded = on_config_reloaded or (lambda config: None)
+
+    def run(self):
+        self.running = True
+        self.on_status("Initializing file monitoring...")
+
+        # Initialize file sizes
+        self.scan_files()
+        self.on_status("Monitoring active - scanning for changes...")
+        self.index_watch_roots([root for root in self.config.roots
+                                if root.mode != "poll" and self.owns(root)])
+
+        while self.running:
+            try:
+                self.reload_config()
+                self.check_for_changes()
+                time.sleep(self._tick_interval())
+            except Exception as e:
+                self.on_status(f"Error: {str(e)}")
+                time.sleep(5)
+
+    def _tick_interval(self):
+        intervals = [root.interval for root in self.poll_roots]
+        return max(0.1, min(intervals + [self.config.reload_interval]))
+
+    def owns(self, root):
+        return self.volume is None or volume_for(root.path, self.volumes) == self.volume
+
+    @property
+    def poll_roots(self):
+        return [root for root in self.config.poll_roots if self.owns(root)]
+
+    @property
+    def tracked_files(self):
+        return sum(len(sizes) for sizes in list(self.file_sizes.values()))
+
+    def root_file_counts(self):
+        """root key -> files tracked under it, as of the last check"""
+        return {key: len(sizes) for key, sizes in list(self.file_sizes.items())}
+
+    def _skip_dirs(self, root, roots=None):
+        """Nested roots, plus other volumes mounted inside root (they have their own scanner)"""
+        skip = self.config.nested_roots(root, roots)
+        if self.volume is not None:
+            skip += [volume for volume in self.volumes
+                     if volume != self.volume and is_under(volume, root.path)]
+        return skip
+
+    def _walk(self, root, skip_dirs, file_ids=None, file_times=None):
+        return budgeted(walk_files(root.path, root.path_filter, skip_dirs, file_ids, file_times),
+                        self.budget)
+
+    def files(self):
+        """(path, size, mtime) for every file in the polled roots, as of the last check"""
+        for key, sizes in list(self.file_sizes.items()):
+            times = self.file_times.get(key, {})
+            for path, size in list(sizes.items()):
+                yield path, size, times.get(path)
+
+    def scan_files(self):
+        """Initial scan of files to establish baseline"""
+        self.file_sizes.clear()
+        self.file_ids.clear()
+        self.file_times.clear()
+        self.next_scan.clear()
+        for root in self.poll_roots:
+            self.scan_root(root)
+
+    def scan_root(self, root):
+        """Baseline scan of a single root, without reporting changes"""
+        sizes = {}
+        file_ids = {}
+        file_times = {}
+        if os.path.exists(root.path):
+            skip = self._skip_dirs(root, self.config.poll_roots)
+            for file_path, size in self._walk(root, skip, file_ids, file_times):
+                sizes[file_path] = size
+        self.file_sizes[root.key] = sizes
+        self.file_ids[root.key] = file_ids
+        self.file_times[root.key] = file_times
+        self.next_scan[root.key] = time.time() + root.interval
+        if self.file_index is not None:
+            self.file_index.replace_prefix(root.path, sizes, self._skip_dirs(root))
+
+    def index_watch_roots(self, roots):
+        """Index roots this scanner doesn't poll, once, in the background"""
+        if self.file_index is None or not roots:
+            return
+
+        def index_roots():
+            for root in roots:
+                if not self.running or not os.path.exists(root.path):
+                    continue
+                skip = self._skip_dirs(root)
+                self.file_index.replace_prefix(root.path, dict(self._walk(root, skip)), skip)
+
+        threading.Thread(target=index_roots, daemon=True).start()
+
+    def reload_config(self):
+        """Apply config file edits by adding/removing roots, without a full rescan"""
+        if self.config_watcher is None:
+            while self.pending_configs:
+                self.apply_config(*self.pending_configs.popleft())
+            return
+        try:
+            result = self.config_watcher.check(time.time())
+        except ConfigError as e:
+            self.on_status(f"Config error: {e}")
+            return
+        if result is None:
+            return
+
+        new_config, added, removed, changed = result
+        self.apply_config(new_config, added, removed, changed)
+        self.on_config_reloaded(new_config)
+        self.on_status(
+            f"Configuration reloaded: {len(added)} added, {len(removed)} removed, "
+            f"{len(changed)} changed roots"
+        )
+
+    def queue_config(self, new_config, added, removed, changed):
+        """Hand a reload to this scanner's own thread, which applies it between checks"""
+        self.pending_configs.append((new_config, added, removed, changed))
+
+    def apply_config(self, new_config, added, removed, changed):
+        self.config = new_config
+        if self.volume is not None:
+            # Set here, on the scanner's thread, so a walk never sees the budget swapped under it
+            self.budget = budget_for(new_config, self.volume)
+        for root in removed + changed:
+            if not self.owns(root):
+                continue
+            self.file_sizes.pop(root.key, None)
+            self.file_ids.pop(root.key, None)
+            self.file_times.pop(root.key, None)
+            self.next_scan.pop(root.key, None)
+            if self.file_index is not None:
+                self.file_index.remove_prefix(root.path, self._skip_dirs(root))
+        for root in added + changed:
+            if root.mode == "poll" and self.owns(root):
+                self.scan_root(root)
+        self.index_watch_roots([root for root in added + changed
+                                if root.mode != "poll" and self.owns(root)])
+
+    def check_for_changes(self):
+        """Check poll roots that are due for file changes"""
+        now = time.time()
+        for root in self.poll_roots:
+            if now >= self.next_scan.get(root.key, 0):
+                with registry.timer("scan.check_root").time():
+                    self.check_root(root)
+                self.next_scan[root.key] = now + root.interval
+
+    def check_root(self, root):
+        """Check a single root for file changes using polling"""
+        if root.key not in self.file_sizes:
+            self.scan_root(root)
+            return
+        file_sizes = self.file_sizes[root.key]
+        old_ids = self.file_ids.get(root.key, {})
+        current_files = {}
+        current_ids = {}
+        current_times = {}
+
+        # Get current file sizes, skipping excluded subtrees entirely
+        if os.path.exists(root.path):
+            skip = self._skip_dirs(root, self.config.poll_roots)
+            for file_path, size in self._walk(root, skip, current_ids, current_times):
+                current_files[file_path] = size
+        registry.counter("scan.files_stated").inc(len(current_files))
+        self.file_ids[root.key] = current_ids
+        self.file_times[root.key] = current_times
+
+        deleted_files = set(file_sizes.keys()) - set(current_files.keys())
+        moves = {}
+        if deleted_files:
+            created_files = [path for path in current_files if path not in file_sizes]
+            moves = self.match_moves(deleted_files, created_files, file_sizes, current_files,
+                                     old_ids, current_ids)
+        for new_path, old_path in moves.items():
+            size = current_files[new_path]
+            process_name = self.resolver.get_process_using_file(new_path)
+            self.on_change(StorageChange(
+                new_path,
+                0,
+                'moved',
+                datetime.now(),
+                process_name,
+                old_path,
+                size
+            ))
+            del file_sizes[old_path]
+            file_sizes[new_path] = size
+            deleted_files.discard(old_path)
+            if self.file_index is not None:
+                self.file_index.remove(old_path)
+                self.file_index.update(new_path, size)
+
+        # Check for changes
+        for file_path, current_size in current_files.items():
+            old_size = file_sizes.get(file_path, 0)
+
+            if current_size != old_size:
+                size_change = current_size - old_size
+                if size_change != 0:
+                    change_type = 'modified' if old_size > 0 else 'created'
+                    process_name = self.resolver.get_process_using_file(file_path)
+                    if process_name == "Unknown" and size_change > 0 and self.io_sampler is not None:
+                        # Nothing has the file open any more; fall back to who was writing
+                        process_name = self.io_sampler.guess_writer(time.time(), size_change) or process_name
+
+                    change = StorageChange(
+                        file_path,
+                        size_change,
+                        change_type,
+                        datetime.now(),
+                        process_name,
+                        size=current_size
+                    )
+
+                    self.on_change(change)
+
+                file_sizes[file_path] = current_size
+                if self.file_index is not None:
+                    self.file_index.update(file_path, current_size)
+
+        # Check for deleted files
+        for file_path in deleted_files:
+            old_size = file_sizes[file_path]
+            if old_size > 0:
+                change = StorageChange(
+                    file_path,
+                    -old_size,
+                    'deleted',
+                    datetime.now(),
+                    self.resolver.get_deleted_file_process(file_path),
+                    size=0
+                )
+                self.on_change(change)
+
+            del file_sizes[file_path]
+            if self.file_index is not None:
+                self.file_index.remove(file_path)
+
+    @staticmethod
+    def match_moves(deleted, created, old_sizes, new_sizes, old_ids, new_ids):
+        """Pair files that vanished with files that appeared, as {new path: old path}.
+
+        Files match on inode and size. Without inodes (Windows) the files must
+        also keep their name (a move) or their directory (a rename), and the
+        match must be unambiguous; size alone pairs unrelated files too often.
+        Moves are matched before renames.
+        """
+        candidates = {}
+        for path in deleted:
+            if old_sizes[path] > 0:
+                key = (old_sizes[path], old_ids.get(path))
+                candidates.setdefault(key, []).append(path)
+        moves = {}
+        if not candidates:
+            return moves
+        for related in (os.path.basename, os.path.dirname):
+            for path in created:
+                file_id = new_ids.get(path)
+                sources = candidates.get((new_sizes[path], file_id))
+                if not sources or path in moves:
+                    continue
+                if file_id is None:
+                    matches = [source for source in sources if related(source) == related(path)]
+                    if len(matches) != 1:
+                        continue
+                    source = matches[0]
+                elif related is os.path.basename:
+                    source = sources[0]
+                else:
+                    continue
+                sources.remove(source)
+                moves[path] = source
+        return moves
+
+    def stop(self):
+        self.running = False
+
+
+class VolumeScanners:
+    """Runs a PollingScanner per volume, each on its own thread.
+
+    Roots are grouped by the volume they are on, and each volume's scanner
+    gets its own I/O budget from the "volumes" config section, so a slow
+    external or network drive never delays changes on the system drive.
+    Takes the same callbacks as PollingScanner. The config file is watched
+    here and reloads are handed to every scanner to apply on its own thread.
+    A reload that changes the volumes (the "mounts" list, or the discovered
+    drives) restarts the scanners, since roots may have changed volume.
+    """
+
+    def __init__(self, config=None, on_change=None, on_status=None, on_config_reloaded=None,
+                 file_index=None, io_sampler=None):
+        self.running = False
+        self.config = config or load_config()
+        self.config_watcher = ConfigWatcher(self.config)
+        self.volumes = configured_volumes(self.config)
+        # One process history for every volume; sweeps see all open files anyway
+        self.resolver = ProcessResolver(cache_timeout=10)
+        self.file_index = file_index
+        self.io_sampler = io_sampler
+        self.on_change = on_change or (lambda change: None)
+        self.on_status = on_status or (lambda status: None)
+        self.on_config_reloaded = on_config_reloaded or (lambda config: None)
+        self.scanners = {}  # volume -> PollingScanner
+
+    def root_volumes(self):
+        volumes = {}
+        for root in self.config.roots:
+            volumes.setdefault(volume_for(root.path, self.volumes), []).append(root)
+        return volumes
+
+    def run(self):
+        self.running = True
+        self.start_scanners()
+        while self.running:
+            try:
+                self.reload_config()
+            except Exception as e:
+                self.on_status(f"Error: {str(e)}")
+            time.sleep(min(1.0, self.config.reload_interval))
+
+    def start_scanners(self):
+        volumes = self.root_volumes()
+        for volume in volumes:
+            if volume not in self.scanners:
+                self.start_scanner(volume, label=len(volumes) > 1)
+
+    def start_scanner(self, volume, label=True):
+        on_status = self.on_status
+        if label:
+            on_status = lambda status: self.on_status(f"[{volume}] {status}")
+        scanner = PollingScanner(
+            self.config,
+            on_change=self.on_change,
+            on_status=on_status,
+            file_index=self.file_index,
+            io_sampler=self.io_sampler,
+            volume=volume,
+            volumes=self.volumes,
+            budget=budget_for(self.config, volume),
+            resolver=self.resolver,
+            watch_config=False
+        )
+        self.scanners[volume] = scanner
+        threading.Thread(target=scanner.run, name=f"scanner {volume}", daemon=True).start()
+
+    def reload_config(self):
+        try:
+            result = self.config_watcher.check(time.time())
+        except ConfigError as e:
+            self.on_status(f"Config error: {e}")
+            return
+        if result is None:
+            return
+
+        new_config, added, removed, changed = result
+        self.config = new_config
+        volumes = configured_volumes(new_config)
+        if volumes != self.volumes:
+            # Roots may be on other volumes now; rescan them with a scanner per new volume
+            self.volumes = volumes
+            for scanner in self.scanners.values():
+                scanner.stop()
+            self.scanners = {}
+        else:
+            for scanner in self.scanners.values():
+                scanner.queue_config(new_config, added, removed, changed)
+        self.start_scanners()
+
+        self.on_config_reloaded(new_config)
+        self.on_status(
+            f"Configuration reloaded: {len(added)} added, {len(removed)} removed, "
+            f"{len(changed)} changed roots"
+        )
+
+    def files(self):
+        """(path, size, mtime) for every polled file on every volume"""
+        for scanner in list(self.scanners.values()):
+            yield from scanner.files()
+
+    def root_file_counts(self):
+        """root key -> files tracked under it, across every volume"""
+        counts = {}
+        for scanner in list(self.scanners.values()):
+            counts.update(scanner.root_file_counts())
+        return counts
+
+    def volume_status(self):
+        return [{
+            'volume': volume,
+            'roots': [root.path for root in scanner.config.roots if scanner.owns(root)],
+            'files': scanner.tracked_files,
+            'files_per_second': scanner.budget.rate if scanner.budget else 0,
+        } for volume, scanner in list(self.scanners.items())]
+
+    def stop(self):
+        self.running = False
+        for scanner in self.scanners.values():
+            scanner.stop()
+
+
+class StorageAnalyzer:
+    def __init__(self, config=None, max_changes=500):
+        self.config = config or MonitorConfig()
+        self.max_changes = max_changes
+        self.changes = []
+        self.mutex = threading.Lock()
+        self.gaming_sessions = []
+        self.current_gaming_session = None
+        self.version = 0  # bumped whenever the change list changes, so views can tell they're stale
+        # Growth per root, process and extension in time buckets, for charts over any range
+        self.growth = GrowthHistory.from_config(self.config)
+
+    @registry.timed("analyzer.add_change")
+    def add_change(self, change):
+        with self.mutex:
+            self.version += 1
+            self.changes.append(change)
+            if len(self.changes) > self.max_changes:
+                self.changes = self.changes[-self.max_changes:]
+
+            # Add to current gaming session if active
+            if self.current_gaming_session:
+                self.current_gaming_session.add_change(change)
+        if self.growth is not None:
+            self.growth.record(change, self.config.root_paths)
+
+    def start_gaming_session(self):
+        self.current_gaming_session = GamingSession(datetime.now())
+        # Take snapshot of current state
+        self.current_gaming_session.start_snapshot = self.get_current_storage_state()
+
+    def end_gaming_session(self):
+        if self.current_gaming_session:
+            self.current_gaming_session.end_time = datetime.now()
+            self.current_gaming_session.end_snapshot = self.get_current_storage_state()
+            session = self.current_gaming_session
+            self.gaming_sessions.append(session)
+            self.current_gaming_session = None
+            return session
+        return None
+
+    def get_current_storage_state(self):
+        state = {}
+        for root in self.config.poll_roots:
+            if os.path.exists(root.path):
+                state[root.path] = sum(size for _, size in walk_files(root.path, root.path_filter))
+        return state
+
+    def get_recent_changes(self, minutes=10):
+        with self.mutex:
+            cutoff_time = datetime.now() - timedelta(minutes=minutes)
+            return [change for change in self.changes if change.timestamp > cutoff_time]
+
+    def get_largest_changes(self, count=10):
+        with self.mutex:
+            return sorted(self.changes, key=lambda x: abs(x.size_change), reverse=True)[:count]
+
+    def get_aggregates(self, minutes=30):
+        """Size change and change count per process, directory and extension"""
+        aggregates = {
+            'processes': collections.defaultdict(lambda: [0, 0]),
+            'directories': collections.defaultdict(lambda: [0, 0]),
+            'file_types': collections.defaultdict(lambda: [0, 0]),
+        }
+        for change in self.get_recent_changes(minutes):
+            for key, value in (('processes', change.process_name),
+                               ('directories', os.path.dirname(change.path)),
+                               ('file_types', change.file_extension)):
+                totals = aggregates[key][value]
+                totals[0] += change.size_change
+                totals[1] += 1
+            if change.change_type == 'moved' and change.size:
+                # The bytes left the source directory and arrived in this one
+                moved = change.size - change.size_change
+                aggregates['directories'][os.path.dirname(change.path)][0] += moved
+                source = aggregates['directories'][os.path.dirname(change.old_path)]
+                source[0] -= moved
+                source[1] += 1
+        return {
+            key: {name: {'size_change': size, 'changes': count}
+                  for name, (size, count) in values.items()}
+            for key, values in aggregates.items()
+        }
+
+    def clear_changes(self):
+        with self.mutex:
+            self.version += 1
+            self.changes.clear()
@@ -0,0 +1,300 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+import operator
+from datetime import datetime
+
+from storage_config import load_config, ConfigError, MonitorConfig
+from storage_journal import ChangeJournal, SessionLog
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+FORMATS = ("csv", "jsonl", "parquet")
+CHANGE_FIELDS = ['timestamp', 'path', 'size_change', 'change_type', 'process_name', 'file_extension',
+                 'old_path', 'size']
+SESSION_FIELDS = ['start_time', 'end_time', 'change_count', 'total_size_change',
+                  'start_snapshot', 'end_snapshot']
+DEFAULT_CHUNK_SIZE = 20000
+
+
+class ExportError(Exception):
+    pass
+
+
+def format_for_path(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    raise ExportError(f"Can't tell the export format from '{path}', pass one of {', '.join(FORMATS)}")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _filter_time(records, field, since=None, until=None):
+    # Timestamps are stored as ISO strings, which sort the same as the times
+    since = since.isoformat() if since else None
+    until = until.isoformat() if until else None
+    for record in records:
+        value = record.get(field) or ""
+        if since and value < since:
+            continue
+        if until and value >= until:
+            continue
+        yield record
+
+
+def _filter_lines(lines, since=None, until=None):
+    """Time filter on raw journal lines, without decoding the JSON"""
+    marker = b'"timestamp": "'
+    since = since.isoformat().encode("ascii") if since else None
+    until = until.isoformat().encode("ascii") if until else None
+    for line in lines:
+        start = line.find(marker)
+        if start < 0:
+            continue
+        start += len(marker)
+        value = line[start:line.find(b'"', start)]
+        if since and value < since:
+            continue
+        if until and value >= until:
+            continue
+        yield line
+
+
+def _decode_chunks(lines, chunk_size):
+    """Decode journal lines a chunk at a time with a single json.loads call"""
+    for chunk in _chunks(lines, chunk_size):
+        try:
+            yield json.loads(b"[" + b",".join(chunk) + b"]")
+        except ValueError:
+            # A damaged line (e.g. from an interrupted write); decode one by one
+            records = []
+            for line in chunk:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+            yield records
+
+
+def _open_output(path, binary=False):
+    if path == "-":
+        return (sys.stdout.buffer if binary else sys.stdout), False
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if binary:
+        return open(path, "wb", buffering=1024 * 1024), True
+    return open(path, "w", encoding="utf-8", newline="", buffering=1024 * 1024), True
+
+
+def write_csv(chunks, path, fields):
+    """Write an iterable of record chunks (lists of dicts) as CSV"""
+    out, should_close = _open_output(path)
+    count = 0
+    getter = operator.itemgetter(*fields)
+    try:
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for chunk in chunks:
+            try:
+                writer.writerows(map(getter, chunk))
+            except KeyError:
+                writer.writerows([record.get(field) for field in fields] for record in chunk)
+            count += len(chunk)
+    finally:
+        if should_close:
+            out.close()
+    return count
+
+
+def write_jsonl(chunks, path):
+    out, should_close = _open_output(path)
+    count = 0
+    try:
+        for chunk in chunks:
+            out.write("".join(json.dumps(record) + "\n" for record in chunk))
+            count += len(chunk)
+    finally:
+        if should_close:
+            out.close()
+    return count
+
+
+def write_raw_lines(lines, path):
+    out, should_close = _open_output(path, binary=True)
+    count = 0
+    try:
+        for chunk in _chunks(lines, DEFAULT_CHUNK_SIZE):
+            out.write(b"".join(chunk))
+            count += len(chunk)
+    finally:
+        if should_close:
+            out.close()
+    return count
+
+
+def write_parquet(chunks, path, fields, timestamp_fields=()):
+    """Write one row group per chunk, so memory stays bounded by the chunk size"""
+    if pyarrow is None:
+        raise ExportError("Parquet export requires pyarrow (pip install pyarrow)")
+    if path == "-":
+        raise ExportError("Parquet export needs a file path")
+
+    types = {
+        'size_change': pyarrow.int64(),
+        'size': pyarrow.int64(),
+        'change_count': pyarrow.int64(),
+        'total_size_change': pyarrow.int64(),
+    }
+    schema = pyarrow.schema([
+        (field, pyarrow.timestamp("us") if field in timestamp_fields else types.get(field, pyarrow.string()))
+        for field in fields
+    ])
+
+    writer = None
+    count = 0
+    try:
+        for chunk in chunks:
+            columns = []
+            for field in fields:
+                values = [record.get(field) for record in chunk]
+                if field in timestamp_fields:
+                    column = pyarrow.array(values, pyarrow.string()).cast(pyarrow.timestamp("us"))
+                else:
+                    column = pyarrow.array(values, schema.field(field).type)
+                columns.append(column)
+            table = pyarrow.Table.from_arrays(columns, schema=schema)
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(path, schema)
+            writer.write_table(table)
+            count += len(chunk)
+        if writer is None:
+            # Still produce a valid (empty) file
+            pyarrow.parquet.write_table(schema.empty_table(), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def _copy_raw_lines(journal, path):
+    """Fast path for unfiltered JSON lines: copy the journal files verbatim"""
+    journal.flush()
+    out, should_close = _open_output(path, binary=True)
+    count = 0
+    try:
+        for journal_path in journal.files():
+            with open(journal_path, "rb") as f:
+                # Count lines on the way through, so stdout exports report them too
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    out.write(chunk)
+                    count += chunk.count(b"\n")
+    finally:
+        if should_close:
+            out.close()
+    return count
+
+
+def export_changes(journal, path, fmt=None, since=None, until=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream change history from the journal to path, returning the row count"""
+    fmt = fmt or format_for_path(path)
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}'")
+    if fmt == "jsonl" and since is None and until is None:
+        return _copy_raw_lines(journal, path)
+
+    lines = journal.iter_lines()
+    if since is not None or until is not None:
+        lines = _filter_lines(lines, since, until)
+    if fmt == "jsonl":
+        return write_raw_lines(lines, path)
+
+    chunks = _decode_chunks(lines, chunk_size)
+    if fmt == "csv":
+        return write_csv(chunks, path, CHANGE_FIELDS)
+    return write_parquet(chunks, path, CHANGE_FIELDS, timestamp_fields=("timestamp",))
+
+
+def export_sessions(session_log, path, fmt=None, since=None, until=None):
+    """Export gaming session summaries, returning the row count"""
+    fmt = fmt or format_for_path(path)
+    records = _filter_time(session_log.iter_records(), "start_time", since, until)
+    if fmt == "jsonl":
+        return write_jsonl(_chunks(records, DEFAULT_CHUNK_SIZE), path)
+
+    # Snapshots are nested mappings; flatten them for tabular formats
+    def flatten(records):
+        for record in records:
+            record = dict(record)
+            record['start_snapshot'] = json.dumps(record.get('start_snapshot') or {})
+            record['end_snapshot'] = json.dumps(record.get('end_snapshot') or {})
+            yield record
+
+    chunks = _chunks(flatten(records), DEFAULT_CHUNK_SIZE)
+    if fmt == "csv":
+        return write_csv(chunks, path, SESSION_FIELDS)
+    if fmt == "parquet":
+        return write_parquet(chunks, path, SESSION_FIELDS,
+                             timestamp_fields=("start_time", "end_time"))
+    raise ExportError(f"Unknown export format '{fmt}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export storage change history and gaming sessions")
+    parser.add_argument("what", choices=["changes", "sessions"])
+    parser.add_argument("output", help="Output file (.csv, .jsonl, .parquet) or - for stdout")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the file extension)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only export from this time (ISO format)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only export before this time (ISO format)")
+    parser.add_argument("--config", help="Path to a JSON/TOML config file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except ConfigError as e:
+        print(f"Error loading config, using defaults: {e}", file=sys.stderr)
+        config = MonitorConfig()
+
+    start = time.time()
+    try:
+        if args.what == "changes":
+            journal = ChangeJournal.from_config(config) or ChangeJournal()
+            count = export_changes(journal, args.output, args.format, args.since, args.until,
+                                   args.chunk_size)
+        else:
+            session_log = SessionLog.from_config(config) or SessionLog()
+            count = export_sessions(session_log, args.output, args.format, args.since, args.until)
+    except (ExportError, OSError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output != "-":
+        elapsed = max(time.time() - start, 1e-6)
+        size_mb = os.path.getsize(args.output) / (1024 * 1024)
+        print(f"Exported {count:,} {args.what} to {args.output} "
+              f"({size_mb:.1f} MB in {elapsed:.2f}s, {size_mb / elapsed:.0f} MB/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import re
+import fnmatch
+import functools
+
+# Directories that churn constantly and are never interesting for storage analysis
+DEFAULT_EXCLUDES = [
+    "Cache",
+    "Code Cache",
+    "GPUCache",
+    "cache2",
+    "CacheStorage",
+    "ScriptCache",
+    "ShaderCache",
+    "INetCache",
+]
+
+
+def _normalize(path):
+    """Normalize a path for matching: platform case rules and forward slashes"""
+    return os.path.normcase(path).replace("\\", "/").rstrip("/")
+
+
+def _compile_globs(patterns):
+    if not patterns:
+        return None
+    parts = [fnmatch.translate(_normalize(p)) for p in patterns]
+    return re.compile("|".join(parts))
+
+
+def _compile_regexes(patterns):
+    if not patterns:
+        return None
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+def normalize_extensions(extensions):
+    """Lowercased extensions with a leading dot, as a frozenset, or None for none"""
+    if not extensions:
+        return None
+    result = set()
+    for ext in extensions:
+        ext = ext.lower()
+        if ext and not ext.startswith("."):
+            ext = "." + ext
+        result.add(ext)
+    return frozenset(result)
+
+
+class PathFilter:
+    """Include/exclude rules compiled into a single matcher.
+
+    Glob patterns without a path separator are matched against the file or
+    directory name, patterns with a separator against the full path. Exclude
+    rules apply to directories as well as files, so whole subtrees can be
+    pruned during a walk. Include rules and extension filters only apply to
+    files.
+    """
+
+    def __init__(self, exclude=None, include=None, exclude_regex=None,
+                 include_regex=None, extensions=None, exclude_extensions=None):
+        exclude = list(exclude or [])
+        include = list(include or [])
+        self._exclude_name = _compile_globs([p for p in exclude if not self._has_sep(p)])
+        self._exclude_path = _compile_globs([p for p in exclude if self._has_sep(p)])
+        self._include_name = _compile_globs([p for p in include if not self._has_sep(p)])
+        self._include_path = _compile_globs([p for p in include if self._has_sep(p)])
+        self._exclude_regex = _compile_regexes(exclude_regex)
+        self._include_regex = _compile_regexes(include_regex)
+        self._extensions = normalize_extensions(extensions)
+        self._exclude_extensions = normalize_extensions(exclude_extensions)
+        self._has_includes = bool(include or include_regex)
+        # Decisions per directory are cached so watchdog events, which can't
+        # be pruned, only pay for the ancestors once
+        self._excluded_tree = functools.lru_cache(maxsize=8192)(self._excluded_tree_uncached)
+
+    @staticmethod
+    def _has_sep(pattern):
+        return "/" in pattern or "\\" in pattern
+
+    @classmethod
+    def default(cls):
+        return cls(exclude=DEFAULT_EXCLUDES)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a filter from a config mapping (see storage_config)"""
+        if not config:
+            return cls.default()
+        exclude = list(config.get("exclude", []))
+        if config.get("default_excludes", True):
+            exclude = DEFAULT_EXCLUDES + exclude
+        return cls(
+            exclude=exclude,
+            include=config.get("include"),
+            exclude_regex=config.get("exclude_regex"),
+            include_regex=config.get("include_regex"),
+            extensions=config.get("extensions"),
+            exclude_extensions=config.get("exclude_extensions"),
+        )
+
+    def _excluded(self, normalized):
+        name = normalized.rsplit("/", 1)[-1]
+        if self._exclude_name and self._exclude_name.match(name):
+            return True
+        if self._exclude_path and self._exclude_path.match(normalized):
+            return True
+        if self._exclude_regex and self._exclude_regex.search(normalized):
+            return True
+        return False
+
+    def is_excluded_dir(self, path):
+        """Check a single directory against the exclude rules"""
+        return self._excluded(_normalize(path))
+
+    def _excluded_tree_uncached(self, directory):
+        if self.is_excluded_dir(directory):
+            return True
+        parent = os.path.dirname(directory)
+        if not parent or parent == directory:
+            return False
+        return self._excluded_tree(parent)
+
+    def prune(self, root, dirs):
+        """Remove excluded directories from an os.walk dirs list in place"""
+        dirs[:] = [d for d in dirs if not self.is_excluded_dir(os.path.join(root, d))]
+
+    def accepts_file(self, path, check_parents=False):
+        """Check a file against all rules.
+
+        check_parents should be set when the file did not come from a pruned
+        walk (e.g. watchdog events), so files in excluded subtrees are dropped.
+        """
+        if check_parents and self._excluded_tree(os.path.dirname(path)):
+            return False
+
+        normalized = _normalize(path)
+        if self._excluded(normalized):
+            return False
+
+        if self._extensions is not None or self._exclude_extensions is not None:
+            ext = os.path.splitext(normalized)[1].lower()
+            if self._extensions is not None and ext not in self._extensions:
+                return False
+            if self._exclude_extensions is not None and ext in self._exclude_extensions:
+                return False
+
+        if self._has_includes:
+            name = normalized.rsplit("/", 1)[-1]
+            if self._include_name and self._include_name.match(name):
+                return True
+            if self._include_path and self._include_path.match(normalized):
+                return True
+            if self._include_regex and self._include_regex.search(normalized):
+                return True
+            return False
+
+        return True
+
+
+def walk_files(directory, path_filter=None, skip_dirs=None, file_ids=None, file_times=None):
+    """Yield (path, size) for every accepted file under directory.
+
+    Excluded subtrees (and any directory in skip_dirs, e.g. nested roots
+    scanned on their own) are never descended, and sizes come from the
+    directory entry so each file costs a single stat at most. If file_ids
+    is a dict it is filled with path -> inode where the directory entry
+    has it for free (not on Windows, where it would cost another stat).
+    file_times is filled with path -> mtime from the same stat.
+    """
+    skip_dirs = {os.path.normcase(d) for d in skip_dirs} if skip_dirs else None
+    if os.name == "nt":
+        file_ids = None
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if skip_dirs and os.path.normcase(entry.path) in skip_dirs:
+                                continue
+                            if path_filter is None or not path_filter.is_excluded_dir(entry.path):
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if path_filter is None or path_filter.accepts_file(entry.path):
+                                if file_ids is not None:
+                                    file_ids[entry.path] = entry.inode()
+                                stat = entry.stat()
+                                if file_times is not None:
+                                    file_times[entry.path] = stat.st_mtime
+                                yield entry.path, stat.st_size
+                    except (OSError, PermissionError):
+                        continue
+        except (OSError, PermissionError):
+            continue
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import array
+import threading
+
+from storage_config import data_dir
+from storage_volumes import is_under
+
+# (seconds per bucket, buckets): 1min for a day, 1h for a year
+GROWTH_TIERS = ((60, 24 * 60), (3600, 366 * 24))
+DIMENSIONS = ("roots", "processes", "extensions")
+OTHER = "Other"
+
+
+class GrowthRing:
+    """Net bytes added per time bucket at one resolution, in a fixed-size ring"""
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.slots = array.array('q', [-1]) * capacity
+        self.bytes = array.array('q', [0]) * capacity
+
+    def add(self, timestamp, amount):
+        slot = int(timestamp // self.resolution)
+        index = slot % self.capacity
+        if self.slots[index] != slot:
+            self.slots[index] = slot
+            self.bytes[index] = 0
+        self.bytes[index] += amount
+
+    def covers(self, timestamp, now):
+        return now - timestamp <= self.resolution * (self.capacity - 1)
+
+    def range(self, start, end):
+        """(bucket start time, bytes) for the non-empty buckets between start and end"""
+        first = int(start // self.resolution)
+        last = int(end // self.resolution)
+        first = max(first, last - self.capacity + 1)
+        slots, amounts, capacity = self.slots, self.bytes, self.capacity
+        return [(slot * self.resolution, amounts[slot % capacity]) for slot in range(first, last + 1)
+                if slots[slot % capacity] == slot and amounts[slot % capacity]]
+
+
+class GrowthSeries:
+    def __init__(self, tiers=GROWTH_TIERS):
+        self.rings = [GrowthRing(resolution, capacity) for resolution, capacity in tiers]
+
+    def add(self, timestamp, amount):
+        for ring in self.rings:
+            ring.add(timestamp, amount)
+
+    def range(self, start, end):
+        """Buckets from the finest resolution that reaches back to start"""
+        ring = next((ring for ring in self.rings if ring.covers(start, end)), self.rings[-1])
+        return ring.range(start, end)
+
+
+class GrowthHistory:
+    """Net growth per monitored root, process and file extension, bucketed as it happens.
+
+    The analyzer adds every change to a minute bucket (kept for a day) and
+    an hour bucket (kept for a year) of the root, process and extension it
+    belongs to, so a chart of any range reads at most a few thousand
+    buckets per line instead of the raw changes. Each dimension keeps its
+    first max_keys keys; later ones are counted under "Other". Only
+    non-empty buckets are saved, from a background thread every
+    save_interval seconds and by the front-end on exit.
+    """
+
+    def __init__(self, path=None, max_keys=16, save_interval=300, tiers=GROWTH_TIERS):
+        self.path = path
+        self.max_keys = max_keys
+        self.save_interval = save_interval
+        self.tiers = tiers
+        self.series = {dimension: {} for dimension in DIMENSIONS}
+        self.lock = threading.Lock()
+        self.last_save = time.time()
+        if path:
+            self.load()
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("growth")
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("path") or os.path.join(data_dir(), "growth.json"),
+                   settings.get("max_keys", 16), settings.get("save_interval", 300))
+
+    def _series(self, dimension, key):
+        series = self.series[dimension]
+        found = series.get(key)
+        if found is None:
+            if len(series) >= self.max_keys and key != OTHER:
+                return self._series(dimension, OTHER)
+            found = series[key] = GrowthSeries(self.tiers)
+        return found
+
+    def record(self, change, roots=()):
+        """Add a change's growth; roots are the monitored root paths"""
+        timestamp = change.timestamp.timestamp()
+        with self.lock:
+            if change.change_type == 'moved' and change.old_path and change.size:
+                # Growth for the root it moved to, shrinkage for the one it left
+                moved = change.size - change.size_change
+                for path, amount in ((change.old_path, -moved), (change.path, moved)):
+                    root = self._root(path, roots)
+                    if root is not None:
+                        self._series("roots", root).add(timestamp, amount)
+            if not change.size_change:
+                return
+            root = self._root(change.path, roots)
+            if root is not None:
+                self._series("roots", root).add(timestamp, change.size_change)
+            self._series("processes", change.process_name or "Unknown").add(timestamp, change.size_change)
+            self._series("extensions", change.file_extension or "(none)").add(timestamp, change.size_change)
+        if self.path and time.time() - self.last_save >= self.save_interval:
+            self.last_save = time.time()
+            threading.Thread(target=self.save, name="growth-save", daemon=True).start()
+
+    @staticmethod
+    def _root(path, roots):
+        # Innermost root, for nested roots
+        best = None
+        for root in roots:
+            if is_under(path, root) and (best is None or len(root) > len(best)):
+                best = root
+        return best
+
+    def keys(self, dimension):
+        with self.lock:
+            return list(self.series[dimension])
+
+    def chart(self, dimension, start, end=None, columns=1000, count=8):
+        """Cumulative growth since start for the count keys that changed most, as {key: points}.
+
+        Points are decimated to at most four per column (see decimate()).
+        """
+        end = end or time.time()
+        with self.lock:
+            buckets = {key: series.range(start, end) for key, series in self.series[dimension].items()}
+        totals = sorted(((sum(abs(amount) for _, amount in points), key)
+                         for key, points in buckets.items() if points), reverse=True)
+        lines = {}
+        for _, key in totals[:count]:
+            running = 0
+            points = [(start, 0)]
+            for bucket, amount in buckets[key]:
+                running += amount
+                points.append((bucket, running))
+            points.append((end, running))
+            lines[key] = decimate(points, start, end, columns)
+        return lines
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            data = {
+                'tiers': [list(tier) for tier in self.tiers],
+                'series': {dimension: {key: [[[slot, ring.bytes[index]]
+                                              for index, slot in enumerate(ring.slots)
+                                              if slot >= 0 and ring.bytes[index]]
+                                             for ring in series.rings]
+                                       for key, series in values.items()}
+                           for dimension, values in self.series.items()},
+            }
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            print(f"Error saving growth history: {e}")
+
+    def load(self):
+        """Restore buckets saved by save(); ignored if the tiers don't match"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data['tiers'] != [list(tier) for tier in self.tiers]:
+                return False
+            for dimension, values in data['series'].items():
+                for key, rings in values.items():
+                    series = self.series[dimension][key] = GrowthSeries(self.tiers)
+                    for ring, buckets in zip(series.rings, rings):
+                        for slot, amount in buckets:
+                            ring.slots[slot % ring.capacity] = slot
+                            ring.bytes[slot % ring.capacity] = amount
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+
+def decimate(points, start, end, columns):
+    """Reduce (time, value) points to the first, lowest, highest and last of each column.
+
+    Lines drawn through the result look the same as through all the points
+    at that width, spikes included, however many points there were.
+    """
+    if len(points) <= 2 * columns or end <= start:
+        return points
+    width = (end - start) / columns
+    result = []
+    column = first = low = high = last = None
+    for point in points:
+        index = int((point[0] - start) // width)
+        if index != column:
+            if column is not None:
+                result.extend(sorted({first, low, high, last}))
+            column = index
+            first = low = high = last = point
+        else:
+            if point[1] < low[1]:
+                low = point
+            if point[1] > high[1]:
+                high = point
+            last = point
+    if column is not None:
+        result.extend(sorted({first, low, high, last}))
+    return result
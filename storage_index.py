@@ -0,0 +1,159 @@
+import os
+import bisect
+import itertools
+import threading
+
+DEFAULT_MIN_SIZE = 1024 * 1024  # Files smaller than 1MB are not indexed
+
+
+class SortedBuckets:
+    """A sorted list split into buckets of at most load items.
+
+    An insert or delete shifts one bucket instead of the whole list, so it
+    stays cheap with millions of entries, e.g. during a large install.
+    """
+
+    def __init__(self, items=(), load=1000):
+        self.load = load
+        items = sorted(items)
+        half = load // 2
+        self.buckets = [items[i:i + half] for i in range(0, len(items), half)]
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        self.length = len(items)
+
+    def __len__(self):
+        return self.length
+
+    def add(self, item):
+        if not self.buckets:
+            self.buckets.append([item])
+            self.maxes.append(item)
+        else:
+            i = bisect.bisect_left(self.maxes, item)
+            if i == len(self.maxes):
+                i -= 1
+                self.buckets[i].append(item)
+                self.maxes[i] = item
+            else:
+                bisect.insort(self.buckets[i], item)
+            bucket = self.buckets[i]
+            if len(bucket) > self.load:
+                half = len(bucket) // 2
+                self.buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+                self.maxes[i:i + 1] = [bucket[half - 1], bucket[-1]]
+        self.length += 1
+
+    def discard(self, item):
+        i = bisect.bisect_left(self.maxes, item)
+        if i == len(self.maxes):
+            return
+        bucket = self.buckets[i]
+        j = bisect.bisect_left(bucket, item)
+        if j < len(bucket) and bucket[j] == item:
+            del bucket[j]
+            self.length -= 1
+            if not bucket:
+                del self.buckets[i]
+                del self.maxes[i]
+            elif j == len(bucket):
+                self.maxes[i] = bucket[-1]
+
+    def count_from(self, item):
+        """How many items are >= item"""
+        i = bisect.bisect_left(self.maxes, item)
+        if i == len(self.maxes):
+            return 0
+        bucket = self.buckets[i]
+        return len(bucket) - bisect.bisect_left(bucket, item) + sum(map(len, self.buckets[i + 1:]))
+
+    def descending(self, minimum=None):
+        """Items from largest down to minimum (inclusive)"""
+        for bucket in reversed(self.buckets):
+            if minimum is not None and bucket[-1] < minimum:
+                return
+            for item in reversed(bucket):
+                if minimum is not None and item < minimum:
+                    return
+                yield item
+
+
+class LargestFilesIndex:
+    """Files above min_size kept sorted by size.
+
+    The scanner updates entries as it sees size changes, so top-N and
+    "files over X MB" are answered from the sorted entries with a bisect
+    instead of walking the roots. Entries are (size, path) tuples in
+    ascending order, in SortedBuckets so updates stay cheap at any size.
+    """
+
+    def __init__(self, min_size=DEFAULT_MIN_SIZE):
+        self.min_size = min_size
+        self.sizes = {}  # path -> size
+        self.order = SortedBuckets()  # sorted (size, path)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.order)
+
+    def _remove(self, path):
+        old_size = self.sizes.pop(path, None)
+        if old_size is not None:
+            self.order.discard((old_size, path))
+
+    def update(self, path, size):
+        with self.lock:
+            if self.sizes.get(path) == size:
+                return
+            self._remove(path)
+            if size >= self.min_size:
+                self.sizes[path] = size
+                self.order.add((size, path))
+
+    def remove(self, path):
+        with self.lock:
+            self._remove(path)
+
+    @staticmethod
+    def _prefix(directory):
+        return os.path.normcase(directory).rstrip(os.sep) + os.sep
+
+    def replace_prefix(self, directory, sizes=None, keep=()):
+        """Drop every entry under directory, then bulk-load sizes (path -> size).
+
+        Entries under the directories in keep (nested roots that are scanned
+        on their own) are left alone.
+        """
+        prefix = self._prefix(directory)
+        keep = tuple(self._prefix(path) for path in keep)
+
+        def dropped(path):
+            path = os.path.normcase(path)
+            return path.startswith(prefix) and not (keep and path.startswith(keep))
+
+        with self.lock:
+            kept = {path: size for path, size in self.sizes.items() if not dropped(path)}
+            for path, size in (sizes or {}).items():
+                if size >= self.min_size:
+                    kept[path] = size
+            self.sizes = kept
+            self.order = SortedBuckets((size, path) for path, size in kept.items())
+
+    def remove_prefix(self, directory, keep=()):
+        self.replace_prefix(directory, keep=keep)
+
+    def top(self, count=20):
+        """The count largest files as (path, size), largest first"""
+        with self.lock:
+            if count <= 0:
+                return []
+            return [(path, size) for size, path in itertools.islice(self.order.descending(), count)]
+
+    def over(self, min_bytes, limit=None):
+        """Files of at least min_bytes as (path, size), largest first"""
+        with self.lock:
+            return [(path, size) for size, path in
+                    itertools.islice(self.order.descending((min_bytes, "")), limit)]
+
+    def count_over(self, min_bytes):
+        with self.lock:
+            return self.order.count_from((min_bytes, ""))
@@ -0,0 +1,168 @@
+import time
+import threading
+import collections
+
+import psutil
+
+from storage_metrics import registry
+
+
+class PsutilProcessSource:
+    """Cumulative bytes written by each running process, from psutil"""
+
+    def sample(self):
+        counters = {}
+        for proc in psutil.process_iter(['pid', 'name', 'io_counters']):
+            io = proc.info.get('io_counters')
+            if io is not None:
+                counters[proc.info['pid']] = (proc.info['name'], io.write_bytes)
+        return counters
+
+
+class MockProcessSource:
+    """Scripted processes for exercising the sampler without real disk I/O.
+
+    Linux CI machines often can't read other processes' io_counters, so
+    tests give each fake process a steady write rate or add bytes directly.
+    """
+
+    def __init__(self, rates=None):
+        self.rates = dict(rates or {})  # pid -> (name, bytes per second)
+        self.totals = collections.defaultdict(float)
+        self.names = {pid: name for pid, (name, rate) in self.rates.items()}
+        self.last = time.time()
+
+    def set_rate(self, pid, name, rate):
+        self.rates[pid] = (name, rate)
+        self.names[pid] = name
+
+    def write(self, pid, name, amount):
+        self.names[pid] = name
+        self.totals[pid] += amount
+
+    def sample(self):
+        now = time.time()
+        elapsed = now - self.last
+        self.last = now
+        for pid, (name, rate) in self.rates.items():
+            self.totals[pid] += rate * elapsed
+        return {pid: (self.names[pid], int(total)) for pid, total in self.totals.items()}
+
+
+class ProcessIOSampler:
+    """Periodically samples per-process write bytes into short time series.
+
+    Only processes that actually wrote something in a sample interval get an
+    entry, so idle processes cost nothing. Series are kept per process name
+    (all pids of a program together) for the last history samples.
+    """
+
+    def __init__(self, source=None, interval=2.0, history=900):
+        self.source = source or PsutilProcessSource()
+        self.interval = interval
+        self.history = history
+        self.previous = {}  # pid -> cumulative write bytes at the last sample
+        self.samples = 0
+        self.sample_times = collections.deque(maxlen=history)  # (sample number, time)
+        self.writes = {}  # process name -> deque of (sample number, bytes written)
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("io")
+        if not settings.get("enabled", True):
+            return None
+        return cls(interval=settings.get("interval", 2.0), history=settings.get("history", 900))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="io-sampler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"Error sampling process I/O: {e}")
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+
+    @registry.timed("io.sample")
+    def sample_once(self, now=None):
+        now = now or time.time()
+        counters = self.source.sample()
+        written = collections.defaultdict(int)
+        for pid, (name, total) in counters.items():
+            previous = self.previous.get(pid)
+            if previous is not None and total > previous:
+                written[name] += total - previous
+        self.previous = {pid: total for pid, (name, total) in counters.items()}
+
+        with self.lock:
+            self.samples += 1
+            self.sample_times.append((self.samples, now))
+            for name, amount in written.items():
+                series = self.writes.get(name)
+                if series is None:
+                    series = self.writes[name] = collections.deque(maxlen=self.history)
+                series.append((self.samples, amount))
+            # Forget processes that haven't written within the history
+            oldest = self.sample_times[0][0]
+            for name in [name for name, series in self.writes.items() if series[-1][0] < oldest]:
+                del self.writes[name]
+
+    def _samples_between(self, start, end):
+        """First and last sample numbers taken within [start, end]"""
+        numbers = [number for number, taken in self.sample_times if start <= taken <= end]
+        if not numbers:
+            return None
+        return numbers[0], numbers[-1]
+
+    def written(self, seconds=60, end=None):
+        """Bytes written per process over the last seconds"""
+        end = end or time.time()
+        with self.lock:
+            span = self._samples_between(end - seconds, end)
+            if span is None:
+                return {}
+            first, last = span
+            totals = {}
+            for name, series in self.writes.items():
+                total = sum(amount for number, amount in series if first <= number <= last)
+                if total:
+                    totals[name] = total
+            return totals
+
+    def write_rates(self, seconds=60):
+        """Bytes per second per process over the last seconds"""
+        with self.lock:
+            covered = self.sample_times[-1][1] - self.sample_times[0][1] if self.sample_times else 0
+        duration = max(self.interval, min(seconds, covered))
+        return {name: total / duration for name, total in self.written(seconds).items()}
+
+    def top_writers(self, seconds=60, count=10):
+        written = self.written(seconds)
+        return sorted(written.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def series(self, name):
+        """(time, bytes written) samples for one process"""
+        with self.lock:
+            times = dict(self.sample_times)
+            return [(times[number], amount) for number, amount in self.writes.get(name, ())
+                    if number in times]
+
+    def guess_writer(self, timestamp, size_change, window=10):
+        """The process that wrote the most around timestamp, if it wrote at least size_change"""
+        written = self.written(window + self.interval, timestamp + self.interval)
+        if not written:
+            return None
+        name, amount = max(written.items(), key=lambda item: item[1])
+        if amount < size_change:
+            return None
+        registry.counter("attribution.io_guesses").inc()
+        return name
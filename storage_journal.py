@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+
+from storage_config import data_dir
+from storage_engine import StorageChange
+from storage_bus import DROP_OLDEST
+from storage_metrics import registry
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def default_journal_path():
+    return os.path.join(data_dir(), "journal.jsonl")
+
+
+class ChangeJournal:
+    """Append-only JSON lines log of every change.
+
+    Writes are buffered and only flushed when flush() is called, so callers
+    can batch a whole frame or scan cycle into one write. When the file grows
+    past max_bytes it is rotated to <path>.1 (one generation is kept).
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or default_journal_path()
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.file = None
+        self.size = 0
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("journal")
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("path"), settings.get("max_bytes", DEFAULT_MAX_BYTES))
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Binary, so size counts the bytes on disk (no newline translation on Windows)
+        self.file = open(self.path, "ab", buffering=1024 * 1024)
+        self.size = self.file.tell()
+
+    def _rotate(self):
+        self.file.close()
+        rotated = self.path + ".1"
+        try:
+            if os.path.exists(rotated):
+                os.remove(rotated)
+            os.rename(self.path, rotated)
+        except OSError:
+            pass
+        self._open()
+
+    def write(self, change):
+        self.write_many([change])
+
+    def write_many(self, changes):
+        if not changes:
+            return
+        data = "".join(json.dumps(change.to_dict()) + "\n" for change in changes).encode("utf-8")
+        with self.lock:
+            if self.file is None:
+                self._open()
+            self.file.write(data)
+            self.size += len(data)
+            if self.size > self.max_bytes:
+                self._rotate()
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def files(self):
+        """Journal files from oldest to newest"""
+        return [p for p in (self.path + ".1", self.path) if os.path.exists(p)]
+
+    def iter_lines(self):
+        """Yield raw JSON lines (as bytes), oldest first, without decoding them"""
+        self.flush()
+        for path in self.files():
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield line
+
+    def iter_records(self):
+        """Yield raw change dicts, oldest first, one line at a time"""
+        self.flush()
+        for path in self.files():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Partial line from an interrupted write
+                        continue
+
+    def iter_changes(self):
+        for record in self.iter_records():
+            yield StorageChange.from_dict(record)
+
+
+class JournalWriter:
+    """Background thread that moves changes from a bus subscription into a journal.
+
+    Changes are written and flushed in batches once per interval, so the
+    journal costs one write per batch instead of one per change. If the
+    disk falls so far behind that maxsize changes are pending, the oldest
+    are dropped rather than stalling the scanners; drops are counted as
+    journal.dropped and reported.
+    """
+
+    def __init__(self, journal, change_bus, interval=1.0, maxsize=50000):
+        self.journal = journal
+        self.interval = interval
+        self.subscription = change_bus.subscribe("journal", maxsize=maxsize, policy=DROP_OLDEST)
+        self.reported_drops = 0
+        registry.gauge("journal.dropped", lambda: self.subscription.dropped)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="journal", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval)
+            self.write_pending()
+
+    def write_pending(self):
+        dropped = self.subscription.dropped
+        if dropped > self.reported_drops:
+            print(f"Journal fell behind: {dropped - self.reported_drops:,} changes were not recorded")
+            self.reported_drops = dropped
+        batch = self.subscription.get_batch(self.subscription.maxsize)
+        if batch:
+            try:
+                self.journal.write_many(batch)
+                self.journal.flush()
+            except OSError as e:
+                print(f"Error writing journal: {e}")
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(self.interval * 2)
+        self.write_pending()
+        self.subscription.close()
+        self.journal.close()
+
+
+class SessionLog:
+    """Append-only JSON lines log of finished gaming sessions"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "sessions.jsonl")
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("journal")
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("sessions_path"))
+
+    def append(self, session):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(session.to_dict()) + "\n")
+
+    def iter_records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
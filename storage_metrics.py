@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import threading
+import functools
+import collections
+from datetime import datetime
+
+from storage_config import data_dir
+
+
+class Counter:
+    """Running total with a per-second rate over the last window seconds"""
+
+    def __init__(self, name, window=60):
+        self.name = name
+        self.window = window
+        self.value = 0
+        self.created = time.time()
+        self.buckets = collections.deque()  # [second, count]
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        second = int(time.time())
+        with self.lock:
+            self.value += amount
+            if self.buckets and self.buckets[-1][0] == second:
+                self.buckets[-1][1] += amount
+            else:
+                self.buckets.append([second, amount])
+                while self.buckets[0][0] <= second - self.window:
+                    self.buckets.popleft()
+
+    def rate(self):
+        now = time.time()
+        with self.lock:
+            recent = sum(count for second, count in self.buckets if second > now - self.window)
+        return recent / max(1.0, min(self.window, now - self.created))
+
+    def snapshot(self):
+        return {'type': 'counter', 'count': self.value, 'rate_per_sec': round(self.rate(), 2)}
+
+
+class Histogram:
+    """Count, total, min and max, plus the most recent samples for percentiles"""
+
+    def __init__(self, name, unit="", samples=1024):
+        self.name = name
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.recent = collections.deque(maxlen=samples)
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+            self.recent.append(value)
+
+    def snapshot(self):
+        with self.lock:
+            recent = sorted(self.recent)
+            count, total, low, high = self.count, self.total, self.min, self.max
+
+        def percentile(p):
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))], 3)
+
+        return {
+            'type': 'histogram',
+            'unit': self.unit,
+            'count': count,
+            'mean': round(total / count, 3) if count else None,
+            'min': round(low, 3) if low is not None else None,
+            'max': round(high, 3) if high is not None else None,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+        }
+
+
+class _Timing:
+    def __init__(self, timer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class Timer(Histogram):
+    """Histogram of durations in milliseconds"""
+
+    def __init__(self, name, samples=1024):
+        super().__init__(name, "ms", samples)
+
+    def time(self):
+        return _Timing(self)
+
+
+class Gauge:
+    """Current value read from a callback when a snapshot is taken"""
+
+    def __init__(self, name, read):
+        self.name = name
+        self.read = read
+
+    def snapshot(self):
+        try:
+            value = self.read()
+        except Exception:
+            value = None
+        return {'type': 'gauge', 'value': value}
+
+
+class MetricsRegistry:
+    """Named counters, histograms, timers and gauges for the hot paths.
+
+    Metrics are created on first use, so instrumented code just asks the
+    registry by name. Recording costs a lock and an append.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, name, factory):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = factory()
+                    self.metrics[name] = metric
+        return metric
+
+    def counter(self, name):
+        return self._get(name, lambda: Counter(name))
+
+    def histogram(self, name, unit=""):
+        return self._get(name, lambda: Histogram(name, unit))
+
+    def timer(self, name):
+        return self._get(name, lambda: Timer(name))
+
+    def gauge(self, name, read):
+        with self.lock:
+            self.metrics[name] = Gauge(name, read)
+
+    def timed(self, name):
+        """Decorator recording each call's duration in the timer name"""
+        def decorator(func):
+            timer = self.timer(name)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    timer.observe((time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self.lock:
+            metrics = sorted(self.metrics.items())
+        return {name: metric.snapshot() for name, metric in metrics}
+
+    def format_lines(self):
+        """One text line per metric, for the console and the GUI panel"""
+        lines = []
+        for name, data in self.snapshot().items():
+            if data['type'] == 'counter':
+                text = f"{data['count']:>10,}  ({data['rate_per_sec']:,.1f}/s)"
+            elif data['type'] == 'gauge':
+                text = f"{str(data['value']):>10}"
+            elif data['count']:
+                unit = data['unit']
+                text = (f"{data['count']:>10,}  p50 {data['p50']:,.2f}{unit}  p95 {data['p95']:,.2f}{unit}  "
+                        f"p99 {data['p99']:,.2f}{unit}  max {data['max']:,.2f}{unit}")
+            else:
+                text = f"{0:>10}"
+            lines.append(f"{name:<28} {text}")
+        return lines
+
+
+# Shared by everything in the process
+registry = MetricsRegistry()
+
+
+class MetricsDumper:
+    """Appends a JSON snapshot of the registry to a file every interval seconds"""
+
+    def __init__(self, metrics, path=None, interval=60):
+        self.metrics = metrics
+        self.path = path or os.path.join(data_dir(), "metrics.jsonl")
+        self.interval = interval
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, metrics, config):
+        settings = config.section("metrics")
+        interval = settings.get("dump_interval", 0)
+        if not interval:
+            return None
+        return cls(metrics, settings.get("path"), interval)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="metrics", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval)
+            if self.running:
+                self.dump()
+
+    def dump(self):
+        record = {'timestamp': datetime.now().isoformat(), 'pid': os.getpid(),
+                  'metrics': self.metrics.snapshot()}
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def stop(self):
+        self.running = False
+        self.dump()
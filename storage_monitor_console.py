@@ -7,35 +7,71 @@ import win32process
 import win32gui
 import win32con
 from datetime import datetime, timedelta
-from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import threading
 import queue
 import collections
-
-class StorageChange:
-    def __init__(self, path, size_change, change_type, timestamp, process_name=None):
-        self.path = path
-        self.size_change = size_change
-        self.change_type = change_type  # 'created', 'modified', 'deleted'
-        self.timestamp = timestamp
-        self.process_name = process_name
-        self.file_extension = self._get_extension()
-        
-    def _get_extension(self):
-        try:
-            return Path(self.path).suffix.lower()
-        except:
-            return ""
+from storage_filters import PathFilter, walk_files
+from storage_config import load_config, ConfigWatcher, ConfigError, MonitorConfig
+from storage_engine import StorageChange, ProcessResolver
+from storage_bus import ChangeBus, COALESCE
+from storage_journal import ChangeJournal, JournalWriter
+from storage_metrics import registry, MetricsDumper
+from storage_profiler import SamplingProfiler
+from storage_usage import DiskUsageSampler, format_duration
+from storage_volumes import budgeted, budget_for, configured_volumes, volume_for
+from storage_anomaly import GrowthDetector
+from storage_alerts import AlertEngine, CallbackSink
 
 class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, change_queue):
+    """Turns watchdog events into size changes.
+    
+    Events are collected per path and handled once per debounce interval,
+    so a burst of modify events from an editor or game costs one stat. Known
+    sizes are kept in a bounded LRU cache seeded by a baseline scan; a modify
+    event for a file that isn't cached only records its size, rather than
+    reporting the whole file as growth.
+    """
+    def __init__(self, change_bus, path_filter=None, root_key=None, root_resolver=None,
+                 debounce=0.5, max_cached=200000, resolver=None, budget=None):
         super().__init__()
-        self.change_queue = change_queue
-        self.last_sizes = {}
-        self.process_cache = {}
-        self.cache_timeout = 5
+        self.change_bus = change_bus
+        self.path_filter = path_filter or PathFilter.default()
+        self.root_key = root_key
+        self.root_resolver = root_resolver
+        self.debounce = debounce
+        self.max_cached = max_cached
+        self.last_sizes = collections.OrderedDict()  # path -> size, least recently used first
+        self.pending = {}  # path -> event type, until the next flush
+        self.moved_from = {}  # destination -> source of pending moves
+        self.lock = threading.Lock()
+        self.resolver = resolver or ProcessResolver(cache_timeout=5)
+        self.budget = budget  # limits the baseline scan on slow drives
+        self.running = True
+        self.flush_thread = threading.Thread(target=self._flush_loop, name="watch-flush", daemon=True)
+        self.flush_thread.start()
+    
+    def seed(self, directory, nested_roots=()):
+        """Baseline scan so the first change to an existing file gets a correct delta"""
+        for file_path, size in budgeted(walk_files(directory, self.path_filter, nested_roots), self.budget):
+            if not self.running:
+                return
+            with self.lock:
+                # Sizes recorded from events during the scan are newer
+                if file_path not in self.last_sizes and file_path not in self.pending:
+                    self._cache(file_path, size)
+    
+    def _cache(self, file_path, size):
+        self.last_sizes[file_path] = size
+        self.last_sizes.move_to_end(file_path)
+        if len(self.last_sizes) > self.max_cached:
+            self.last_sizes.popitem(last=False)
+    
+    def stop(self):
+        self.running = False
+        self.flush_thread.join(self.debounce * 2 + 1)
+        self.flush()
         
     def on_created(self, event):
         if not event.is_directory:
@@ -49,68 +85,251 @@ class FileChangeHandler(FileSystemEventHandler):
         if not event.is_directory:
             self._handle_file_change(event.src_path, 'deleted')
     
+    def on_moved(self, event):
+        # Watchdog also reports each file inside a moved directory
+        if event.is_directory:
+            return
+        source_owned = self._owns(event.src_path)
+        dest_owned = self._owns(event.dest_path)
+        if source_owned and dest_owned:
+            registry.counter("watch.events").inc()
+            with self.lock:
+                source_type = self.pending.pop(event.src_path, None)
+                source = self.moved_from.pop(event.src_path, event.src_path)
+                if source_type == 'created':
+                    # Created and moved within one interval: just a new file
+                    self.pending[event.dest_path] = 'created'
+                else:
+                    self.pending[event.dest_path] = 'moved'
+                    self.moved_from[event.dest_path] = source
+        elif source_owned:
+            # Moved out of this root (or into an excluded path)
+            self._handle_file_change(event.src_path, 'deleted')
+        elif dest_owned:
+            self._handle_file_change(event.dest_path, 'created')
+    
+    def _owns(self, file_path):
+        # Watchdog can't prune subtrees, so check the parents as well
+        if not self.path_filter.accepts_file(file_path, check_parents=True):
+            return False
+        # Nested roots have their own watch; leave their events to that handler
+        if self.root_resolver is not None:
+            root = self.root_resolver(file_path)
+            if root is not None and root.key != self.root_key:
+                return False
+        return True
+    
     def _handle_file_change(self, file_path, change_type):
+        registry.counter("watch.events").inc()
+        with self.lock:
+            previous = self.pending.get(file_path)
+            if previous is not None:
+                registry.counter("watch.deduplicated").inc()
+                # Keep 'created' so a new file isn't mistaken for an uncached one
+                if previous in ('created', 'moved') and change_type == 'modified':
+                    return
+                if previous == 'moved' and change_type == 'deleted':
+                    # Moved, then deleted: the file is gone from where it was
+                    del self.pending[file_path]
+                    file_path = self.moved_from.pop(file_path)
+            self.moved_from.pop(file_path, None)
+            self.pending[file_path] = change_type
+    
+    def _flush_loop(self):
+        while self.running:
+            time.sleep(self.debounce)
+            self.flush()
+    
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            moved_from, self.moved_from = self.moved_from, {}
+        for file_path, change_type in pending.items():
+            self._process_path(file_path, change_type, moved_from.get(file_path))
+    
+    @registry.timed("watch.event")
+    def _process_path(self, file_path, change_type, old_path=None):
+        if change_type != 'moved' and not self._owns(file_path):
+            return
         try:
-            current_size = 0
-            if os.path.exists(file_path):
-                current_size = os.path.getsize(file_path)
+            # One stat per path per flush; a missing file means it was deleted
+            current_size = None
+            if change_type != 'deleted':
+                try:
+                    current_size = os.stat(file_path).st_size
+                except FileNotFoundError:
+                    pass
             
-            size_change = current_size - self.last_sizes.get(file_path, 0)
-            self.last_sizes[file_path] = current_size
+            with self.lock:
+                if old_path is not None:
+                    old_size = self.last_sizes.pop(old_path, None)
+                    if current_size is None and old_size is not None:
+                        # Already moved on or deleted; later events for it will say which
+                        current_size = old_size
+                else:
+                    old_size = self.last_sizes.get(file_path)
+                if current_size is None:
+                    self.last_sizes.pop(file_path, None)
+                else:
+                    self._cache(file_path, current_size)
             
-            if size_change != 0:
-                process_name = self._get_process_using_file(file_path)
+            if current_size is None:
+                if old_size is None:
+                    return
+                change_type, size_change = 'deleted', -old_size
+            elif old_size is None:
+                if change_type not in ('created', 'moved'):
+                    # Not seen before (evicted, or outside the baseline): just remember it
+                    return
+                # A move from an unknown size can't be told apart from a new file
+                change_type, size_change, old_path = 'created', current_size, None
+            elif old_path is not None:
+                change_type, size_change = 'moved', current_size - old_size
+            else:
+                change_type, size_change = 'modified', current_size - old_size
+            
+            # A move is reported even when the size didn't change
+            if size_change != 0 or old_path is not None:
+                if change_type == 'deleted':
+                    process_name = self.resolver.get_deleted_file_process(file_path)
+                else:
+                    process_name = self.resolver.get_process_using_file(file_path)
                 change = StorageChange(
                     file_path, 
                     size_change, 
                     change_type, 
                     datetime.now(),
-                    process_name
+                    process_name,
+                    old_path,
+                    current_size or 0
                 )
-                self.change_queue.put(change)
+                self.change_bus.publish(change)
         except Exception as e:
             print(f"Error handling file change: {e}")
+
+def format_size_change(size_change):
+    size_str = f"{size_change:+,} bytes"
+    if abs(size_change) > 1024*1024:
+        size_str = f"{size_change/(1024*1024):+,.1f} MB"
+    elif abs(size_change) > 1024:
+        size_str = f"{size_change/1024:+,.1f} KB"
+    return size_str
+
+class ConsoleRenderer:
+    """Buffers change output and writes it once per frame.
     
-    def _get_process_using_file(self, file_path):
-        try:
-            current_time = time.time()
-            if file_path in self.process_cache:
-                cached_time, cached_process = self.process_cache[file_path]
-                if current_time - cached_time < self.cache_timeout:
-                    return cached_process
-            
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    proc_obj = psutil.Process(proc.info['pid'])
-                    open_files = proc_obj.open_files()
-                    
-                    for file in open_files:
-                        if file.path == file_path:
-                            self.process_cache[file_path] = (current_time, proc.info['name'])
-                            return proc.info['name']
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                except Exception:
-                    continue
-        except Exception:
-            pass
+    Frames with more than collapse_threshold changes are summarized per
+    directory ("1,243 changes in X\\node_modules (+84.0 MB)"); the changes
+    still go to the journal (through the monitor's JournalWriter), which
+    says so in the summary if it has had to drop any.
+    """
+    def __init__(self, format_change, fps=4, collapse_threshold=40, max_summary_lines=10,
+                 journal_writer=None):
+        self.format_change = format_change
+        self.frame_interval = 1.0 / max(fps, 0.1)
+        self.collapse_threshold = collapse_threshold
+        self.max_summary_lines = max_summary_lines
+        self.journal_writer = journal_writer
+        self.frames = 0
+        self.collapsed_frames = 0
+    
+    @classmethod
+    def from_config(cls, format_change, config, journal_writer=None):
+        settings = config.section("console")
+        return cls(
+            format_change,
+            fps=settings.get("fps", 4),
+            collapse_threshold=settings.get("collapse_threshold", 40),
+            max_summary_lines=settings.get("max_summary_lines", 10),
+            journal_writer=journal_writer
+        )
+    
+    @registry.timed("ui.console_frame")
+    def render(self, changes):
+        if not changes:
+            return
+        self.frames += 1
+        
+        if len(changes) > self.collapse_threshold:
+            self.collapsed_frames += 1
+            lines = self.summarize(changes)
+        else:
+            lines = [self.format_change(change) for change in changes]
         
-        self._clean_cache()
-        return "Unknown"
+        # One write per frame instead of one print per change
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
     
-    def _clean_cache(self):
-        current_time = time.time()
-        self.process_cache = {k: v for k, v in self.process_cache.items() 
-                            if current_time - v[0] < self.cache_timeout}
+    def summarize(self, changes):
+        groups = {}
+        for change in changes:
+            directory = os.path.dirname(change.path)
+            count, size = groups.get(directory, (0, 0))
+            groups[directory] = (count + 1, size + change.size_change)
+        
+        # Merge the deepest directories into their parents until the summary fits
+        while len(groups) > self.max_summary_lines:
+            deepest = max(directory.count(os.sep) for directory in groups)
+            merged = {}
+            for directory, (count, size) in groups.items():
+                if directory.count(os.sep) == deepest:
+                    parent = os.path.dirname(directory)
+                    directory = parent if parent else directory
+                total_count, total_size = merged.get(directory, (0, 0))
+                merged[directory] = (total_count + count, total_size + size)
+            if len(merged) == len(groups):
+                break
+            groups = merged
+        
+        timestamp = changes[-1].timestamp.strftime("%H:%M:%S")
+        lines = [f"[{timestamp}] {len(changes):,} changes collapsed" + self.journal_note()]
+        for directory, (count, size) in sorted(groups.items(), key=lambda x: x[1][0], reverse=True):
+            lines.append(f"[{timestamp}] * {count:,} changes in {directory} ({format_size_change(size)})")
+        return lines
+    
+    def journal_note(self):
+        if self.journal_writer is None:
+            return ""
+        dropped = self.journal_writer.subscription.dropped
+        if dropped:
+            return f" (see journal; {dropped:,} changes were dropped from it)"
+        return " (see journal)"
 
 class ConsoleStorageMonitor:
-    def __init__(self, drive_path="C:\\"):
-        self.drive_path = drive_path
+    def __init__(self, config=None):
         self.running = False
-        self.observer = None
-        self.handler = None
-        self.change_queue = queue.Queue()
-        self.changes = []
+        self.config = config or load_config()
+        self.config_watcher = ConfigWatcher(self.config)
+        self.volumes = configured_volumes(self.config)
+        # One observer per volume, so a slow drive's events never queue behind another's
+        self.observers = {}  # volume -> watchdog Observer
+        self.handlers = {}  # root key -> FileChangeHandler
+        self.watches = {}  # root key -> (Observer, watchdog ObservedWatch)
+        # Shared so every root's deletions can be attributed from the same history
+        self.resolver = ProcessResolver(cache_timeout=5)
+        # The display thread gets a bounded buffer; bursts to the same file are merged
+        self.change_bus = ChangeBus()
+        self.subscription = self.change_bus.subscribe("console", maxsize=10000, policy=COALESCE)
+        self.changes = collections.deque(maxlen=200)  # Keep only last 200 changes
+        self.render_mode = self.config.section("console").get("render", "buffered")
+        self.journal = ChangeJournal.from_config(self.config)
+        self.journal_writer = None
+        if self.journal is not None:
+            self.journal_writer = JournalWriter(self.journal, self.change_bus)
+            registry.gauge("queue.journal", lambda: self.journal_writer.subscription.lag)
+        registry.gauge("queue.console", lambda: self.subscription.lag)
+        self.metrics_dumper = MetricsDumper.from_config(registry, self.config)
+        self.profiler = SamplingProfiler.from_config(self.config)
+        self.usage_sampler = DiskUsageSampler.from_config(self.config)
+        self.growth_detector = GrowthDetector.from_config(self.config)
+        if self.growth_detector is not None:
+            self.growth_detector.add_callback(self.print_anomaly)
+        self.alert_engine = AlertEngine.from_config(self.config)
+        if self.alert_engine is not None:
+            self.alert_engine.add_sink(CallbackSink(self.print_alert))
+        self.renderer = None
+        if self.render_mode == "buffered":
+            self.renderer = ConsoleRenderer.from_config(self.format_change, self.config, self.journal_writer)
         self.stats = {
             'total_changes': 0,
             'total_size_change': 0,
@@ -120,64 +339,161 @@ class ConsoleStorageMonitor:
         }
         
     def start_monitoring(self):
-        print(f"Starting storage monitoring for {self.drive_path}")
+        volumes = sorted({volume_for(root.path, self.volumes) for root in self.config.roots})
+        print(f"Starting storage monitoring for {', '.join(volumes)}")
         print("Press Ctrl+C to stop monitoring")
         print("Press 's' + Enter to show statistics")
         print("Press 'a' + Enter to show analysis")
         print("Press 'c' + Enter to clear history")
+        print("Press 'p' + Enter to show performance stats")
         print("-" * 80)
         
-        self.handler = FileChangeHandler(self.change_queue)
-        self.observer = Observer()
-        
-        # Monitor important directories
-        important_dirs = [
-            os.path.expanduser("~\\AppData\\Local"),
-            os.path.expanduser("~\\AppData\\Roaming"),
-            os.path.expanduser("~\\Documents"),
-            os.path.expanduser("~\\Downloads"),
-            os.path.expanduser("~\\Desktop"),
-            "C:\\Program Files",
-            "C:\\Program Files (x86)",
-            "C:\\Windows\\Temp",
-            "C:\\Users\\Public\\Downloads",
-            "C:\\Users\\Public\\Desktop"
-        ]
-        
-        for directory in important_dirs:
-            if os.path.exists(directory):
-                try:
-                    self.observer.schedule(self.handler, directory, recursive=True)
-                    print(f"Monitoring: {directory}")
-                except Exception as e:
-                    print(f"Could not monitor {directory}: {e}")
+        self.running = True
         
-        self.observer.start()
+        # Every configured root is watched; the console has no polling engine
+        if self.config.source:
+            print(f"Using config: {self.config.source}")
+        for root in self.config.roots:
+            self.watch_root(root)
         
-        self.running = True
+        if self.journal_writer is not None:
+            self.journal_writer.start()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.start()
+        if self.profiler is not None:
+            print(f"Profiling for {self.profiler.duration:g}s...")
+            self.profiler.start()
+        if self.usage_sampler is not None:
+            self.usage_sampler.start()
+        if self.growth_detector is not None:
+            self.growth_detector.start(self.change_bus)
+        if self.alert_engine is not None:
+            self.alert_engine.start(self.change_bus)
         
         # Start display thread
-        display_thread = threading.Thread(target=self.display_changes)
+        display_thread = threading.Thread(target=self.display_changes, name="display")
         display_thread.daemon = True
         display_thread.start()
         
         # Start input thread
-        input_thread = threading.Thread(target=self.handle_input)
+        input_thread = threading.Thread(target=self.handle_input, name="input")
         input_thread.daemon = True
         input_thread.start()
         
         try:
             while self.running:
                 time.sleep(0.1)
+                self.reload_config()
         except KeyboardInterrupt:
             print("\nStopping monitoring...")
             self.stop()
+        else:
+            # 'q' command
+            self.stop()
+    
+    def observer_for(self, volume):
+        observer = self.observers.get(volume)
+        if observer is None:
+            observer = Observer()
+            observer.name = f"watchdog {volume}"
+            self.observers[volume] = observer
+            observer.start()
+        return observer
+    
+    def watch_root(self, root):
+        if not os.path.exists(root.path):
+            return
+        try:
+            settings = self.config.section("watch")
+            volume = volume_for(root.path, self.volumes)
+            handler = FileChangeHandler(self.change_bus, root.path_filter,
+                                        root.key, lambda path: self.config.root_for(path),
+                                        debounce=settings.get("debounce", 0.5),
+                                        max_cached=settings.get("max_cached_sizes", 200000),
+                                        resolver=self.resolver,
+                                        budget=budget_for(self.config, volume))
+            observer = self.observer_for(volume)
+            self.watches[root.key] = (observer, observer.schedule(handler, root.path, recursive=True))
+            self.handlers[root.key] = handler
+            seed_thread = threading.Thread(target=handler.seed, name="watch-seed",
+                                           args=(root.path, self.config.nested_roots(root)))
+            seed_thread.daemon = True
+            seed_thread.start()
+            print(f"Monitoring: {root.path}")
+        except Exception as e:
+            print(f"Could not monitor {root.path}: {e}")
+    
+    def unwatch_root(self, root):
+        watch = self.watches.pop(root.key, None)
+        handler = self.handlers.pop(root.key, None)
+        if handler is not None:
+            handler.stop()
+        if watch is not None:
+            observer, watch = watch
+            try:
+                observer.unschedule(watch)
+                print(f"Stopped monitoring: {root.path}")
+            except Exception as e:
+                print(f"Could not stop monitoring {root.path}: {e}")
+    
+    def reload_config(self):
+        """Apply config file edits by adding/removing watches, without a restart"""
+        try:
+            result = self.config_watcher.check(time.time())
+        except ConfigError as e:
+            print(f"Config error: {e}")
+            return
+        if result is None:
+            return
+        
+        new_config, added, removed, changed = result
+        old_roots = [root for root in self.config.roots if root.key in self.watches]
+        self.config = new_config
+        volumes = configured_volumes(new_config)
+        if volumes != self.volumes:
+            # Roots may be on other volumes now; watch them again on the right observers
+            self.volumes = volumes
+            for root in old_roots:
+                self.unwatch_root(root)
+            removed, added = [], list(new_config.roots)
+        for root in removed:
+            self.unwatch_root(root)
+        for root in added:
+            self.watch_root(root)
+        for root in changed:
+            # Filters can be swapped on the live handler
+            handler = self.handlers.get(root.key)
+            if handler is not None:
+                handler.path_filter = root.path_filter
+        print(f"Configuration reloaded: {len(added)} added, {len(removed)} removed, "
+              f"{len(changed)} changed roots")
     
     def stop(self):
         self.running = False
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        for observer in self.observers.values():
+            observer.stop()
+        for observer in self.observers.values():
+            observer.join()
+        for handler in self.handlers.values():
+            handler.stop()
+        if self.journal_writer is not None:
+            self.journal_writer.stop()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+        if self.usage_sampler is not None:
+            self.usage_sampler.stop()
+        if self.growth_detector is not None:
+            self.growth_detector.stop()
+        if self.alert_engine is not None:
+            self.alert_engine.stop()
+    
+    def print_anomaly(self, anomaly):
+        print(f"[{anomaly.timestamp.strftime('%H:%M:%S')}] ! {anomaly.describe()}")
+    
+    def print_alert(self, alert):
+        print(f"[{alert.timestamp.strftime('%H:%M:%S')}] ! {alert.rule}: {alert.message}")
     
     def handle_input(self):
         while self.running:
@@ -189,6 +505,8 @@ class ConsoleStorageMonitor:
                     self.show_analysis()
                 elif user_input == 'c':
                     self.clear_history()
+                elif user_input == 'p':
+                    self.show_performance()
                 elif user_input == 'q':
                     self.running = False
                     break
@@ -198,15 +516,14 @@ class ConsoleStorageMonitor:
                 pass
     
     def display_changes(self):
+        if self.renderer is not None:
+            self.display_changes_buffered()
+            return
+        
         while self.running:
             try:
-                change = self.change_queue.get(timeout=1)
+                change = self.subscription.get(timeout=1)
                 self.changes.append(change)
-                
-                # Keep only last 200 changes
-                if len(self.changes) > 200:
-                    self.changes = self.changes[-200:]
-                
                 self.update_stats(change)
                 self.print_change(change)
                 
@@ -215,6 +532,18 @@ class ConsoleStorageMonitor:
             except Exception as e:
                 print(f"Error in display thread: {e}")
     
+    def display_changes_buffered(self):
+        while self.running:
+            try:
+                time.sleep(self.renderer.frame_interval)
+                frame = self.subscription.get_batch(100000)
+                for change in frame:
+                    self.changes.append(change)
+                    self.update_stats(change)
+                self.renderer.render(frame)
+            except Exception as e:
+                print(f"Error in display thread: {e}")
+    
     def update_stats(self, change):
         self.stats['total_changes'] += 1
         self.stats['total_size_change'] += change.size_change
@@ -229,17 +558,16 @@ class ConsoleStorageMonitor:
             pass
     
     def print_change(self, change):
+        print(self.format_change(change))
+    
+    def format_change(self, change):
         timestamp = change.timestamp.strftime("%H:%M:%S")
-        
-        # Format size change
-        size_str = f"{change.size_change:+,} bytes"
-        if abs(change.size_change) > 1024*1024:
-            size_str = f"{change.size_change/(1024*1024):+,.1f} MB"
-        elif abs(change.size_change) > 1024:
-            size_str = f"{change.size_change/1024:+,.1f} KB"
+        size_str = format_size_change(change.size_change)
         
         # Truncate long paths
         path = change.path
+        if change.change_type == 'moved' and change.old_path:
+            path = f"{change.old_path} -> {change.path}"
         if len(path) > 70:
             path = "..." + path[-67:]
         
@@ -247,10 +575,11 @@ class ConsoleStorageMonitor:
         change_symbol = {
             'created': '+',
             'modified': '~',
-            'deleted': '-'
+            'deleted': '-',
+            'moved': '>'
         }.get(change.change_type, '?')
         
-        print(f"[{timestamp}] {change_symbol} {size_str:>12} | {change.process_name:>15} | {change.file_extension:>6} | {path}")
+        return f"[{timestamp}] {change_symbol} {size_str:>12} | {change.process_name:>15} | {change.file_extension:>6} | {path}"
     
     def show_statistics(self):
         if not self.changes:
@@ -263,10 +592,19 @@ class ConsoleStorageMonitor:
         
         # Overall stats
         print(f"Total Changes: {self.stats['total_changes']}")
+        bus_stats = self.subscription.stats()
+        print(f"Display Lag: {bus_stats['lag']} pending ({bus_stats['lag_seconds']:.1f}s), "
+              f"{bus_stats['coalesced']} merged, {bus_stats['dropped']} dropped")
         print(f"Total Size Change: {self.stats['total_size_change']:+,} bytes")
         if abs(self.stats['total_size_change']) > 1024*1024:
             print(f"                ({self.stats['total_size_change']/(1024*1024):+,.1f} MB)")
         
+        history = self.usage_sampler.history() if self.usage_sampler else None
+        rate = history.growth_rate(3600) if history else None
+        if rate is not None:
+            print(f"Disk Growth: {rate * 3600 / (1024**2):+,.1f} MB/hour, "
+                  f"full in {format_duration(history.time_to_full())}")
+        
         # Top processes
         print(f"\nTop Processes ({len(self.stats['processes'])} total):")
         for process, count in sorted(self.stats['processes'].items(), key=lambda x: x[1], reverse=True)[:10]:
@@ -288,6 +626,14 @@ class ConsoleStorageMonitor:
         
         print(f"{'='*60}")
     
+    def show_performance(self):
+        print(f"\n{'='*60}")
+        print("PERFORMANCE")
+        print(f"{'='*60}")
+        for line in registry.format_lines():
+            print(line)
+        print(f"{'='*60}")
+    
     def show_analysis(self):
         if not self.changes:
             print("\nNo changes detected yet.")
@@ -366,30 +712,38 @@ class ConsoleStorageMonitor:
         }
         print("\nHistory cleared!")
 
-def show_disk_usage():
-    try:
-        disk_usage = psutil.disk_usage("C:\\")
-        total_gb = disk_usage.total / (1024**3)
-        used_gb = disk_usage.used / (1024**3)
-        free_gb = disk_usage.free / (1024**3)
-        usage_percent = (used_gb / total_gb) * 100
-        
-        print("CURRENT DISK USAGE:")
-        print(f"Total Space: {total_gb:.1f} GB")
-        print(f"Used Space:  {used_gb:.1f} GB ({usage_percent:.1f}%)")
-        print(f"Free Space:  {free_gb:.1f} GB")
-        print()
-        
-    except Exception as e:
-        print(f"Error getting disk usage: {e}")
+def show_disk_usage(volumes):
+    print("CURRENT DISK USAGE:")
+    for volume in volumes:
+        try:
+            disk_usage = psutil.disk_usage(volume)
+            total_gb = disk_usage.total / (1024**3)
+            used_gb = disk_usage.used / (1024**3)
+            free_gb = disk_usage.free / (1024**3)
+            usage_percent = (used_gb / total_gb) * 100
+            
+            print(f"{volume}")
+            print(f"  Total Space: {total_gb:.1f} GB")
+            print(f"  Used Space:  {used_gb:.1f} GB ({usage_percent:.1f}%)")
+            print(f"  Free Space:  {free_gb:.1f} GB")
+            
+        except Exception as e:
+            print(f"Error getting disk usage for {volume}: {e}")
+    print()
 
 def main():
     print("Real-Time Storage Monitor (Enhanced Console Version)")
     print("=" * 60)
     
-    show_disk_usage()
+    try:
+        config = load_config()
+    except ConfigError as e:
+        print(f"Error loading config, using defaults: {e}")
+        config = MonitorConfig()
+    
+    show_disk_usage(configured_volumes(config))
     
-    monitor = ConsoleStorageMonitor("C:\\")
+    monitor = ConsoleStorageMonitor(config)
     
     try:
         monitor.start_monitoring()
@@ -0,0 +1,535 @@
+import sys
+import json
+import time
+import queue
+import hmac
+import argparse
+import secrets
+import threading
+import collections
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from urllib.request import urlopen, Request
+
+from storage_config import load_config, ConfigError, MonitorConfig, daemon_token, DAEMON_TOKEN_HEADER
+from storage_engine import StorageAnalyzer, VolumeScanners
+from storage_bus import ChangeBus, DROP_OLDEST
+from storage_journal import ChangeJournal, JournalWriter, SessionLog
+from storage_index import LargestFilesIndex
+from storage_metrics import registry, MetricsDumper
+from storage_profiler import SamplingProfiler
+from storage_io import ProcessIOSampler
+from storage_usage import DiskUsageSampler
+from storage_duplicates import DuplicateFinder
+from storage_reader import LargeFileReader
+from storage_anomaly import GrowthDetector
+from storage_alerts import AlertEngine, CallbackSink
+from storage_reclaim import ReclaimPlanner
+from storage_growth import DIMENSIONS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_HISTORY = 10000
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+RECLAIM_PLAN_SECONDS = 15 * 60  # a dry run can be carried out for this long
+
+
+class StorageDaemon:
+    """Runs the polling scanner and analyzer headless and serves them over HTTP"""
+
+    def __init__(self, config, host=DEFAULT_HOST, port=DEFAULT_PORT, history=DEFAULT_HISTORY):
+        self.config = config
+        self.analyzer = StorageAnalyzer(config, max_changes=history)
+        self.file_index = LargestFilesIndex()
+        # Everything that reads file contents shares its reader slots and byte budget
+        self.file_reader = LargeFileReader.from_config(config)
+        self.duplicate_finder = DuplicateFinder.from_config(config, self.file_reader)
+        self.io_sampler = ProcessIOSampler.from_config(config)
+        self.usage_sampler = DiskUsageSampler.from_config(config)
+        self.scanner = VolumeScanners(
+            config,
+            on_change=self.on_change,
+            on_status=self.on_status,
+            on_config_reloaded=self.on_config_reloaded,
+            file_index=self.file_index,
+            io_sampler=self.io_sampler
+        )
+        self.reclaim_plans = collections.OrderedDict()  # plan id -> (time, dry run), the last few only
+        self.reclaim_thread = None
+        self.reclaim_result = None
+        self.status = "Starting..."
+        self.started = datetime.now()
+        self.change_bus = ChangeBus()
+        self.scanner_thread = None
+        self.journal_writer = None
+        journal = ChangeJournal.from_config(config)
+        # The journal tells the planner which program last wrote each file
+        self.reclaim_planner = ReclaimPlanner.from_config(config, self.scanner.resolver, journal)
+        if journal is not None:
+            self.journal_writer = JournalWriter(journal, self.change_bus)
+        self.session_log = SessionLog.from_config(config)
+        self.metrics_dumper = MetricsDumper.from_config(registry, config)
+        self.profiler = SamplingProfiler.from_config(config)
+        self.growth_detector = GrowthDetector.from_config(config)
+        if self.growth_detector is not None:
+            self.growth_detector.add_callback(lambda anomaly: print(
+                f"[{anomaly.timestamp.strftime('%H:%M:%S')}] {anomaly.describe()}"))
+        self.alert_engine = AlertEngine.from_config(config)
+        if self.alert_engine is not None:
+            self.alert_engine.add_sink(CallbackSink(lambda alert: print(
+                f"[{alert.timestamp.strftime('%H:%M:%S')}] {alert.rule}: {alert.message}")))
+        if self.journal_writer is not None:
+            registry.gauge("queue.journal", lambda: self.journal_writer.subscription.lag)
+
+        self.token = daemon_token(config.section("daemon"))
+        # Browsers send the name they looked up; anything else is DNS rebinding
+        self.allowed_hosts = LOCAL_HOSTS | {host}
+        self.server = ThreadingHTTPServer((host, port), DaemonRequestHandler)
+        self.server.daemon_threads = True
+        self.server.storage_daemon = self
+
+    def on_change(self, change):
+        self.analyzer.add_change(change)
+        self.change_bus.publish(change)
+
+    def on_status(self, status):
+        self.status = status
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {status}")
+
+    def on_config_reloaded(self, config):
+        self.config = config
+        self.analyzer.config = config
+
+    def subscribe(self, name, maxsize=1000):
+        # Slow streaming clients lose their oldest changes rather than stall the scanner
+        return self.change_bus.subscribe(name, maxsize=maxsize, policy=DROP_OLDEST)
+
+    def get_status(self):
+        return {
+            'status': self.status,
+            'started': self.started.isoformat(),
+            'uptime_seconds': (datetime.now() - self.started).total_seconds(),
+            'config': self.config.source,
+            'roots': [{'path': root.path, 'mode': root.mode, 'interval': root.interval}
+                      for root in self.config.roots],
+            'changes': len(self.analyzer.changes),
+            'indexed_files': len(self.file_index),
+            'volumes': self.scanner.volume_status(),
+            'subscribers': self.change_bus.stats(),
+            'gaming_session_active': self.analyzer.current_gaming_session is not None,
+        }
+
+    def serve_forever(self):
+        if self.journal_writer is not None:
+            self.journal_writer.start()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.start()
+        if self.profiler is not None:
+            self.profiler.start()
+        if self.io_sampler is not None:
+            self.io_sampler.start()
+        if self.usage_sampler is not None:
+            self.usage_sampler.start()
+        if self.growth_detector is not None:
+            self.growth_detector.start(self.change_bus)
+        if self.alert_engine is not None:
+            self.alert_engine.start(self.change_bus)
+        self.scanner_thread = threading.Thread(target=self.scanner.run, name="scanner", daemon=True)
+        self.scanner_thread.start()
+        host, port = self.server.server_address[:2]
+        print(f"Storage monitor daemon listening on http://{host}:{port}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.scanner.stop()
+        if self.io_sampler is not None:
+            self.io_sampler.stop()
+        if self.usage_sampler is not None:
+            self.usage_sampler.stop()
+        if self.growth_detector is not None:
+            self.growth_detector.stop()
+        if self.alert_engine is not None:
+            self.alert_engine.stop()
+        if self.analyzer.growth is not None:
+            self.analyzer.growth.save()
+        self.server.server_close()
+        if self.journal_writer is not None:
+            self.journal_writer.stop()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+        self.reclaim_planner.cancel()
+
+    def start_profiler(self, duration):
+        """Start a profiling window on request; returns None if one is running"""
+        if self.profiler is not None and self.profiler.running:
+            return None
+        self.profiler = SamplingProfiler(self.config.section("profiler").get("path"), duration)
+        self.profiler.start()
+        return self.profiler
+
+    def plan_reclaim(self):
+        """Dry run, kept under an id for RECLAIM_PLAN_SECONDS so a confirmed plan can be carried out as shown"""
+        plan = self.reclaim_planner.plan(self.scanner.files())
+        plan_id = secrets.token_hex(8)
+        now = time.time()
+        self.reclaim_plans[plan_id] = (now, plan)
+        for old_id, (created, _) in list(self.reclaim_plans.items()):
+            if now - created > RECLAIM_PLAN_SECONDS or len(self.reclaim_plans) > 4:
+                del self.reclaim_plans[old_id]
+        return plan_id, plan
+
+    def start_reclaim(self, plan_id):
+        """Delete the files of an earlier dry run in the background.
+
+        Returns None if a cleanup is already running; raises KeyError for an
+        unknown or expired plan id.
+        """
+        if self.reclaim_thread is not None and self.reclaim_thread.is_alive():
+            return None
+        created, plan = self.reclaim_plans.pop(plan_id)
+        if time.time() - created > RECLAIM_PLAN_SECONDS:
+            raise KeyError(plan_id)
+        self.reclaim_result = None
+        self.reclaim_thread = threading.Thread(target=self.run_reclaim, args=(plan,),
+                                               name="reclaim", daemon=True)
+        self.reclaim_thread.start()
+        return plan
+
+    def run_reclaim(self, plan):
+        def on_progress(result):
+            self.reclaim_result = dict(result)
+        result = self.reclaim_result = self.reclaim_planner.execute(plan, on_progress)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Reclaimed {result['freed'] / (1024 * 1024):,.1f} MB "
+              f"from {result['deleted']} files ({result['skipped']} skipped, {result['failed']} failed)")
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def storage_daemon(self):
+        return self.server.storage_daemon
+
+    def log_message(self, format, *args):
+        # Streaming clients reconnect often; keep the daemon output readable
+        pass
+
+    def _params(self):
+        return {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _hostname(self, value):
+        if value.startswith("["):
+            return value[1:value.find("]")]
+        return value.rsplit(":", 1)[0] if value.count(":") == 1 else value
+
+    def _check_origin(self):
+        """403 unless Host (and Origin, from browsers) name this daemon"""
+        allowed = self.storage_daemon.allowed_hosts
+        host = self.headers.get("Host")
+        origin = self.headers.get("Origin")
+        if (host is not None and self._hostname(host) not in allowed) or \
+                (origin is not None and urlparse(origin).hostname not in allowed):
+            self.close_connection = True  # the body, if any, wasn't read
+            self._send_json({'error': "Requests are only accepted from this machine"}, 403)
+            return False
+        return True
+
+    def _read_json(self):
+        """The POST body as a dict; a JSON content type is required so browsers can't send it cross-site"""
+        if self.headers.get_content_type() != "application/json":
+            raise ValueError("POST requests need Content-Type: application/json")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length).decode("utf-8")) if length else {}
+        if not isinstance(body, dict):
+            raise ValueError("POST body must be a JSON object")
+        return body
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        route = urlparse(self.path).path.rstrip("/") or "/status"
+        params = self._params()
+        analyzer = self.storage_daemon.analyzer
+        if not self._check_origin():
+            return
+        try:
+            if route == "/status":
+                self._send_json(self.storage_daemon.get_status())
+            elif route == "/changes":
+                changes = analyzer.get_recent_changes(float(params.get("minutes", 10)))
+                limit = int(params.get("limit", 500))
+                self._send_json([change.to_dict() for change in changes[-limit:]])
+            elif route == "/changes/largest":
+                changes = analyzer.get_largest_changes(int(params.get("count", 10)))
+                self._send_json([change.to_dict() for change in changes])
+            elif route == "/files/largest":
+                # ?min_mb= lists every file over that size, otherwise the top ?count=
+                count = int(params.get("count", 100))
+                if "min_mb" in params:
+                    min_bytes = int(float(params["min_mb"]) * 1024 * 1024)
+                    files = self.storage_daemon.file_index.over(min_bytes, count)
+                else:
+                    files = self.storage_daemon.file_index.top(count)
+                self._send_json([{'path': path, 'size': size} for path, size in files])
+            elif route == "/duplicates":
+                # Hashes only same-size files from the index; cached across requests
+                finder = self.storage_daemon.duplicate_finder
+                files = self.storage_daemon.file_index.over(finder.min_size)
+                self._send_json(finder.report(files, int(params.get("count", 50))))
+            elif route == "/reclaim":
+                # Progress of the last cleanup; POST /reclaim/plan makes a dry run
+                daemon = self.storage_daemon
+                self._send_json({
+                    'running': daemon.reclaim_thread is not None and daemon.reclaim_thread.is_alive(),
+                    'last_result': daemon.reclaim_result,
+                })
+            elif route == "/processes/io":
+                sampler = self.storage_daemon.io_sampler
+                if sampler is None:
+                    self._send_json({'error': "Process I/O sampling is disabled"}, 404)
+                    return
+                seconds = float(params.get("seconds", 60))
+                rates = sampler.write_rates(seconds)
+                self._send_json([{'process': name, 'bytes_written': written,
+                                  'bytes_per_second': round(rates.get(name, 0))}
+                                 for name, written in sampler.top_writers(seconds, int(params.get("count", 20)))])
+            elif route == "/usage":
+                sampler = self.storage_daemon.usage_sampler
+                history = sampler.history(params.get("volume")) if sampler else None
+                if history is None:
+                    self._send_json({'error': "No disk usage history for that volume"}, 404)
+                    return
+                seconds = float(params.get("minutes", 60)) * 60
+                end = time.time()
+                points = history.range(end - seconds, end, columns=int(params.get("points", 500)))
+                self._send_json({
+                    'volume': history.volume,
+                    'total': history.total,
+                    'points': points,
+                    'growth_bytes_per_second': history.growth_rate(seconds),
+                    'seconds_to_full': history.time_to_full(),
+                })
+            elif route == "/growth":
+                growth = self.storage_daemon.analyzer.growth
+                dimension = params.get("dimension", "roots")
+                if growth is None or dimension not in DIMENSIONS:
+                    self._send_json({'error': f"No growth history for '{dimension}'"}, 404)
+                    return
+                end = time.time()
+                lines = growth.chart(dimension, end - float(params.get("hours", 24)) * 3600, end,
+                                     columns=int(params.get("points", 500)), count=int(params.get("count", 8)))
+                self._send_json({'dimension': dimension, 'series': lines})
+            elif route == "/anomalies":
+                detector = self.storage_daemon.growth_detector
+                if detector is None:
+                    self._send_json({'error': "Anomaly detection is disabled"}, 404)
+                    return
+                self._send_json([anomaly.to_dict() for anomaly in reversed(detector.recent)])
+            elif route == "/alerts":
+                engine = self.storage_daemon.alert_engine
+                alerts = [alert.to_dict() for alert in reversed(engine.recent)] if engine else []
+                self._send_json(alerts)
+            elif route == "/metrics":
+                self._send_json(registry.snapshot())
+            elif route == "/aggregates":
+                self._send_json(analyzer.get_aggregates(float(params.get("minutes", 30))))
+            elif route == "/sessions":
+                sessions = [session.to_dict() for session in analyzer.gaming_sessions]
+                current = analyzer.current_gaming_session
+                self._send_json({
+                    'sessions': sessions,
+                    'current': current.to_dict() if current else None,
+                })
+            elif route == "/stream":
+                self.stream_changes(params)
+            else:
+                self._send_json({'error': f"Unknown endpoint {route}"}, 404)
+        except ValueError as e:
+            self._send_json({'error': str(e)}, 400)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        route = urlparse(self.path).path.rstrip("/")
+        analyzer = self.storage_daemon.analyzer
+        if not self._check_origin():
+            return
+        token = self.headers.get(DAEMON_TOKEN_HEADER) or ""
+        if not hmac.compare_digest(token.encode("utf-8"), self.storage_daemon.token.encode("utf-8")):
+            self.close_connection = True
+            self._send_json({'error': f"Missing or wrong {DAEMON_TOKEN_HEADER} header"}, 403)
+            return
+        try:
+            body = self._read_json()
+            if route == "/sessions/start":
+                analyzer.start_gaming_session()
+                self._send_json(analyzer.current_gaming_session.to_dict())
+            elif route == "/profile":
+                profiler = self.storage_daemon.start_profiler(float(self._params().get("seconds", 30)))
+                if profiler is None:
+                    self._send_json({'error': "A profile is already being recorded"}, 409)
+                else:
+                    self._send_json({'path': profiler.path, 'duration': profiler.duration})
+            elif route == "/reclaim/plan":
+                # Dry run from the scanner's file list, kept under plan_id for POST /reclaim
+                plan_id, plan = self.storage_daemon.plan_reclaim()
+                report = plan.to_dict(int(self._params().get("count", 100)))
+                report['plan_id'] = plan_id
+                self._send_json(report)
+            elif route == "/reclaim":
+                # Only the files of a dry run from POST /reclaim/plan, as the user saw them
+                try:
+                    plan = self.storage_daemon.start_reclaim(body.get("plan_id"))
+                except KeyError:
+                    self._send_json({'error': "Unknown or expired plan_id; POST /reclaim/plan for a new one"}, 404)
+                    return
+                if plan is None:
+                    self._send_json({'error': "A cleanup is already running"}, 409)
+                else:
+                    self._send_json({'files': len(plan.candidates), 'reclaimable': plan.reclaimable})
+            elif route == "/reclaim/cancel":
+                self.storage_daemon.reclaim_planner.cancel()
+                self._send_json({'cancelled': True})
+            elif route == "/sessions/end":
+                session = analyzer.end_gaming_session()
+                if session and self.storage_daemon.session_log is not None:
+                    self.storage_daemon.session_log.append(session)
+                self._send_json(session.to_dict() if session else {'error': "No active session"},
+                                200 if session else 409)
+            else:
+                self._send_json({'error': f"Unknown endpoint {route}"}, 404)
+        except ValueError as e:
+            self.close_connection = True
+            self._send_json({'error': str(e)}, 400)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def stream_changes(self, params):
+        """Stream changes as JSON lines until the client disconnects.
+
+        Changes newer than ?since=<iso timestamp> (or from the last ?minutes)
+        are replayed first from the daemon's in-memory history, so a
+        front-end can detach and re-attach without rescanning. Only the last
+        "history" changes are kept there; anything older is in the journal.
+        """
+        heartbeat = float(params.get("heartbeat", 5))
+        client = "%s:%s" % self.client_address[:2]
+        subscriber = self.storage_daemon.subscribe(f"stream {client}",
+                                                   int(params.get("buffer", 1000)))
+        try:
+            if "since" in params:
+                since = datetime.fromisoformat(params["since"])
+                backlog = [c for c in self.storage_daemon.analyzer.get_recent_changes(10**6)
+                           if c.timestamp > since]
+            else:
+                backlog = self.storage_daemon.analyzer.get_recent_changes(
+                    float(params.get("minutes", 0)))
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            for change in backlog:
+                self._write_chunk(json.dumps(change.to_dict()).encode("utf-8") + b"\n")
+            # Changes added between subscribing and reading the backlog come from both.
+            # The bus delivers the analyzer's own objects, so skip those already sent;
+            # once the subscription has gone quiet every such change has been seen.
+            replayed = {id(change) for change in backlog}
+
+            while True:
+                try:
+                    change = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    replayed = backlog = None
+                    # Empty line keeps the connection alive and detects closed clients
+                    self._write_chunk(b"\n")
+                    continue
+                if replayed and id(change) in replayed:
+                    continue
+                self._write_chunk(json.dumps(change.to_dict()).encode("utf-8") + b"\n")
+        finally:
+            subscriber.close()
+
+
+def query(base_url, endpoint, method="GET", data=None, token=None):
+    headers = {}
+    body = None
+    if method == "POST":
+        body = json.dumps(data or {}).encode("utf-8")
+        headers = {"Content-Type": "application/json", DAEMON_TOKEN_HEADER: token or ""}
+    request = Request(base_url.rstrip("/") + endpoint, body, headers, method=method)
+    with urlopen(request, timeout=30) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def tail(base_url, minutes=0):
+    with urlopen(f"{base_url.rstrip('/')}/stream?minutes={minutes}") as response:
+        for line in response:
+            line = line.strip()
+            if not line:
+                continue
+            change = json.loads(line)
+            timestamp = change['timestamp'][11:19]
+            print(f"[{timestamp}] {change['change_type']:>8} {change['size_change']:+,} bytes | "
+                  f"{change['process_name']} | {change['path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless storage monitor with a local query API")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "query", "tail"])
+    parser.add_argument("endpoint", nargs="?", default="/status",
+                        help="Endpoint for 'query', e.g. /changes?minutes=5 or /aggregates")
+    parser.add_argument("--config", help="Path to a JSON/TOML config file")
+    parser.add_argument("--host", help=f"Address to bind/connect to (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, help=f"Port to bind/connect to (default {DEFAULT_PORT})")
+    parser.add_argument("--post", action="store_true", help="Send 'query' as a POST request")
+    parser.add_argument("--data", help="JSON body for --post, e.g. '{\"plan_id\": \"...\"}'")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except ConfigError as e:
+        print(f"Error loading config, using defaults: {e}")
+        config = MonitorConfig()
+
+    settings = config.section("daemon")
+    host = args.host or settings.get("host", DEFAULT_HOST)
+    port = args.port or settings.get("port", DEFAULT_PORT)
+    base_url = f"http://{host}:{port}"
+
+    try:
+        if args.command == "query":
+            result = query(base_url, args.endpoint, "POST" if args.post else "GET",
+                           json.loads(args.data) if args.data else None, daemon_token(settings))
+            print(json.dumps(result, indent=2))
+        elif args.command == "tail":
+            tail(base_url)
+        else:
+            daemon = StorageDaemon(config, host, port, settings.get("history", DEFAULT_HISTORY))
+            daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
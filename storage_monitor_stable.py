@@ -1,147 +1,161 @@
 import os
 import sys
 import time
+import threading
 import psutil
-import win32api
-import win32process
-import win32gui
-import win32con
-from datetime import datetime, timedelta
-from pathlib import Path
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QTableWidget, QTableWidgetItem, QLabel, 
-                             QPushButton, QTextEdit, QSplitter, QHeaderView, QTabWidget,
-                             QMessageBox, QProgressBar, QCheckBox, QFrame, QGroupBox,
-                             QSlider, QComboBox, QSpinBox, QGridLayout, QScrollArea)
-from PyQt5.QtCore import QThread, pyqtSignal, QTimer, Qt, QMutex, QPropertyAnimation, QEasingCurve
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPainter, QBrush, QPen, QPixmap
+                             QPushButton, QTextEdit, QHeaderView, QTabWidget,
+                             QMessageBox, QGroupBox, QFileDialog, QComboBox)
+from PyQt5.QtCore import QThread, QObject, QEvent, pyqtSignal, QTimer, Qt
+from PyQt5.QtGui import QFont, QColor, QPainter, QBrush, QPen
 import json
+from urllib.request import urlopen, Request
+from urllib.parse import quote
+from storage_config import load_config, ConfigError, MonitorConfig, daemon_token, DAEMON_TOKEN_HEADER
+from storage_engine import StorageAnalyzer, VolumeScanners, StorageChange
+from storage_bus import ChangeBus, COALESCE
+from storage_journal import ChangeJournal, JournalWriter, SessionLog
+from storage_export import export_changes, ExportError
+from storage_index import LargestFilesIndex
+from storage_metrics import registry, MetricsDumper
+from storage_profiler import SamplingProfiler
+from storage_io import ProcessIOSampler
+from storage_usage import DiskUsageSampler, format_duration, system_volume
+from storage_duplicates import DuplicateFinder
+from storage_reader import LargeFileReader
+from storage_anomaly import GrowthDetector
+from storage_alerts import AlertEngine, CallbackSink
+from storage_reclaim import ReclaimPlanner
+from storage_tree import DirectoryTree, TreemapLayout, largest_files
+from storage_charts import ChartSeries, create_chart, DEFAULT_BACKEND
 
-class StorageChange:
-    def __init__(self, path, size_change, change_type, timestamp, process_name=None):
-        self.path = path
-        self.size_change = size_change
-        self.change_type = change_type
-        self.timestamp = timestamp
-        self.process_name = process_name
-        self.file_extension = self._get_extension()
-        
-    def _get_extension(self):
-        try:
-            return Path(self.path).suffix.lower()
-        except:
-            return ""
-
-class GamingSession:
-    def __init__(self, start_time):
-        self.start_time = start_time
-        self.end_time = None
-        self.start_snapshot = {}
-        self.end_snapshot = {}
-        self.changes = []
-        self.total_size_change = 0
-        
-    def add_change(self, change):
-        self.changes.append(change)
-        self.total_size_change += change.size_change
+LARGEST_FILES_SHOWN = 1000
 
 class SimpleTreemapWidget(QWidget):
+    """Squarified treemap of flat items, or of a directory tree that updates it with deltas.
+    
+    In a tree, click a directory to zoom into it and right-click to go back up.
+    """
+    zoomed = pyqtSignal(str)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.data = []
+        self.treemap = TreemapLayout(file_loader=largest_files)
+        self.tree = None
+        self.node = None  # directory shown when in a tree
+        self.showing_tree = False
         self.setMinimumSize(400, 300)
         
     def update_data(self, data):
-        self.data = data
+        if self.tree is not None:
+            # The tree's zoom and cached layouts are kept for when it is shown again
+            self.tree.remove_listener(self.on_tree_changed)
+        self.showing_tree = False
+        self.zoomed.emit("")
+        items = [(item['path'], item['name'], item['size']) for item in data]
+        rects = self.treemap.set_items(items, self.width(), self.height())
+        self.repaint_rects(rects)
+    
+    def set_tree(self, tree):
+        """Show tree and follow its changes; a new tree starts from its top directory"""
+        if self.tree is not None:
+            self.tree.remove_listener(self.on_tree_changed)
+        if tree is not self.tree:
+            # Cached layouts and file lists belong to the old tree's nodes
+            self.treemap.layouts.clear()
+            self.treemap.files.clear()
+            self.node = tree.top() if tree is not None else None
+        self.tree = tree
+        self.showing_tree = tree is not None
+        if tree is not None:
+            tree.add_listener(self.on_tree_changed)
+            self.zoom(self.node)
+    
+    def zoom(self, node):
+        self.node = node
+        self.treemap.set_node(node, self.width(), self.height())
         self.update()
+        self.zoomed.emit(node.path)
+    
+    def zoom_out(self):
+        if self.showing_tree and self.node is not self.tree.top() and self.node.parent is not None:
+            self.zoom(self.node.parent)
+    
+    def on_tree_changed(self, dirty):
+        node = self.node
+        if self.tree.directories.get(node.path) is not node and node is not self.tree.root:
+            # The directory shown was deleted; go up to what is left
+            while node.parent is not None and self.tree.directories.get(node.path) is not node:
+                node = node.parent
+            self.zoom(node if node.parent is not None else self.tree.top())
+            return
+        self.repaint_rects(self.treemap.update(dirty))
+    
+    def mousePressEvent(self, event):
+        if not self.showing_tree:
+            return
+        if event.button() == Qt.RightButton:
+            self.zoom_out()
+            return
+        cell = self.treemap.cell_at(event.x(), event.y())
+        # Files and the "(files)" cells zoom into their directory
+        while cell is not None and cell.node is None:
+            cell = cell.parent
+        if cell is not None and cell.depth >= 0:
+            self.zoom(cell.node)
+    
+    def repaint_rects(self, rects):
+        if rects is None:
+            self.update()
+            return
+        # Qt merges these into one region for the next paint
+        for x, y, w, h in rects:
+            self.update(x, y, w + 1, h + 1)
+    
+    def resizeEvent(self, event):
+        self.treemap.resize(self.width(), self.height())
+        super().resizeEvent(event)
         
+    @registry.timed("ui.treemap_paint")
     def paintEvent(self, event):
-        if not self.data:
-            return
-            
         try:
             painter = QPainter(self)
-            painter.setRenderHint(QPainter.Antialiasing)
+            area = event.rect()
+            painter.setClipRect(area)
+            painter.fillRect(area, QColor(43, 43, 43))
             
-            # Get widget dimensions
-            width = self.width()
-            height = self.height()
+            font = QFont()
+            font.setPointSize(7)
+            painter.setFont(font)
+            border = QPen(QColor(50, 50, 50), 1)
+            total_size = self.treemap.top.size
             
-            if width <= 0 or height <= 0:
-                return
-                
-            # Calculate total size for normalization
-            total_size = sum(item['size'] for item in self.data)
-            if total_size == 0:
-                return
-                
-            # Sort data by size (largest first)
-            sorted_data = sorted(self.data, key=lambda x: x['size'], reverse=True)
-            
-            # Simple grid layout
-            self.draw_simple_grid(painter, width, height, sorted_data, total_size)
+            for cell in self.treemap.cells(area.x(), area.y(), area.width(), area.height()):
+                self.draw_cell(painter, cell, total_size, border)
             
         except Exception as e:
             print(f"Error in treemap paint: {e}")
     
-    def draw_simple_grid(self, painter, width, height, data, total_size):
-        try:
-            # Calculate grid dimensions
-            item_count = len(data)
-            if item_count == 0:
-                return
-                
-            # Simple grid layout
-            cols = int(item_count ** 0.5) + 1
-            rows = (item_count + cols - 1) // cols
-            
-            cell_width = width // cols
-            cell_height = height // rows
-            
-            for i, item in enumerate(data):
-                if i >= item_count:
-                    break
-                    
-                row = i // cols
-                col = i % cols
-                
-                x = col * cell_width
-                y = row * cell_height
-                
-                # Ensure minimum size
-                draw_width = max(1, cell_width - 2)
-                draw_height = max(1, cell_height - 2)
-                
-                # Calculate color based on size
-                ratio = item['size'] / total_size if total_size > 0 else 0
-                intensity = int(100 + ratio * 155)
-                color = QColor(intensity, intensity // 2, intensity // 3)
-                
-                # Draw rectangle
-                painter.fillRect(x + 1, y + 1, draw_width, draw_height, QBrush(color))
-                
-                # Draw border
-                painter.setPen(QPen(QColor(50, 50, 50), 1))
-                painter.drawRect(x + 1, y + 1, draw_width, draw_height)
-                
-                # Draw text if space allows
-                if draw_width > 40 and draw_height > 30:
-                    painter.setPen(QColor(255, 255, 255))
-                    font = QFont()
-                    font.setPointSize(7)
-                    painter.setFont(font)
-                    
-                    # Truncate name if too long
-                    name = item['name']
-                    if len(name) > 15:
-                        name = name[:12] + "..."
-                    
-                    text = f"{name}\n{self.format_size(item['size'])}"
-                    painter.drawText(x + 3, y + 3, draw_width - 6, draw_height - 6, 
-                                   Qt.AlignLeft | Qt.AlignTop, text)
-                    
-        except Exception as e:
-            print(f"Error in grid drawing: {e}")
+    def draw_cell(self, painter, cell, total_size, border):
+        x, y, width, height = cell.rect
+        
+        # Calculate color based on size; nested cells get lighter
+        ratio = cell.size / total_size if total_size > 0 else 0
+        intensity = min(255, int(100 + ratio * 155) + cell.depth * 25)
+        color = QColor(intensity, intensity // 2, intensity // 3)
+        
+        painter.fillRect(x + 1, y + 1, width - 2, height - 2, QBrush(color))
+        painter.setPen(border)
+        painter.drawRect(x + 1, y + 1, width - 2, height - 2)
+        
+        # Draw text if space allows; containers show it in their header strip
+        if width > 40 and (height > 30 or (cell.children and height > TreemapLayout.HEADER)):
+            painter.setPen(QColor(255, 255, 255))
+            text_height = TreemapLayout.HEADER if cell.children else height - 6
+            name = painter.fontMetrics().elidedText(cell.name, Qt.ElideMiddle, width - 6)
+            text = f"{name}  {self.format_size(cell.size)}" if cell.children else f"{name}\n{self.format_size(cell.size)}"
+            painter.drawText(x + 3, y + 2, width - 6, text_height, Qt.AlignLeft | Qt.AlignTop, text)
     
     def format_size(self, size):
         if size > 1024**3:
@@ -153,231 +167,269 @@ class SimpleTreemapWidget(QWidget):
         else:
             return f"{size}B"
 
+class RefreshView:
+    def __init__(self, refresh, tab, version, interval):
+        self.refresh = refresh
+        self.tab = tab  # None if always on screen
+        self.version = version  # returns what the view shows a version of, or None to refresh on a timer
+        self.interval = interval  # minimum seconds between refreshes
+        self.seen = None
+        self.last = 0.0
+        
+    def dirty(self):
+        return self.version is None or self.version() != self.seen
+
+class RefreshScheduler(QObject):
+    """Refreshes views when their data changed, only while they can be seen.
+    
+    Views on a tab that isn't selected are left stale until it is. mark()
+    is called when new data arrives; the first mark after a quiet spell
+    waits debounce seconds, so a burst of changes costs one refresh, and a
+    view is never refreshed more often than its interval. Views without a
+    version are refreshed every interval while visible. Nothing is
+    scheduled while paused (the window is minimized), so an idle or
+    minimized window has no timers running for its views.
+    """
+    
+    def __init__(self, tabs, debounce=0.3):
+        super().__init__()
+        self.tabs = tabs
+        self.debounce = debounce
+        self.views = []
+        self.paused = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run_due)
+        tabs.currentChanged.connect(lambda index: self.schedule())
+        
+    def add_view(self, refresh, tab=None, version=None, interval=3.0):
+        self.views.append(RefreshView(refresh, tab, version, interval))
+    
+    def visible(self, view):
+        return view.tab is None or self.tabs.currentWidget() is view.tab
+    
+    def mark(self):
+        self.schedule()
+    
+    def set_paused(self, paused):
+        self.paused = paused
+        if paused:
+            self.timer.stop()
+        else:
+            self.schedule()
+    
+    def schedule(self):
+        if self.paused:
+            return
+        now = time.monotonic()
+        delay = None
+        for view in self.views:
+            if not self.visible(view) or not view.dirty():
+                continue
+            wait = view.last + view.interval - now
+            if view.version is not None:
+                wait = max(wait, self.debounce)
+            delay = max(0.0, wait) if delay is None else min(delay, max(0.0, wait))
+        if delay is None:
+            return
+        # Never push back a refresh that is already due sooner
+        if not self.timer.isActive() or self.timer.remainingTime() > delay * 1000:
+            self.timer.start(int(delay * 1000))
+    
+    @registry.timed("ui.refresh")
+    def run_due(self):
+        now = time.monotonic()
+        for view in self.views:
+            if not self.visible(view) or not view.dirty() or now - view.last < view.interval - 0.01:
+                continue
+            view.seen = view.version() if view.version is not None else None
+            view.last = now
+            view.refresh()
+        self.schedule()
+
 class LightweightStorageMonitor(QThread):
-    change_detected = pyqtSignal(object)
     status_update = pyqtSignal(str)
+    config_reloaded = pyqtSignal(object)
     
-    def __init__(self):
+    def __init__(self, change_bus, config=None, file_index=None, io_sampler=None):
         super().__init__()
+        self.scanner = VolumeScanners(
+            config,
+            on_change=change_bus.publish,
+            on_status=self.status_update.emit,
+            on_config_reloaded=self.config_reloaded.emit,
+            file_index=file_index,
+            io_sampler=io_sampler
+        )
+        
+    def run(self):
+        # Names the thread in profiles
+        threading.current_thread().name = "scanner"
+        self.scanner.run()
+    
+    def stop(self):
+        self.scanner.stop()
+
+class RemoteStorageMonitor(QThread):
+    """Attaches to a running storage_monitor_daemon instead of scanning locally"""
+    status_update = pyqtSignal(str)
+    config_reloaded = pyqtSignal(object)
+    
+    def __init__(self, daemon_url, change_bus, since=None):
+        super().__init__()
+        self.daemon_url = daemon_url.rstrip("/")
+        self.change_bus = change_bus
+        self.since = since
         self.running = False
-        self.file_sizes = {}
-        self.process_cache = {}
-        self.cache_timeout = 10
-        self.monitored_dirs = [
-            os.path.expanduser("~\\AppData\\Local\\Temp"),
-            os.path.expanduser("~\\AppData\\Roaming"),
-            os.path.expanduser("~\\Downloads"),
-            os.path.expanduser("~\\Desktop"),
-            "C:\\Windows\\Temp",
-            "C:\\Users\\Public\\Downloads"
-        ]
         
     def run(self):
         self.running = True
-        self.status_update.emit("Initializing file monitoring...")
-        
-        # Initialize file sizes
-        self.scan_files()
-        self.status_update.emit("Monitoring active - scanning for changes...")
-        
         while self.running:
+            url = f"{self.daemon_url}/stream?heartbeat=1"
+            if self.since:
+                url += f"&since={quote(self.since.isoformat())}"
+            else:
+                url += "&minutes=30"
             try:
-                self.check_for_changes()
-                time.sleep(2)  # Check every 2 seconds
+                with urlopen(url, timeout=10) as response:
+                    self.status_update.emit(f"Attached to daemon at {self.daemon_url}")
+                    for line in response:
+                        if not self.running:
+                            break
+                        line = line.strip()
+                        if not line:
+                            continue
+                        change = StorageChange.from_dict(json.loads(line))
+                        self.since = change.timestamp
+                        self.change_bus.publish(change)
             except Exception as e:
-                self.status_update.emit(f"Error: {str(e)}")
-                time.sleep(5)
-    
-    def scan_files(self):
-        """Initial scan of files to establish baseline"""
-        self.file_sizes.clear()
-        for directory in self.monitored_dirs:
-            if os.path.exists(directory):
-                try:
-                    for root, dirs, files in os.walk(directory):
-                        for file in files:
-                            try:
-                                file_path = os.path.join(root, file)
-                                if os.path.exists(file_path):
-                                    size = os.path.getsize(file_path)
-                                    self.file_sizes[file_path] = size
-                            except (OSError, PermissionError):
-                                continue
-                except (OSError, PermissionError):
-                    continue
-    
-    def check_for_changes(self):
-        """Check for file changes using polling"""
-        current_files = {}
-        
-        # Get current file sizes
-        for directory in self.monitored_dirs:
-            if os.path.exists(directory):
-                try:
-                    for root, dirs, files in os.walk(directory):
-                        for file in files:
-                            try:
-                                file_path = os.path.join(root, file)
-                                if os.path.exists(file_path):
-                                    size = os.path.getsize(file_path)
-                                    current_files[file_path] = size
-                            except (OSError, PermissionError):
-                                continue
-                except (OSError, PermissionError):
-                    continue
-        
-        # Check for changes
-        for file_path, current_size in current_files.items():
-            old_size = self.file_sizes.get(file_path, 0)
-            
-            if current_size != old_size:
-                size_change = current_size - old_size
-                if size_change != 0:
-                    change_type = 'modified' if old_size > 0 else 'created'
-                    process_name = self._get_process_using_file(file_path)
-                    
-                    change = StorageChange(
-                        file_path,
-                        size_change,
-                        change_type,
-                        datetime.now(),
-                        process_name
-                    )
-                    
-                    self.change_detected.emit(change)
-                
-                self.file_sizes[file_path] = current_size
-        
-        # Check for deleted files
-        deleted_files = set(self.file_sizes.keys()) - set(current_files.keys())
-        for file_path in deleted_files:
-            old_size = self.file_sizes[file_path]
-            if old_size > 0:
-                change = StorageChange(
-                    file_path,
-                    -old_size,
-                    'deleted',
-                    datetime.now(),
-                    "Unknown"
-                )
-                self.change_detected.emit(change)
-            
-            del self.file_sizes[file_path]
-    
-    def _get_process_using_file(self, file_path):
-        try:
-            current_time = time.time()
-            if file_path in self.process_cache:
-                cached_time, cached_process = self.process_cache[file_path]
-                if current_time - cached_time < self.cache_timeout:
-                    return cached_process
-            
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    proc_obj = psutil.Process(proc.info['pid'])
-                    open_files = proc_obj.open_files()
-                    
-                    for file in open_files:
-                        if file.path == file_path:
-                            self.process_cache[file_path] = (current_time, proc.info['name'])
-                            return proc.info['name']
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                except Exception:
-                    continue
-        except Exception:
-            pass
-        
-        self._clean_cache()
-        return "Unknown"
-    
-    def _clean_cache(self):
-        current_time = time.time()
-        self.process_cache = {k: v for k, v in self.process_cache.items() 
-                            if current_time - v[0] < self.cache_timeout}
+                self.status_update.emit(f"Daemon connection lost ({e}), retrying...")
+                time.sleep(2)
     
     def stop(self):
         self.running = False
 
-class StorageAnalyzer:
-    def __init__(self):
-        self.changes = []
-        self.mutex = QMutex()
-        self.gaming_sessions = []
-        self.current_gaming_session = None
-        
-    def add_change(self, change):
-        self.mutex.lock()
-        try:
-            self.changes.append(change)
-            if len(self.changes) > 500:
-                self.changes = self.changes[-500:]
-            
-            # Add to current gaming session if active
-            if self.current_gaming_session:
-                self.current_gaming_session.add_change(change)
-        finally:
-            self.mutex.unlock()
+class ExportWorker(QThread):
+    export_finished = pyqtSignal(str)
     
-    def start_gaming_session(self):
-        self.current_gaming_session = GamingSession(datetime.now())
-        # Take snapshot of current state
-        self.current_gaming_session.start_snapshot = self.get_current_storage_state()
-    
-    def end_gaming_session(self):
-        if self.current_gaming_session:
-            self.current_gaming_session.end_time = datetime.now()
-            self.current_gaming_session.end_snapshot = self.get_current_storage_state()
-            self.gaming_sessions.append(self.current_gaming_session)
-            return self.current_gaming_session
-        return None
+    def __init__(self, journal, path):
+        super().__init__()
+        self.journal = journal
+        self.path = path
+        
+    def run(self):
+        try:
+            start = time.time()
+            count = export_changes(self.journal, self.path)
+            self.export_finished.emit(
+                f"Exported {count:,} changes to {self.path} in {time.time() - start:.1f}s"
+            )
+        except (ExportError, OSError) as e:
+            self.export_finished.emit(f"Export failed: {e}")
+
+class DuplicateWorker(QThread):
+    """Runs the duplicate finder over the index, or asks the attached daemon"""
+    duplicates_found = pyqtSignal(object)
     
-    def get_current_storage_state(self):
-        state = {}
-        for directory in [
-            os.path.expanduser("~\\AppData\\Local\\Temp"),
-            os.path.expanduser("~\\AppData\\Roaming"),
-            os.path.expanduser("~\\Downloads"),
-            os.path.expanduser("~\\Desktop"),
-            "C:\\Windows\\Temp"
-        ]:
-            if os.path.exists(directory):
-                try:
-                    total_size = 0
-                    for root, dirs, files in os.walk(directory):
-                        for file in files:
-                            try:
-                                file_path = os.path.join(root, file)
-                                if os.path.exists(file_path):
-                                    total_size += os.path.getsize(file_path)
-                            except (OSError, PermissionError):
-                                continue
-                    state[directory] = total_size
-                except (OSError, PermissionError):
-                    continue
-        return state
+    def __init__(self, finder, file_index, daemon_url=None):
+        super().__init__()
+        self.finder = finder
+        self.file_index = file_index
+        self.daemon_url = daemon_url
+        
+    def run(self):
+        try:
+            if self.daemon_url:
+                with urlopen(f"{self.daemon_url.rstrip('/')}/duplicates?count=50", timeout=3600) as response:
+                    report = json.loads(response.read().decode("utf-8"))
+            else:
+                report = self.finder.report(self.file_index.over(self.finder.min_size))
+        except Exception as e:
+            report = {'error': str(e)}
+        self.duplicates_found.emit(report)
+
+class DirectoryTreeWorker(QThread):
+    """Builds the directory size tree from the scanner's files, or the attached daemon's index"""
+    tree_loaded = pyqtSignal(object)
     
-    def get_recent_changes(self, minutes=10):
-        self.mutex.lock()
+    def __init__(self, scanner=None, daemon_url=None):
+        super().__init__()
+        self.scanner = scanner
+        self.daemon_url = daemon_url
+        
+    def run(self):
         try:
-            cutoff_time = datetime.now() - timedelta(minutes=minutes)
-            return [change for change in self.changes if change.timestamp > cutoff_time]
-        finally:
-            self.mutex.unlock()
+            if self.daemon_url:
+                # The daemon's index only holds files over 1 MB
+                url = f"{self.daemon_url.rstrip('/')}/files/largest?min_mb=0&count=200000"
+                with urlopen(url, timeout=60) as response:
+                    files = [(item['path'], item['size'])
+                             for item in json.loads(response.read().decode("utf-8"))]
+            else:
+                files = self.scanner.files() if self.scanner is not None else []
+            tree = DirectoryTree.from_files(files)
+        except Exception as e:
+            print(f"Error building directory tree: {e}")
+            tree = DirectoryTree()
+        self.tree_loaded.emit(tree)
+
+class ReclaimWorker(QThread):
+    """Plans a temp/cache cleanup, or carries out a plan, locally or on the attached daemon.
+
+    With a daemon, plan is the id of the daemon's dry run, so only the files
+    the user confirmed are deleted.
+    """
+    planned = pyqtSignal(object, object)
+    progress = pyqtSignal(object)
+    finished_reclaim = pyqtSignal(object)
     
-    def get_largest_changes(self, count=10):
-        self.mutex.lock()
+    def __init__(self, planner, scanner=None, daemon_url=None, plan=None, execute=False, token=None):
+        super().__init__()
+        self.planner = planner
+        self.scanner = scanner
+        self.daemon_url = daemon_url
+        self.plan = plan
+        self.execute = execute
+        self.token = token
+        
+    def run(self):
+        if self.execute:
+            self.run_execute()
+        else:
+            self.run_plan()
+    
+    def run_plan(self):
+        plan = None
         try:
-            return sorted(self.changes, key=lambda x: abs(x.size_change), reverse=True)[:count]
-        finally:
-            self.mutex.unlock()
+            if self.daemon_url:
+                request = Request(f"{self.daemon_url.rstrip('/')}/reclaim/plan?count=50", b"{}",
+                                  {"Content-Type": "application/json", DAEMON_TOKEN_HEADER: self.token or ""},
+                                  method="POST")
+                with urlopen(request, timeout=600) as response:
+                    report = json.loads(response.read().decode("utf-8"))
+                plan = report.get('plan_id')
+            else:
+                plan = self.planner.plan(self.scanner.files() if self.scanner is not None else [])
+                report = plan.to_dict(50)
+        except Exception as e:
+            report = {'error': str(e)}
+        self.planned.emit(report, plan)
     
-    def clear_changes(self):
-        self.mutex.lock()
+    def run_execute(self):
         try:
-            self.changes.clear()
-        finally:
-            self.mutex.unlock()
+            if self.daemon_url:
+                request = Request(f"{self.daemon_url.rstrip('/')}/reclaim",
+                                  json.dumps({'plan_id': self.plan}).encode("utf-8"),
+                                  {"Content-Type": "application/json", DAEMON_TOKEN_HEADER: self.token or ""},
+                                  method="POST")
+                with urlopen(request, timeout=600) as response:
+                    result = json.loads(response.read().decode("utf-8"))
+                result['remote'] = True
+            else:
+                result = self.planner.execute(self.plan, self.progress.emit)
+        except Exception as e:
+            result = {'error': str(e)}
+        self.finished_reclaim.emit(result)
 
 class DarkModeStyle:
     @staticmethod
@@ -539,10 +591,77 @@ class DarkModeStyle:
         """
 
 class StableStorageMonitor(QMainWindow):
-    def __init__(self):
+    anomaly_detected = pyqtSignal(object)
+    alert_raised = pyqtSignal(object)
+    
+    def __init__(self, chart_backend=None):
         super().__init__()
-        self.analyzer = StorageAnalyzer()
+        try:
+            self.config = load_config()
+        except ConfigError as e:
+            print(f"Error loading config, using defaults: {e}")
+            self.config = MonitorConfig()
+        # The chart widget (and matplotlib or pyqtgraph, if chosen) is only created when the tab is opened
+        self.chart_backend = chart_backend or self.config.section("charts").get("backend", DEFAULT_BACKEND)
+        self.chart = None
+        self.analyzer = StorageAnalyzer(self.config)
+        # Kept current by the scanner, so the largest files view never walks the disk
+        self.file_index = LargestFilesIndex()
+        self.io_sampler = None
         self.monitor = None
+        # Monitor threads publish here; the UI drains a bounded buffer on a timer
+        # instead of receiving one queued Qt signal per change
+        self.change_bus = ChangeBus()
+        self.change_subscription = self.change_bus.subscribe("gui", maxsize=5000, policy=COALESCE)
+        # Watches the change stream for runaway growth and reports it in the status bar
+        self.growth_detector = GrowthDetector.from_config(self.config)
+        if self.growth_detector is not None:
+            self.anomaly_detected.connect(self.on_anomaly)
+            self.growth_detector.add_callback(self.anomaly_detected.emit)
+            self.growth_detector.start(self.change_bus)
+        # Threshold rules from the config file; alerts also go to the status bar
+        self.alert_engine = AlertEngine.from_config(self.config)
+        if self.alert_engine is not None:
+            self.alert_raised.connect(self.on_alert)
+            self.alert_engine.add_sink(CallbackSink(self.alert_raised.emit))
+            self.alert_engine.start(self.change_bus)
+        self.daemon_url = os.environ.get("STORAGE_MONITOR_DAEMON")
+        if "--attach" in sys.argv[1:-1]:
+            self.daemon_url = sys.argv[sys.argv.index("--attach") + 1]
+        # Change history store; an attached daemon keeps its own journal
+        self.journal = ChangeJournal.from_config(self.config)
+        self.journal_writer = None
+        if self.journal is not None and not self.daemon_url:
+            self.journal_writer = JournalWriter(self.journal, self.change_bus)
+            self.journal_writer.start()
+        self.session_log = SessionLog.from_config(self.config)
+        self.export_worker = None
+        # Everything that reads file contents shares its reader slots and byte budget
+        self.file_reader = LargeFileReader.from_config(self.config)
+        self.duplicate_finder = DuplicateFinder.from_config(self.config, self.file_reader)
+        self.duplicate_worker = None
+        self.reclaim_planner = ReclaimPlanner.from_config(self.config, journal=self.journal)
+        self.reclaim_worker = None
+        # Directory sizes for the treemap, built once and then kept current from the change stream
+        self.size_tree = None
+        self.size_tree_worker = None
+        # Per-process write bytes; an attached daemon samples its own
+        if not self.daemon_url:
+            self.io_sampler = ProcessIOSampler.from_config(self.config)
+            if self.io_sampler is not None:
+                self.io_sampler.start()
+        self.usage_sampler = DiskUsageSampler.from_config(self.config)
+        if self.usage_sampler is not None:
+            self.usage_sampler.start()
+        registry.gauge("queue.gui", lambda: self.change_subscription.lag)
+        if self.journal_writer is not None:
+            registry.gauge("queue.journal", lambda: self.journal_writer.subscription.lag)
+        self.metrics_dumper = MetricsDumper.from_config(registry, self.config)
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.start()
+        self.profiler = SamplingProfiler.from_config(self.config)
+        if self.profiler is not None:
+            self.profiler.start()
         self.dark_mode = True
         self.init_ui()
         self.apply_dark_mode()
@@ -608,6 +727,7 @@ class StableStorageMonitor(QMainWindow):
         realtime_layout.addWidget(self.changes_table)
         
         tabs.addTab(realtime_tab, "📊 Real-time Changes")
+        self.realtime_tab = realtime_tab
         
         # Treemap tab
         treemap_tab = QWidget()
@@ -615,18 +735,25 @@ class StableStorageMonitor(QMainWindow):
         
         treemap_controls = QHBoxLayout()
         self.treemap_refresh_btn = QPushButton("Refresh Treemap")
-        self.treemap_refresh_btn.clicked.connect(self.update_treemap)
+        self.treemap_refresh_btn.clicked.connect(self.refresh_treemap)
         treemap_controls.addWidget(self.treemap_refresh_btn)
         
         self.treemap_type_combo = QComboBox()
-        self.treemap_type_combo.addItems(["Largest Files", "Recent Changes", "By Process"])
+        self.treemap_type_combo.addItems(["Largest Files", "By Directory", "Recent Changes", "By Process"])
         self.treemap_type_combo.currentTextChanged.connect(self.update_treemap)
         treemap_controls.addWidget(QLabel("View:"))
         treemap_controls.addWidget(self.treemap_type_combo)
         
+        self.treemap_up_btn = QPushButton("⬆ Up")
+        self.treemap_up_btn.clicked.connect(lambda: self.treemap_widget.zoom_out())
+        treemap_controls.addWidget(self.treemap_up_btn)
+        self.treemap_path_label = QLabel("")
+        treemap_controls.addWidget(self.treemap_path_label, 1)
+        
         treemap_layout.addLayout(treemap_controls)
         
         self.treemap_widget = SimpleTreemapWidget()
+        self.treemap_widget.zoomed.connect(self.treemap_path_label.setText)
         treemap_layout.addWidget(self.treemap_widget)
         
         tabs.addTab(treemap_tab, "🗺️ Storage Treemap")
@@ -649,6 +776,18 @@ class StableStorageMonitor(QMainWindow):
         self.clear_btn.clicked.connect(self.clear_history)
         analysis_controls.addWidget(self.clear_btn)
         
+        self.export_btn = QPushButton("Export History")
+        self.export_btn.clicked.connect(self.export_history)
+        analysis_controls.addWidget(self.export_btn)
+        
+        self.duplicates_btn = QPushButton("Find Duplicates")
+        self.duplicates_btn.clicked.connect(self.find_duplicates)
+        analysis_controls.addWidget(self.duplicates_btn)
+        
+        self.reclaim_btn = QPushButton("Reclaim Space")
+        self.reclaim_btn.clicked.connect(self.plan_reclaim)
+        analysis_controls.addWidget(self.reclaim_btn)
+        
         analysis_layout.addLayout(analysis_controls)
         
         # Analysis results
@@ -677,16 +816,56 @@ class StableStorageMonitor(QMainWindow):
         overview_layout.addWidget(self.overview_text)
         
         tabs.addTab(overview_tab, "💾 Storage Overview")
-        
-        # Set up timer for periodic updates
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_overview)
-        self.update_timer.start(15000)  # Update every 15 seconds
-        
-        # Set up timer for table updates
-        self.table_timer = QTimer()
-        self.table_timer.timeout.connect(self.update_changes_table)
-        self.table_timer.start(3000)  # Update table every 3 seconds
+        self.overview_tab = overview_tab
+        
+        # Charts tab
+        charts_tab = QWidget()
+        self.charts_layout = QVBoxLayout(charts_tab)
+        
+        chart_controls = QHBoxLayout()
+        self.chart_view_combo = QComboBox()
+        self.chart_view_combo.addItems(["Used space", "Growth by root", "Growth by process",
+                                        "Growth by extension"])
+        self.chart_view_combo.currentTextChanged.connect(lambda text: self.update_charts())
+        chart_controls.addWidget(QLabel("Show:"))
+        chart_controls.addWidget(self.chart_view_combo)
+        self.chart_range_combo = QComboBox()
+        self.chart_range_combo.addItems(["Last hour", "Last day", "Last week", "Last year"])
+        self.chart_range_combo.currentTextChanged.connect(lambda text: self.update_charts())
+        chart_controls.addWidget(QLabel("Range:"))
+        chart_controls.addWidget(self.chart_range_combo)
+        chart_controls.addStretch()
+        self.charts_layout.addLayout(chart_controls)
+        
+        tabs.addTab(charts_tab, "📉 Charts")
+        self.charts_tab = charts_tab
+        
+        # Performance tab
+        performance_tab = QWidget()
+        performance_layout = QVBoxLayout(performance_tab)
+        
+        self.performance_text = QTextEdit()
+        self.performance_text.setReadOnly(True)
+        self.performance_text.setFont(QFont("Consolas", 9))
+        performance_layout.addWidget(self.performance_text)
+        
+        tabs.addTab(performance_tab, "⏱️ Performance")
+        self.tabs = tabs
+        self.performance_tab = performance_tab
+        
+        # Set up timer to move published changes into the analyzer
+        self.drain_timer = QTimer()
+        self.drain_timer.timeout.connect(self.drain_changes)
+        self.drain_timer.start(250)
+        
+        # Views refresh when their tab is showing and, for the table, only when changes arrived
+        self.refresh_scheduler = RefreshScheduler(tabs)
+        self.refresh_scheduler.add_view(self.update_changes_table, self.realtime_tab,
+                                        lambda: self.analyzer.version, interval=3)
+        self.refresh_scheduler.add_view(self.update_overview, self.overview_tab, interval=15)
+        self.refresh_scheduler.add_view(self.update_performance, self.performance_tab, interval=2)
+        self.refresh_scheduler.add_view(self.update_charts, self.charts_tab, interval=5)
+        self.refresh_scheduler.schedule()
         
     def apply_dark_mode(self):
         if self.dark_mode:
@@ -699,16 +878,44 @@ class StableStorageMonitor(QMainWindow):
         self.apply_dark_mode()
         
     def start_monitoring(self):
-        self.monitor = LightweightStorageMonitor()
-        self.monitor.change_detected.connect(self.on_storage_change)
+        if self.daemon_url:
+            last_seen = self.analyzer.changes[-1].timestamp if self.analyzer.changes else None
+            self.monitor = RemoteStorageMonitor(self.daemon_url, self.change_bus, since=last_seen)
+        else:
+            self.monitor = LightweightStorageMonitor(self.change_bus, self.config, self.file_index,
+                                                     self.io_sampler)
         self.monitor.status_update.connect(self.on_status_update)
+        self.monitor.config_reloaded.connect(self.on_config_reloaded)
         self.monitor.start()
         
     def on_storage_change(self, change):
         self.analyzer.add_change(change)
+        if self.size_tree is not None:
+            self.size_tree.apply(change)
+    
+    @registry.timed("ui.drain_changes")
+    def drain_changes(self):
+        changes = self.change_subscription.get_batch(2000)
+        for change in changes:
+            self.on_storage_change(change)
+        if changes:
+            self.refresh_scheduler.mark()
+        if self.size_tree is not None:
+            # One batch of deltas for the treemap per drain
+            self.size_tree.flush()
+    
+    def on_config_reloaded(self, config):
+        self.config = config
+        self.analyzer.config = config
         
     def on_status_update(self, status):
         self.status_label.setText(status)
+    
+    def on_anomaly(self, anomaly):
+        self.status_label.setText(f"⚠️ {anomaly.describe()}")
+    
+    def on_alert(self, alert):
+        self.status_label.setText(f"🔔 {alert.rule}: {alert.message}")
         
     def start_gaming_session(self):
         self.analyzer.start_gaming_session()
@@ -732,6 +939,11 @@ class StableStorageMonitor(QMainWindow):
         self.end_gaming_btn.setEnabled(False)
         
         if session:
+            if self.session_log is not None:
+                try:
+                    self.session_log.append(session)
+                except OSError as e:
+                    print(f"Error saving gaming session: {e}")
             self.show_gaming_analysis(session)
             self.update_gaming_sessions()
         
@@ -809,6 +1021,8 @@ class StableStorageMonitor(QMainWindow):
             
             if view_type == "Largest Files":
                 self.update_treemap_largest_files()
+            elif view_type == "By Directory":
+                self.update_treemap_by_directory()
             elif view_type == "Recent Changes":
                 self.update_treemap_recent_changes()
             elif view_type == "By Process":
@@ -818,40 +1032,47 @@ class StableStorageMonitor(QMainWindow):
     
     def update_treemap_largest_files(self):
         try:
-            # Get largest files in monitored directories
-            large_files = []
-            for directory in [
-                os.path.expanduser("~\\Downloads"),
-                os.path.expanduser("~\\Desktop"),
-                os.path.expanduser("~\\Documents"),
-                os.path.expanduser("~\\AppData\\Local"),
-                "C:\\Windows\\Temp"
-            ]:
-                if os.path.exists(directory):
-                    try:
-                        for root, dirs, files in os.walk(directory):
-                            for file in files:
-                                try:
-                                    file_path = os.path.join(root, file)
-                                    if os.path.exists(file_path):
-                                        size = os.path.getsize(file_path)
-                                        if size > 1024*1024:  # Files larger than 1MB
-                                            large_files.append({
-                                                'name': os.path.basename(file_path),
-                                                'size': size,
-                                                'path': file_path
-                                            })
-                                except (OSError, PermissionError):
-                                    continue
-                    except (OSError, PermissionError):
-                        continue
+            # Largest files in monitored directories, from the index
+            if self.daemon_url:
+                url = f"{self.daemon_url.rstrip('/')}/files/largest?count={LARGEST_FILES_SHOWN}"
+                with urlopen(url, timeout=10) as response:
+                    largest = [(item['path'], item['size'])
+                               for item in json.loads(response.read().decode("utf-8"))]
+            else:
+                largest = self.file_index.top(LARGEST_FILES_SHOWN)
             
-            # Sort by size and take top 20
-            large_files.sort(key=lambda x: x['size'], reverse=True)
-            self.treemap_widget.update_data(large_files[:20])
+            large_files = [{
+                'name': os.path.basename(file_path),
+                'size': size,
+                'path': file_path
+            } for file_path, size in largest]
+            self.treemap_widget.update_data(large_files)
         except Exception as e:
             print(f"Error updating largest files treemap: {e}")
     
+    def refresh_treemap(self):
+        if self.treemap_type_combo.currentText() == "By Directory":
+            # Rebuild from the scanner in case changes were dropped while the GUI was busy
+            self.size_tree = None
+        self.update_treemap()
+    
+    def update_treemap_by_directory(self):
+        if self.size_tree is not None:
+            # Already current; deltas from drain_changes keep it that way
+            self.treemap_widget.set_tree(self.size_tree)
+            return
+        if self.size_tree_worker is not None and self.size_tree_worker.isRunning():
+            return
+        scanner = self.monitor.scanner if isinstance(self.monitor, LightweightStorageMonitor) else None
+        self.size_tree_worker = DirectoryTreeWorker(scanner, self.daemon_url)
+        self.size_tree_worker.tree_loaded.connect(self.on_size_tree_loaded)
+        self.size_tree_worker.start()
+    
+    def on_size_tree_loaded(self, tree):
+        self.size_tree = tree
+        if self.treemap_type_combo.currentText() == "By Directory":
+            self.treemap_widget.set_tree(tree)
+    
     def update_treemap_recent_changes(self):
         try:
             recent_changes = self.analyzer.get_recent_changes(30)  # Last 30 minutes
@@ -877,20 +1098,23 @@ class StableStorageMonitor(QMainWindow):
                         'path': directory
                     })
             
-            self.treemap_widget.update_data(treemap_data[:20])
+            self.treemap_widget.update_data(treemap_data)
         except Exception as e:
             print(f"Error updating recent changes treemap: {e}")
     
     def update_treemap_by_process(self):
         try:
-            recent_changes = self.analyzer.get_recent_changes(30)  # Last 30 minutes
-            
-            # Group by process
-            process_sizes = {}
-            for change in recent_changes:
-                if change.process_name not in process_sizes:
-                    process_sizes[change.process_name] = 0
-                process_sizes[change.process_name] += abs(change.size_change)
+            process_sizes = self.get_process_writes(30 * 60)
+            if not process_sizes:
+                # No I/O counters; fall back to the changes we could attribute
+                recent_changes = self.analyzer.get_recent_changes(30)  # Last 30 minutes
+                
+                # Group by process
+                process_sizes = {}
+                for change in recent_changes:
+                    if change.process_name not in process_sizes:
+                        process_sizes[change.process_name] = 0
+                    process_sizes[change.process_name] += abs(change.size_change)
             
             # Convert to treemap data
             treemap_data = []
@@ -902,10 +1126,25 @@ class StableStorageMonitor(QMainWindow):
                         'path': process
                     })
             
-            self.treemap_widget.update_data(treemap_data[:20])
+            self.treemap_widget.update_data(treemap_data)
         except Exception as e:
             print(f"Error updating process treemap: {e}")
-        
+    
+    def get_process_writes(self, seconds):
+        """Bytes written per process, from the local sampler or the attached daemon"""
+        if self.daemon_url:
+            try:
+                url = f"{self.daemon_url.rstrip('/')}/processes/io?seconds={seconds}&count=50"
+                with urlopen(url, timeout=10) as response:
+                    return {item['process']: item['bytes_written']
+                            for item in json.loads(response.read().decode("utf-8"))}
+            except Exception:
+                return {}
+        if self.io_sampler is None:
+            return {}
+        return self.io_sampler.written(seconds)
+        
+    @registry.timed("ui.changes_table")
     def update_changes_table(self):
         try:
             recent_changes = self.analyzer.get_recent_changes(30)  # Last 30 minutes
@@ -934,6 +1173,118 @@ class StableStorageMonitor(QMainWindow):
         except Exception as e:
             print(f"Error updating table: {e}")
     
+    def export_history(self):
+        if self.journal is None:
+            QMessageBox.information(self, "Export", "The change journal is disabled in the config file.")
+            return
+        if self.export_worker is not None and self.export_worker.isRunning():
+            return
+        
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Change History", "storage_changes.csv",
+            "CSV (*.csv);;JSON Lines (*.jsonl);;Parquet (*.parquet)"
+        )
+        if not path:
+            return
+        
+        self.status_label.setText(f"Exporting change history to {path}...")
+        self.export_worker = ExportWorker(self.journal, path)
+        self.export_worker.export_finished.connect(self.status_label.setText)
+        self.export_worker.start()
+    
+    def find_duplicates(self):
+        if self.duplicate_worker is not None and self.duplicate_worker.isRunning():
+            return
+        self.duplicates_btn.setEnabled(False)
+        self.analysis_text.setText("Looking for duplicate files...")
+        self.duplicate_worker = DuplicateWorker(self.duplicate_finder, self.file_index, self.daemon_url)
+        self.duplicate_worker.duplicates_found.connect(self.show_duplicates)
+        self.duplicate_worker.start()
+    
+    def show_duplicates(self, report):
+        self.duplicates_btn.setEnabled(True)
+        if 'error' in report:
+            self.analysis_text.setText(f"Error finding duplicates: {report['error']}")
+            return
+        stats = report['stats']
+        analysis = "=== Duplicate Files ===\n\n"
+        analysis += (f"{report['group_count']:,} sets of identical files, "
+                     f"{report['wasted']/(1024*1024):,.1f} MB could be freed\n")
+        analysis += (f"Compared {stats.get('same_size', 0):,} of {stats.get('files', 0):,} indexed files "
+                     f"in {stats.get('seconds', 0):.1f}s ({stats.get('cache_hits', 0):,} hashes cached)\n")
+        for i, group in enumerate(report['groups'], 1):
+            analysis += (f"\n{i}. {len(group['paths'])} copies of {group['size']/(1024*1024):,.1f} MB "
+                         f"({group['wasted']/(1024*1024):,.1f} MB wasted)\n")
+            for path in group['paths']:
+                analysis += f"   {path}\n"
+        self.analysis_text.setText(analysis)
+    
+    def plan_reclaim(self):
+        if self.reclaim_worker is not None and self.reclaim_worker.isRunning():
+            return
+        scanner = None
+        if isinstance(self.monitor, LightweightStorageMonitor):
+            # The scanner's resolver knows which process last wrote each file
+            scanner = self.monitor.scanner
+            self.reclaim_planner.resolver = scanner.resolver
+        self.reclaim_btn.setEnabled(False)
+        self.analysis_text.setText("Looking for temp and cache files to clean up...")
+        token = daemon_token(self.config.section("daemon")) if self.daemon_url else None
+        self.reclaim_worker = ReclaimWorker(self.reclaim_planner, scanner, self.daemon_url, token=token)
+        self.reclaim_worker.planned.connect(self.confirm_reclaim)
+        self.reclaim_worker.start()
+    
+    def confirm_reclaim(self, report, plan):
+        self.reclaim_btn.setEnabled(True)
+        if 'error' in report:
+            self.analysis_text.setText(f"Error planning cleanup: {report['error']}")
+            return
+        analysis = "=== Reclaimable Space (dry run) ===\n\n"
+        analysis += (f"{report['files']:,} temp/cache files, "
+                     f"{report['reclaimable']/(1024*1024):,.1f} MB could be freed\n")
+        analysis += (f"Left alone: {report['too_new']['files']:,} recent files "
+                     f"({report['too_new']['bytes']/(1024*1024):,.1f} MB), "
+                     f"{report['in_use']['files']:,} files of running programs "
+                     f"({report['in_use']['bytes']/(1024*1024):,.1f} MB)\n\n")
+        for candidate in report['candidates']:
+            age_days = (time.time() - candidate['mtime']) / 86400
+            writer = f" [{candidate['writer']}]" if candidate['writer'] else ""
+            analysis += (f"{candidate['size']/(1024*1024):10,.1f} MB  {age_days:5.0f}d  "
+                         f"{candidate['path']}{writer}\n")
+        self.analysis_text.setText(analysis)
+        if not report['files']:
+            return
+        answer = QMessageBox.question(
+            self, "Reclaim Space",
+            f"Delete {report['files']:,} files and free {report['reclaimable']/(1024*1024):,.1f} MB?\n\n"
+            "Files changed since the dry run are skipped.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            return
+        self.reclaim_btn.setEnabled(False)
+        token = daemon_token(self.config.section("daemon")) if self.daemon_url else None
+        self.reclaim_worker = ReclaimWorker(self.reclaim_planner, daemon_url=self.daemon_url,
+                                            plan=plan, execute=True, token=token)
+        self.reclaim_worker.progress.connect(self.on_reclaim_progress)
+        self.reclaim_worker.finished_reclaim.connect(self.on_reclaim_finished)
+        self.reclaim_worker.start()
+    
+    def on_reclaim_progress(self, result):
+        self.status_label.setText(f"🧹 Reclaiming space: {result['deleted']:,} files, "
+                                  f"{result['freed']/(1024*1024):,.1f} MB freed")
+    
+    def on_reclaim_finished(self, result):
+        self.reclaim_btn.setEnabled(True)
+        if 'error' in result:
+            self.status_label.setText(f"Error reclaiming space: {result['error']}")
+        elif result.get('remote'):
+            self.status_label.setText(f"🧹 Daemon is deleting {result['files']:,} files "
+                                      f"({result['reclaimable']/(1024*1024):,.1f} MB)")
+        else:
+            self.status_label.setText(
+                f"🧹 Freed {result['freed']/(1024*1024):,.1f} MB from {result['deleted']:,} files"
+                f" ({result['skipped']:,} skipped, {result['failed']:,} failed)")
+    
     def clear_history(self):
         self.analyzer.clear_changes()
         self.update_changes_table()
@@ -972,6 +1323,13 @@ class StableStorageMonitor(QMainWindow):
                     for change in changes[:5]:  # Show first 5 files per process
                         analysis += f"    {change.path} ({change.size_change:+,} bytes)\n"
             
+            # Write rates come from I/O counters, so they include files we couldn't match
+            writers = sorted(self.get_process_writes(10 * 60).items(), key=lambda x: x[1], reverse=True)
+            if writers:
+                analysis += "\n=== Disk Writes by Process (Last 10 minutes) ===\n"
+                for process, written in writers[:10]:
+                    analysis += f"  {process}: {written/(1024*1024):,.1f} MB written\n"
+            
             self.analysis_text.setText(analysis)
         except Exception as e:
             self.analysis_text.setText(f"Error in analysis: {e}")
@@ -1003,7 +1361,8 @@ class StableStorageMonitor(QMainWindow):
     def update_overview(self):
         try:
             # Get disk usage
-            disk_usage = psutil.disk_usage("C:\\")
+            volume = self.usage_sampler.volumes[0] if self.usage_sampler else system_volume()
+            disk_usage = psutil.disk_usage(volume)
             total_gb = disk_usage.total / (1024**3)
             used_gb = disk_usage.used / (1024**3)
             free_gb = disk_usage.free / (1024**3)
@@ -1014,41 +1373,112 @@ class StableStorageMonitor(QMainWindow):
             overview += f"Used Space: {used_gb:.1f} GB ({usage_percent:.1f}%)\n"
             overview += f"Free Space: {free_gb:.1f} GB\n\n"
             
+            history = self.usage_sampler.history(volume) if self.usage_sampler else None
+            if history is not None:
+                overview += "=== Usage Trend ===\n"
+                for label, seconds in (("Last hour", 3600), ("Last day", 86400), ("Last week", 7 * 86400)):
+                    rate = history.growth_rate(seconds)
+                    if rate is not None:
+                        overview += f"{label}: {rate * 3600 / (1024**2):+,.1f} MB/hour\n"
+                overview += f"Full in: {format_duration(history.time_to_full())}\n\n"
+            
             # Monitored directories
             overview += "=== Monitored Directories ===\n"
-            monitored_dirs = [
-                os.path.expanduser("~\\AppData\\Local\\Temp"),
-                os.path.expanduser("~\\AppData\\Roaming"),
-                os.path.expanduser("~\\Downloads"),
-                os.path.expanduser("~\\Desktop"),
-                "C:\\Windows\\Temp",
-                "C:\\Users\\Public\\Downloads"
-            ]
+            if self.config.source:
+                overview += f"Config: {self.config.source}\n"
             
-            for directory in monitored_dirs:
-                if os.path.exists(directory):
-                    try:
-                        file_count = sum(len(files) for _, _, files in os.walk(directory))
-                        overview += f"{directory}: {file_count} files\n"
-                    except Exception:
-                        overview += f"{directory}: Access denied\n"
+            # The scanners already hold every polled file; walking the roots here would block the UI
+            counts = {}
+            if isinstance(self.monitor, LightweightStorageMonitor):
+                counts = self.monitor.scanner.root_file_counts()
+            for root in self.config.poll_roots:
+                if root.key in counts:
+                    overview += f"{root.path}: {counts[root.key]} files (every {root.interval:g}s)\n"
+                elif self.daemon_url:
+                    overview += f"{root.path}: scanned by the daemon (every {root.interval:g}s)\n"
+                elif os.path.exists(root.path):
+                    overview += f"{root.path}: not scanned yet (every {root.interval:g}s)\n"
+                else:
+                    overview += f"{root.path}: not found\n"
             
             self.overview_text.setText(overview)
             
         except Exception as e:
             self.overview_text.setText(f"Error updating overview: {e}")
     
+    def chart_seconds(self):
+        return {"Last hour": 3600, "Last day": 86400, "Last week": 7 * 86400,
+                "Last year": 365 * 86400}[self.chart_range_combo.currentText()]
+    
+    def update_charts(self):
+        try:
+            if self.chart is None:
+                self.chart = create_chart(self.chart_backend)
+                self.charts_layout.addWidget(self.chart, 1)
+            view = self.chart_view_combo.currentText()
+            end = time.time()
+            start = end - self.chart_seconds()
+            width = self.chart.plot_width()
+            series = []
+            if view != "Used space":
+                # Pre-aggregated buckets from the analyzer, one line per root/process/extension
+                dimension = {"Growth by root": "roots", "Growth by process": "processes",
+                             "Growth by extension": "extensions"}[view]
+                if self.analyzer.growth is not None:
+                    lines = self.analyzer.growth.chart(dimension, start, end, columns=width)
+                    series = [ChartSeries(key, points) for key, points in lines.items()]
+            elif self.usage_sampler is not None:
+                for volume in self.usage_sampler.volumes:
+                    series.append(ChartSeries(volume, self.usage_sampler.history(volume).range(
+                        start, end, columns=width)))
+            self.chart.plot(series, f"{view}, {self.chart_range_combo.currentText().lower()}")
+        except Exception as e:
+            print(f"Error updating charts: {e}")
+    
+    def update_performance(self):
+        try:
+            self.performance_text.setPlainText("\n".join(registry.format_lines()))
+        except Exception as e:
+            self.performance_text.setText(f"Error updating performance stats: {e}")
+    
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            minimized = self.isMinimized()
+            self.refresh_scheduler.set_paused(minimized)
+            # Changes still go into the history while minimized, in fewer, larger batches
+            self.drain_timer.setInterval(2000 if minimized else 250)
+        super().changeEvent(event)
+    
     def closeEvent(self, event):
+        if self.reclaim_worker is not None and self.reclaim_worker.isRunning():
+            self.reclaim_planner.cancel()
+            self.reclaim_worker.wait(3000)
+        if self.growth_detector is not None:
+            self.growth_detector.stop()
+        if self.analyzer.growth is not None:
+            self.analyzer.growth.save()
+        if self.alert_engine is not None:
+            self.alert_engine.stop()
+        if self.io_sampler is not None:
+            self.io_sampler.stop()
+        if self.usage_sampler is not None:
+            self.usage_sampler.stop()
         if self.monitor:
             self.monitor.stop()
             self.monitor.wait(3000)  # Wait up to 3 seconds
+        if self.journal_writer is not None:
+            self.journal_writer.stop()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
         event.accept()
 
-def main():
+def main(chart_backend=None):
     app = QApplication(sys.argv)
     app.setApplicationName("Stable Storage Monitor")
     
-    window = StableStorageMonitor()
+    window = StableStorageMonitor(chart_backend)
     window.show()
     
     sys.exit(app.exec_())
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import threading
+import collections
+from datetime import datetime
+
+from storage_config import data_dir
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_DURATION = 60
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack for a bounded window.
+
+    Off unless enabled in the config ("profiler": {"enabled": true}) or with
+    STORAGE_MONITOR_PROFILE=<seconds>, so a normal run pays nothing. Stacks
+    are written in collapsed format ("thread;outer;...;inner count"), which
+    flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, path=None, duration=DEFAULT_DURATION, interval=DEFAULT_INTERVAL):
+        if path is None:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(data_dir(), f"profile-{stamp}.folded")
+        self.path = path
+        self.duration = duration
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("profiler")
+        duration = os.environ.get("STORAGE_MONITOR_PROFILE")
+        if duration:
+            duration = float(duration)
+        elif settings.get("enabled"):
+            duration = settings.get("duration", DEFAULT_DURATION)
+        else:
+            return None
+        return cls(settings.get("path"), duration,
+                   settings.get("interval_ms", DEFAULT_INTERVAL * 1000) / 1000)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        own_id = threading.get_ident()
+        end = time.time() + self.duration
+        while self.running and time.time() < end:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        self.running = False
+        self.write()
+
+    def write(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            print(f"Profile of {self.samples} samples written to {self.path}")
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+
+    def stop(self):
+        """End the window early; the profile is still written"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(self.interval * 10 + 1)
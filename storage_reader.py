@@ -0,0 +1,99 @@
+import os
+import mmap
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from storage_metrics import registry
+from storage_volumes import IOBudget
+
+DEFAULT_CHUNK = 8 * 1024 * 1024
+
+
+class LargeFileReader:
+    """Shared way in to file contents for the analysis features.
+
+    Files are memory-mapped and handed out as memoryview slices, so hashing
+    a multi-GB file never copies it through Python buffers. At most
+    max_readers files are open at once and reads are charged to a bytes per
+    second budget (0 for unlimited). Pages already read are released as the
+    reader moves on, which keeps RSS at about one chunk per reader, and
+    files over max_cached_bytes are dropped from the page cache afterwards
+    (where the OS supports it) so a scan doesn't push out the games' data.
+    """
+
+    def __init__(self, max_readers=2, bytes_per_second=0, chunk=DEFAULT_CHUNK,
+                 max_cached_bytes=64 * 1024 * 1024):
+        self.slots = threading.BoundedSemaphore(max_readers)
+        self.budget = IOBudget(bytes_per_second, max(bytes_per_second, chunk)) if bytes_per_second else None
+        self.chunk = chunk - chunk % mmap.PAGESIZE or mmap.PAGESIZE
+        self.max_cached_bytes = max_cached_bytes
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("reader")
+        return cls(settings.get("max_readers", 2),
+                   int(settings.get("mb_per_second", 0) * 1024 * 1024),
+                   int(settings.get("chunk_mb", DEFAULT_CHUNK // (1024 * 1024)) * 1024 * 1024))
+
+    @contextmanager
+    def open(self, path):
+        """Map path read-only and yield (mapping, memoryview) while holding a reader slot.
+
+        Views sliced from the memoryview must not outlive the with block.
+        """
+        with registry.timer("reader.wait").time():
+            self.slots.acquire()
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    # mmap can't map an empty file
+                    yield None, memoryview(b"")
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if hasattr(mapped, "madvise"):
+                        mapped.madvise(mmap.MADV_SEQUENTIAL)
+                    with memoryview(mapped) as view:
+                        yield mapped, view
+                if size > self.max_cached_bytes and hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            self.slots.release()
+
+    def chunks(self, mapped, view, start=0, end=None):
+        """Yield memoryview slices of view[start:end], charging each to the budget"""
+        end = len(view) if end is None else min(end, len(view))
+        position = start
+        while position < end:
+            stop = min(position + self.chunk, end)
+            if self.budget is not None:
+                self.budget.spend(stop - position)
+            # Released as soon as the caller moves on, so the mapping can close
+            with view[position:stop] as piece:
+                yield piece
+            registry.counter("reader.bytes_read").inc(stop - position)
+            if mapped is not None and hasattr(mapped, "madvise"):
+                # Done with these pages; give them back instead of growing RSS
+                aligned = position - position % mmap.PAGESIZE
+                mapped.madvise(mmap.MADV_DONTNEED, aligned, stop - aligned)
+            position = stop
+
+    def hash(self, path, size=None, block=None, digest_size=16):
+        """blake2b hex digest of a file, or of its first and last block only.
+
+        Raises ValueError if the file no longer has the expected size.
+        """
+        hasher = hashlib.blake2b(digest_size=digest_size)
+        with self.open(path) as (mapped, view):
+            if size is not None and len(view) != size:
+                raise ValueError("file changed size")
+            if block is not None and len(view) > 2 * block:
+                for piece in self.chunks(mapped, view, 0, block):
+                    hasher.update(piece)
+                for piece in self.chunks(mapped, view, len(view) - block):
+                    hasher.update(piece)
+            else:
+                for piece in self.chunks(mapped, view):
+                    hasher.update(piece)
+        return hasher.hexdigest()
@@ -0,0 +1,202 @@
+import os
+import time
+import tempfile
+
+import psutil
+
+from storage_config import expand_path
+from storage_metrics import registry
+from storage_volumes import IOBudget, is_under
+
+
+def default_reclaim_paths():
+    """System temp folders and the browser and system caches under them.
+
+    Only these (and the configured paths) are ever cleaned; a folder that
+    merely happens to be called temp or cache elsewhere is left alone.
+    """
+    paths = {tempfile.gettempdir()}
+    for name in ("TEMP", "TMP"):
+        if os.environ.get(name):
+            paths.add(os.environ[name])
+    if os.name == "nt":
+        windows = os.environ.get("SystemRoot", "C:\\Windows")
+        local = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        paths.update([
+            os.path.join(windows, "Temp"),
+            os.path.join(local, "Microsoft", "Windows", "INetCache"),
+            os.path.join(local, "Google", "Chrome", "User Data", "Default", "Cache"),
+            os.path.join(local, "Google", "Chrome", "User Data", "Default", "Code Cache"),
+            os.path.join(local, "Microsoft", "Edge", "User Data", "Default", "Cache"),
+            os.path.join(local, "Microsoft", "Edge", "User Data", "Default", "Code Cache"),
+            os.path.join(local, "Mozilla", "Firefox", "Profiles"),  # only the cache lives under Local
+            os.path.join(local, "D3DSCache"),
+            os.path.join(local, "CrashDumps"),
+        ])
+    return sorted(paths)
+
+
+class ReclaimCandidate:
+    def __init__(self, path, size, mtime, writer, score):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.writer = writer  # process that last wrote the file, if known
+        self.score = score
+
+    def to_dict(self):
+        return {'path': self.path, 'size': self.size, 'mtime': self.mtime, 'writer': self.writer}
+
+
+class ReclaimPlan:
+    """Files that can be deleted, best first, and what was left out and why"""
+
+    def __init__(self, candidates, too_new, in_use):
+        self.candidates = sorted(candidates, key=lambda candidate: candidate.score, reverse=True)
+        self.reclaimable = sum(candidate.size for candidate in self.candidates)
+        self.too_new = too_new  # [count, bytes] younger than the minimum age
+        self.in_use = in_use  # [count, bytes] last written by a program that is still running
+
+    def to_dict(self, limit=100):
+        return {
+            'files': len(self.candidates),
+            'reclaimable': self.reclaimable,
+            'too_new': {'files': self.too_new[0], 'bytes': self.too_new[1]},
+            'in_use': {'files': self.in_use[0], 'bytes': self.in_use[1]},
+            'candidates': [candidate.to_dict() for candidate in self.candidates[:limit]],
+        }
+
+
+class ReclaimPlanner:
+    """Finds deletable temp and cache files from what the scanner already knows.
+
+    plan() is a dry run over the scanner's (path, size, mtime) entries, so it
+    touches the disk only for files the scanner has no time for. Files
+    under the system temp/cache folders (default_reclaim_paths()) and the
+    configured paths that are older than min_age are ranked by size
+    weighted by age. The program that last wrote each file comes from the
+    journal, which reaches back further than min_age: files of programs
+    that are still running are skipped, and files whose program is no
+    longer running rank higher, since nothing is going to reuse them.
+    execute() deletes a plan in batches with a pause between them and a
+    files per second budget, so a big cleanup doesn't spike disk latency.
+    """
+
+    def __init__(self, min_age=24 * 3600, paths=(), resolver=None, batch_size=100,
+                 batch_pause=0.25, files_per_second=500, journal=None, default_paths=True):
+        self.min_age = max(1, min_age)
+        self.paths = [expand_path(path) for path in paths]
+        if default_paths:
+            self.paths += default_reclaim_paths()
+        self.resolver = resolver
+        self.journal = journal
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.budget = IOBudget(files_per_second) if files_per_second else None
+        self.cancelled = False
+
+    @classmethod
+    def from_config(cls, config, resolver=None, journal=None):
+        settings = config.section("reclaim")
+        return cls(settings.get("min_age_hours", 24) * 3600, settings.get("paths", []), resolver,
+                   settings.get("batch_size", 100), settings.get("batch_pause", 0.25),
+                   settings.get("files_per_second", 500), journal,
+                   settings.get("default_paths", True))
+
+    def is_reclaimable_dir(self, directory):
+        return any(is_under(directory, path) for path in self.paths)
+
+    def last_writers(self, paths):
+        """Program that last changed each of paths, from the journal ({} without one)"""
+        writers = {}
+        if self.journal is None or not paths:
+            return writers
+        try:
+            for record in self.journal.iter_records():
+                path = record.get('path')
+                if path in paths and record.get('process_name') not in (None, "Unknown"):
+                    writers[path] = record['process_name']
+        except OSError as e:
+            print(f"Error reading journal for reclaim: {e}")
+        return writers
+
+    @registry.timed("reclaim.plan")
+    def plan(self, files, now=None):
+        now = now or time.time()
+        running = set()
+        for proc in psutil.process_iter(['name']):
+            running.add(proc.info['name'])
+        old_files = []
+        too_new = [0, 0]
+        in_use = [0, 0]
+        directories = {}  # directory -> reclaimable, since most files share a handful
+        for path, size, mtime in files:
+            if size <= 0:
+                continue
+            directory = os.path.dirname(path)
+            reclaimable = directories.get(directory)
+            if reclaimable is None:
+                reclaimable = directories[directory] = self.is_reclaimable_dir(directory)
+            if not reclaimable:
+                continue
+            if mtime is None:
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+            if now - mtime < self.min_age:
+                too_new[0] += 1
+                too_new[1] += size
+                continue
+            old_files.append((path, size, mtime))
+
+        writers = self.last_writers({path for path, _, _ in old_files})
+        candidates = []
+        for path, size, mtime in old_files:
+            writer = writers.get(path)
+            if writer is None and self.resolver is not None:
+                writer = self.resolver.recent_process(path)
+            if writer is not None and writer in running:
+                in_use[0] += 1
+                in_use[1] += size
+                continue
+            score = size * min((now - mtime) / self.min_age, 10)
+            if writer is not None:
+                score *= 2  # its program is gone, so nothing will reuse it
+            candidates.append(ReclaimCandidate(path, size, mtime, writer, score))
+        return ReclaimPlan(candidates, too_new, in_use)
+
+    def execute(self, plan, on_progress=None):
+        """Delete the plan's files; files changed since the plan are left alone"""
+        self.cancelled = False
+        result = {'deleted': 0, 'freed': 0, 'skipped': 0, 'failed': 0, 'cancelled': False}
+        candidates = plan.candidates
+        for start in range(0, len(candidates), self.batch_size):
+            if self.cancelled:
+                result['cancelled'] = True
+                break
+            for candidate in candidates[start:start + self.batch_size]:
+                if self.budget is not None:
+                    self.budget.spend()
+                try:
+                    stat = os.stat(candidate.path)
+                    if stat.st_size != candidate.size or stat.st_mtime != candidate.mtime:
+                        result['skipped'] += 1
+                        continue
+                    os.remove(candidate.path)
+                    registry.counter("reclaim.deleted").inc()
+                    result['deleted'] += 1
+                    result['freed'] += candidate.size
+                except FileNotFoundError:
+                    result['skipped'] += 1
+                except OSError:
+                    # Locked or no permission
+                    result['failed'] += 1
+            if on_progress is not None:
+                on_progress(result)
+            if start + self.batch_size < len(candidates):
+                time.sleep(self.batch_pause)
+        return result
+
+    def cancel(self):
+        self.cancelled = True
@@ -0,0 +1,424 @@
+import os
+import heapq
+import collections
+
+
+class DirectoryNode:
+    __slots__ = ('path', 'name', 'parent', 'children', 'size', 'own')
+
+    def __init__(self, path, name, parent):
+        self.path = path
+        self.name = name
+        self.parent = parent
+        self.children = {}  # name -> DirectoryNode
+        self.size = 0  # bytes in this directory and everything under it
+        self.own = 0  # bytes in files directly in this directory
+
+
+class DirectoryTree:
+    """Bytes per directory, kept current by applying change deltas.
+
+    Only directories get nodes; files are summed into their directory, so
+    the tree is much smaller than the scan it was built from. Every
+    directory a delta touched, and its ancestors, is collected as dirty
+    until flush() hands the set to the listeners. The tree is owned by one
+    thread (the GUI thread), so it isn't locked.
+    """
+
+    def __init__(self):
+        self.root = DirectoryNode("", "", None)
+        self.directories = {}  # path -> DirectoryNode
+        self.dirty = set()
+        self.listeners = []
+
+    @classmethod
+    def from_files(cls, files):
+        """Tree of (path, size, ...) entries, such as the scanner's files()"""
+        tree = cls()
+        sizes = {}
+        for entry in files:
+            directory = os.path.dirname(entry[0])
+            sizes[directory] = sizes.get(directory, 0) + entry[1]
+        for directory, size in sizes.items():
+            tree.add(directory, size)
+        tree.dirty.clear()
+        return tree
+
+    def node(self, directory, create=False):
+        node = self.directories.get(directory)
+        if node is not None or not create:
+            return node
+        head, name = os.path.split(directory)
+        if not name or head == directory:
+            # Drive or filesystem root
+            parent, name = self.root, directory
+        else:
+            parent = self.node(head, create=True)
+        node = DirectoryNode(directory, name, parent)
+        parent.children[name] = node
+        self.directories[directory] = node
+        return node
+
+    def add(self, directory, delta):
+        node = self.node(directory, create=delta > 0)
+        if node is None or delta == 0:
+            return
+        node.own += delta
+        while node is not None:
+            node.size += delta
+            self.dirty.add(node)
+            parent = node.parent
+            if node.size <= 0 and not node.children and parent is not None:
+                # Emptied; drop it so deleted directories don't pile up
+                del parent.children[node.name]
+                del self.directories[node.path]
+            node = parent
+
+    def apply(self, change):
+        if change.change_type == 'moved' and change.old_path and change.size:
+            moved = change.size - change.size_change
+            self.add(os.path.dirname(change.old_path), -moved)
+            self.add(os.path.dirname(change.path), moved + change.size_change)
+        else:
+            self.add(os.path.dirname(change.path), change.size_change)
+
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def flush(self):
+        """Pass the directories changed since the last flush to every listener"""
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        for callback in self.listeners:
+            callback(dirty)
+
+    def top(self):
+        """The first directory with more than one thing in it, skipping single-child chains"""
+        node = self.root
+        while len(node.children) == 1 and node.own == 0:
+            node = next(iter(node.children.values()))
+        return node
+
+
+def largest_files(directory, limit=200):
+    """The limit largest files directly in directory as (size, path, name)"""
+    entries = []
+    try:
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        entries.append((entry.stat(follow_symlinks=False).st_size, entry.path, entry.name))
+                except OSError:
+                    continue
+    except OSError:
+        return []
+    return heapq.nlargest(limit, entries)
+
+
+def _worst(row, side):
+    total = sum(row)
+    return max(max(side * side * size / (total * total), total * total / (side * side * size))
+               for size in row)
+
+
+def squarify(sizes, x, y, width, height):
+    """Squarified treemap rectangles (x, y, w, h) for sizes sorted largest first"""
+    total = sum(sizes)
+    if total <= 0 or width <= 0 or height <= 0:
+        return [(x, y, 0, 0)] * len(sizes)
+    scale = width * height / total
+    areas = [size * scale for size in sizes]
+    rects = []
+    start = 0
+    while start < len(areas):
+        side = min(width, height)
+        end = start + 1
+        while end < len(areas) and _worst(areas[start:end + 1], side) <= _worst(areas[start:end], side):
+            end += 1
+        row = areas[start:end]
+        row_area = sum(row)
+        if width >= height:
+            # Column along the left edge
+            row_width = row_area / height if height else 0
+            offset = y
+            for area in row:
+                cell_height = area / row_width if row_width else 0
+                rects.append((x, offset, row_width, cell_height))
+                offset += cell_height
+            x += row_width
+            width -= row_width
+        else:
+            # Row along the top edge
+            row_height = row_area / width if width else 0
+            offset = x
+            for area in row:
+                cell_width = area / row_height if row_height else 0
+                rects.append((offset, y, cell_width, row_height))
+                offset += cell_width
+            y += row_height
+            height -= row_height
+        start = end
+    return rects
+
+
+class TreemapCell:
+    __slots__ = ('key', 'name', 'size', 'rect', 'depth', 'node', 'parent', 'share',
+                 'children', 'count')
+
+    def __init__(self, key, name, size, rect, depth, node=None, parent=None, share=0.0):
+        self.key = key
+        self.name = name
+        self.size = size
+        self.rect = rect  # (x, y, w, h) in whole pixels
+        self.depth = depth
+        self.node = node  # DirectoryNode, or None for files and flat items
+        self.parent = parent
+        self.share = share  # fraction of the parent's area when laid out
+        self.children = None  # cells laid out inside this one, if any
+        self.count = 0  # subdirectories the node had when its children were laid out
+
+
+class TreemapLayout:
+    """Squarified layout of flat items or of a DirectoryTree node, updated in place.
+
+    For a tree node, its subdirectories (plus one cell for the files directly
+    in it) are laid out, and inside each of those their own children, up to
+    depth levels. update() takes the dirty directories from the tree: if a
+    container's children still have about the area they were laid out with
+    (within tolerance, relative) only the changed cells' labels are stale;
+    otherwise just that container's children are laid out again. Either way
+    it returns the rectangles that need repainting, so a growing directory
+    costs a few small repaints instead of a full layout and redraw.
+
+    set_node() zooms to another directory. The tree only has directories, so
+    the largest files of the directory being shown are fetched on demand
+    with file_loader. Layouts and file lists of the last cache_size
+    directories visited are kept, so going back up is instant, and memory
+    stays bounded however many directories are browsed.
+    """
+
+    HEADER = 16  # pixels for a container's label above its children
+
+    def __init__(self, depth=2, tolerance=0.1, min_side=3, file_loader=None, cache_size=32):
+        self.depth = depth
+        self.tolerance = tolerance
+        self.min_side = min_side
+        self.file_loader = file_loader
+        self.cache_size = cache_size
+        self.top = TreemapCell(None, "", 0, (0, 0, 0, 0), -1)
+        self.node = None
+        self.by_node = {}  # DirectoryNode -> cell
+        self.layouts = collections.OrderedDict()  # (node, width, height) -> (top cell, by_node)
+        self.files = collections.OrderedDict()  # node -> (own bytes when loaded, file entries, their bytes)
+
+    def _stash(self):
+        """Keep the current tree layout for when its directory is shown again"""
+        if self.node is None:
+            return
+        self.layouts[(self.node, self.top.rect[2], self.top.rect[3])] = (self.top, self.by_node)
+        self.layouts.move_to_end((self.node, self.top.rect[2], self.top.rect[3]))
+        while len(self.layouts) > self.cache_size:
+            self.layouts.popitem(last=False)
+
+    def set_node(self, node, width, height):
+        if node is self.node and self.top.rect[2:] == (width, height):
+            return
+        self._stash()
+        self.node = node
+        cached = self.layouts.pop((node, width, height), None)
+        if cached is not None:
+            self.top, self.by_node = cached
+            # Catch up with what changed while it was out of view
+            self.update(set(self.by_node) | {node})
+            return
+        self.by_node = {}
+        self.top = TreemapCell(None, node.name, node.size, (0, 0, width, height), -1, node)
+        self._layout_children(self.top)
+
+    def set_items(self, items, width, height):
+        """Flat layout of (key, name, size); returns the rects that changed, or None for all"""
+        old = {cell.key: cell for cell in self.top.children or []} if self.node is None else None
+        self._stash()
+        self.node = None
+        self.by_node = {}
+        self.top = TreemapCell(None, "", sum(size for _, _, size in items), (0, 0, width, height), -1)
+        entries = sorted(((size, key, name) for key, name, size in items if size > 0), reverse=True)
+        self._place(self.top, [(size, key, name, None) for size, key, name in entries], self.top.rect)
+        if old is None:
+            return None
+        rects = []
+        for cell in self.top.children:
+            previous = old.pop(cell.key, None)
+            if previous is None or previous.rect != cell.rect:
+                rects.append(cell.rect)
+                if previous is not None:
+                    rects.append(previous.rect)
+            elif previous.size != cell.size or previous.name != cell.name:
+                rects.append(cell.rect)
+        rects.extend(cell.rect for cell in old.values())
+        return rects
+
+    def resize(self, width, height):
+        self.layouts.clear()
+        if self.node is not None:
+            node, self.node = self.node, None
+            self.set_node(node, width, height)
+        else:
+            items = [(cell.key, cell.name, cell.size) for cell in self.top.children or []]
+            self.set_items(items, width, height)
+
+    def _entries(self, node):
+        entries = [(child.size, child.path, child.name, child)
+                   for child in node.children.values() if child.size > 0]
+        rest = node.own
+        name = "(files)"
+        if node is self.node and self.file_loader is not None:
+            # The directory being shown gets a cell per file, for its largest files
+            loaded = self._loaded_files(node)
+            entries.extend((size, path, file_name, None) for size, path, file_name in loaded[1])
+            rest = self._rest(node)
+            name = "(other files)"
+        if rest > 0:
+            entries.append((rest, (node.path, None), name, None))
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        return entries
+
+    def _loaded_files(self, node):
+        loaded = self.files.get(node)
+        if loaded is None or abs(node.own - loaded[0]) > self.tolerance * max(loaded[0], 1):
+            files = self.file_loader(node.path)
+            loaded = self.files[node] = (node.own, files, sum(size for size, _, _ in files))
+        self.files.move_to_end(node)
+        while len(self.files) > self.cache_size:
+            self.files.popitem(last=False)
+        return loaded
+
+    def _rest(self, node):
+        """Bytes of node's files that don't have a cell of their own"""
+        loaded = self.files.get(node) if node is self.node and self.file_loader is not None else None
+        return max(0, node.own - loaded[2]) if loaded is not None else node.own
+
+    def _layout_children(self, cell):
+        self._forget(cell)
+        x, y, w, h = cell.rect
+        if cell.depth >= 0:
+            # Leave room for the container's own label
+            x, y, w, h = x + 1, y + self.HEADER, w - 2, h - self.HEADER - 1
+        cell.count = len(cell.node.children)
+        self._place(cell, self._entries(cell.node), (x, y, w, h))
+
+    def _place(self, cell, entries, area):
+        x, y, w, h = area
+        cell.children = []
+        if not entries or w < self.min_side or h < self.min_side:
+            return
+        total = sum(entry[0] for entry in entries)
+        rects = squarify([entry[0] for entry in entries], x, y, w, h)
+        for (size, key, name, node), (rx, ry, rw, rh) in zip(entries, rects):
+            left, top = int(round(rx)), int(round(ry))
+            rect = (left, top, int(round(rx + rw)) - left, int(round(ry + rh)) - top)
+            if rect[2] < self.min_side or rect[3] < self.min_side:
+                # Sorted largest first, so the rest are smaller still
+                break
+            child = TreemapCell(key, name, size, rect, cell.depth + 1, node, cell, size / total)
+            cell.children.append(child)
+            if node is not None:
+                self.by_node[node] = child
+                if child.depth + 1 < self.depth and rect[2] > 4 * self.HEADER and rect[3] > 3 * self.HEADER:
+                    self._layout_children(child)
+
+    def _forget(self, cell):
+        for child in cell.children or []:
+            if child.node is not None:
+                self.by_node.pop(child.node, None)
+            self._forget(child)
+        cell.children = None
+
+    def _drifted(self, cell):
+        node = cell.node
+        if len(node.children) != cell.count or node.size <= 0:
+            return True
+        loaded = self.files.get(node) if node is self.node else None
+        if loaded is not None and abs(node.own - loaded[0]) > self.tolerance * max(loaded[0], 1):
+            return True  # the file list needs loading again
+        laid = shown = 0.0
+        for child in cell.children:
+            size = self._cell_size(child, node)
+            if child.node is not None and child.node.parent is not node:
+                return True  # removed from the tree
+            share = size / node.size
+            if abs(share - child.share) > self.tolerance * child.share:
+                return True
+            laid += child.share
+            shown += share
+        # Cells too small to show may have grown big enough to need room
+        return shown - laid < -0.01
+
+    def _cell_size(self, cell, parent):
+        if cell.node is not None:
+            return cell.node.size
+        if isinstance(cell.key, tuple):
+            return self._rest(parent)
+        return cell.size  # a single file, as of when the file list was loaded
+
+    def update(self, dirty_nodes):
+        """Apply tree changes; returns the rects to repaint"""
+        if self.node is None:
+            return []
+        rects = []
+        stale = []
+        for node in dirty_nodes:
+            cell = self.top if node is self.node else self.by_node.get(node)
+            if cell is None:
+                continue
+            if cell.size != node.size:
+                cell.size = node.size
+                if cell.depth >= 0:
+                    rects.append(cell.rect)
+            if cell.children is not None:
+                if self._drifted(cell):
+                    stale.append(cell)
+                else:
+                    for child in cell.children:
+                        size = self._cell_size(child, node)
+                        if child.node is None and child.size != size:
+                            child.size = size
+                            rects.append(child.rect)
+        stale.sort(key=lambda cell: cell.depth)
+        redone = set()
+        for cell in stale:
+            parent = cell.parent
+            while parent is not None and id(parent) not in redone:
+                parent = parent.parent
+            if parent is not None or cell.children is None:
+                continue  # inside a container that was just laid out again
+            self._layout_children(cell)
+            redone.add(id(cell))
+            rects.append(cell.rect)
+        return rects
+
+    def cells(self, x=0, y=0, width=None, height=None):
+        """Cells overlapping the given area, parents before their children"""
+        pending = list(reversed(self.top.children or []))
+        while pending:
+            cell = pending.pop()
+            cx, cy, cw, ch = cell.rect
+            if width is not None and (cx >= x + width or cy >= y + height or cx + cw <= x or cy + ch <= y):
+                continue
+            yield cell
+            if cell.children:
+                pending.extend(reversed(cell.children))
+
+    def cell_at(self, x, y):
+        """Deepest cell under the point, or None"""
+        found = None
+        for cell in self.cells(x, y, 1, 1):
+            found = cell
+        return found
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import array
+import threading
+
+import psutil
+
+from storage_config import data_dir
+from storage_volumes import configured_volumes
+from storage_growth import decimate
+
+# (seconds per slot, slots): 1s for an hour, 1min for a week, 1h for a year
+DEFAULT_TIERS = ((1, 3600), (60, 7 * 24 * 60), (3600, 365 * 24))
+
+
+def system_volume():
+    if os.name == "nt":
+        return os.environ.get("SystemDrive", "C:") + "\\"
+    return "/"
+
+
+def sampled_volumes(config):
+    """The system volume, then the other configured or discovered volumes"""
+    system = system_volume()
+    return [system] + [volume for volume in configured_volumes(config)
+                       if os.path.normcase(volume) != os.path.normcase(system)]
+
+
+class UsageRing:
+    """Fixed-size ring of used-bytes readings at one resolution.
+
+    Slot i holds the last reading taken in its time slot; the slot number is
+    stored alongside so stale entries from a previous lap are ignored.
+    """
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.slots = array.array('q', [-1]) * capacity
+        self.used = array.array('q', [0]) * capacity
+
+    def record(self, timestamp, used):
+        slot = int(timestamp // self.resolution)
+        index = slot % self.capacity
+        self.slots[index] = slot
+        self.used[index] = used
+
+    def covers(self, timestamp, now):
+        # One slot of slack, so "the last hour" still comes from the hour ring
+        return now - timestamp <= self.resolution * (self.capacity + 1)
+
+    def range(self, start, end):
+        """(time, used) readings between start and end, oldest first"""
+        first = int(start // self.resolution)
+        last = int(end // self.resolution)
+        first = max(first, last - self.capacity + 1)
+        points = []
+        for slot in range(first, last + 1):
+            index = slot % self.capacity
+            if self.slots[index] == slot:
+                points.append((slot * self.resolution, self.used[index]))
+        return points
+
+
+class DiskUsageHistory:
+    """Used bytes for one volume at several resolutions, in fixed memory"""
+
+    def __init__(self, volume, tiers=DEFAULT_TIERS):
+        self.volume = volume
+        self.total = 0
+        self.rings = [UsageRing(resolution, capacity) for resolution, capacity in tiers]
+        self.lock = threading.Lock()
+
+    def record(self, timestamp, used, total):
+        with self.lock:
+            self.total = total
+            for ring in self.rings:
+                ring.record(timestamp, used)
+
+    def range(self, start, end=None, columns=None):
+        """Readings from the finest resolution that reaches back to start.
+
+        With columns, they are decimated to at most four per column (see
+        storage_growth.decimate), the same as the growth charts.
+        """
+        end = end or time.time()
+        with self.lock:
+            ring = next((ring for ring in self.rings if ring.covers(start, end)), self.rings[-1])
+            points = ring.range(start, end)
+        if columns:
+            points = decimate(points, start, end, columns)
+        return points
+
+    def latest(self):
+        points = self.range(time.time() - 60)
+        return points[-1] if points else None
+
+    def growth_rate(self, seconds=3600):
+        """Least-squares growth in bytes per second over the last seconds"""
+        points = self.range(time.time() - seconds)
+        if len(points) < 2:
+            return None
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_u = sum(u for _, u in points) / n
+        variance = sum((t - mean_t) ** 2 for t, _ in points)
+        if variance == 0:
+            return None
+        return sum((t - mean_t) * (u - mean_u) for t, u in points) / variance
+
+    def time_to_full(self, seconds=24 * 3600):
+        """Seconds until the volume fills at the recent growth rate, or None if it isn't growing"""
+        rate = self.growth_rate(seconds)
+        latest = self.latest()
+        if not rate or rate <= 0 or latest is None or not self.total:
+            return None
+        return max(0.0, (self.total - latest[1]) / rate)
+
+    def save(self, path):
+        header = {
+            'volume': self.volume,
+            'total': self.total,
+            'tiers': [[ring.resolution, ring.capacity] for ring in self.rings],
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            with open(path + ".tmp", "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                for ring in self.rings:
+                    ring.slots.tofile(f)
+                    ring.used.tofile(f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path):
+        """Restore readings saved by save(); ignored if the tiers don't match"""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline().decode("utf-8"))
+                if header['tiers'] != [[ring.resolution, ring.capacity] for ring in self.rings]:
+                    return False
+                for ring in self.rings:
+                    slots = array.array('q')
+                    used = array.array('q')
+                    slots.fromfile(f, ring.capacity)
+                    used.fromfile(f, ring.capacity)
+                    ring.slots, ring.used = slots, used
+                self.total = header.get('total', 0)
+            return True
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+
+
+class DiskUsageSampler:
+    """Samples psutil.disk_usage for each volume into a DiskUsageHistory.
+
+    By default every volume the scanners use is sampled (see
+    storage_volumes.configured_volumes), the system volume first.
+    Histories are saved to the data directory every save_interval seconds
+    and on stop, so the week and year tiers survive restarts.
+    """
+
+    def __init__(self, volumes=None, interval=1.0, save_interval=300, directory=None):
+        self.volumes = list(volumes or [system_volume()])
+        self.interval = interval
+        self.save_interval = save_interval
+        self.directory = directory or data_dir()
+        self.histories = {}
+        for volume in self.volumes:
+            self.add_volume(volume)
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.section("usage")
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("volumes") or sampled_volumes(config), settings.get("interval", 1.0),
+                   settings.get("save_interval", 300), settings.get("directory"))
+
+    def _path(self, volume):
+        name = "".join(c if c.isalnum() else "_" for c in volume).strip("_") or "root"
+        return os.path.join(self.directory, f"usage-{name}.bin")
+
+    def add_volume(self, volume):
+        if volume not in self.histories:
+            history = DiskUsageHistory(volume)
+            history.load(self._path(volume))
+            self.histories[volume] = history
+        if volume not in self.volumes:
+            self.volumes.append(volume)
+        return self.histories[volume]
+
+    def history(self, volume=None):
+        return self.histories.get(volume or self.volumes[0])
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="usage-sampler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        last_save = time.time()
+        while self.running:
+            self.sample_once()
+            if time.time() - last_save >= self.save_interval:
+                self.save()
+                last_save = time.time()
+            time.sleep(self.interval)
+
+    def sample_once(self):
+        now = time.time()
+        for volume in list(self.volumes):
+            try:
+                usage = psutil.disk_usage(volume)
+            except OSError:
+                continue
+            self.histories[volume].record(now, usage.used, usage.total)
+
+    def save(self):
+        for volume, history in list(self.histories.items()):
+            try:
+                history.save(self._path(volume))
+            except OSError as e:
+                print(f"Error saving disk usage history for {volume}: {e}")
+
+    def stop(self):
+        self.running = False
+        self.save()
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "not filling up"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} minutes"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} hours"
+    if seconds < 365 * 86400:
+        return f"{seconds / 86400:.0f} days"
+    return "over a year"
@@ -0,0 +1,107 @@
+import os
+import time
+import threading
+from pathlib import Path
+
+import psutil
+
+from storage_config import expand_path
+
+# Partitions that can't hold monitored files
+SKIPPED_FSTYPES = {"", "squashfs", "iso9660", "udf"}
+
+
+class IOBudget:
+    """Token bucket limiting how much I/O a worker does per second.
+
+    The unit is up to the caller (files stated by a scanner, bytes read by a
+    reader). A rate of 0 means unlimited. Callers that go over the budget
+    sleep off the debt outside the lock, so one budget can be shared.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.balance = self.burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def spend(self, amount=1):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.balance = min(self.burst, self.balance + (now - self.last) * self.rate)
+            self.last = now
+            self.balance -= amount
+            wait = -self.balance / self.rate if self.balance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def budgeted(items, budget, batch=256):
+    """Yield items, charging budget one unit per item in batches"""
+    if budget is None or budget.rate <= 0:
+        yield from items
+        return
+    count = 0
+    for item in items:
+        yield item
+        count += 1
+        if count == batch:
+            budget.spend(count)
+            count = 0
+    if count:
+        budget.spend(count)
+
+
+def discover_volumes():
+    """Mount points of the local and network volumes, from psutil"""
+    volumes = []
+    try:
+        partitions = psutil.disk_partitions(all=False)
+    except OSError:
+        partitions = []
+    for partition in partitions:
+        if partition.fstype.lower() in SKIPPED_FSTYPES or "cdrom" in partition.opts:
+            continue
+        if partition.mountpoint not in volumes:
+            volumes.append(partition.mountpoint)
+    return volumes
+
+
+def is_under(path, directory):
+    path = os.path.normcase(path)
+    directory = os.path.normcase(directory)
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def volume_for(path, volumes):
+    """The most specific volume containing path, else the path's drive or root"""
+    best = None
+    for volume in volumes:
+        if is_under(path, volume) and (best is None or len(volume) > len(best)):
+            best = volume
+    return best or Path(path).anchor or os.sep
+
+
+def configured_volumes(config):
+    """Volumes from the "volumes" section's mounts, or discovered ones.
+
+    Listing mounts explicitly lets plain directories stand in for drives,
+    e.g. to try per-volume scanning on a machine with a single disk.
+    """
+    mounts = config.section("volumes").get("mounts")
+    if mounts:
+        return [expand_path(mount) for mount in mounts]
+    return discover_volumes()
+
+
+def budget_for(config, volume):
+    """IOBudget for a volume's scanner from the "volumes" section, or None if unlimited"""
+    settings = config.section("volumes")
+    rate = settings.get("files_per_second", 0)
+    for mount, limit in settings.get("limits", {}).items():
+        if os.path.normcase(expand_path(mount)) == os.path.normcase(volume):
+            rate = limit
+    return IOBudget(rate) if rate else None
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from storage_anomaly import GrowthDetector
+from storage_engine import StorageChange
+
+MB = 1024 * 1024
+START = 1_700_000_000.0
+
+
+def feed(detector, seconds, size_change, path="/data/logs/app.log", process="app.exe"):
+    """Observe one change, seconds after START"""
+    now = START + seconds
+    detector.observe(StorageChange(path, size_change, 'modified', datetime.fromtimestamp(now), process),
+                     now=now)
+
+
+def detector(**options):
+    found = []
+    settings = dict(bucket_seconds=1.0, threshold=4.0, min_rate=MB, sustain=2, warmup=5)
+    settings.update(options)
+    detector = GrowthDetector(**settings)
+    detector.add_callback(found.append)
+    return detector, found
+
+
+def test_no_alerts_during_warmup():
+    growth, found = detector()
+    for second in range(4):
+        feed(growth, second, 100 * MB)
+    growth.tick(now=START + 10)
+    assert found == []
+
+
+def test_sustained_burst_after_warmup_is_flagged():
+    growth, found = detector()
+    for second in range(20):
+        feed(growth, second, 1024)
+    for second in range(20, 23):
+        feed(growth, second, 100 * MB)
+    growth.tick(now=START + 23)
+    assert {(anomaly.kind, anomaly.key) for anomaly in found} == {
+        ('directory', "/data/logs"), ('process', "app.exe")}
+    assert all(anomaly.rate >= 100 * MB for anomaly in found)
+
+
+def test_a_single_abnormal_bucket_is_not_enough():
+    growth, found = detector()
+    for second in range(20):
+        feed(growth, second, 1024)
+    feed(growth, 20, 100 * MB)
+    for second in range(21, 25):
+        feed(growth, second, 1024)
+    growth.tick(now=START + 25)
+    assert found == []
+
+
+def test_growth_below_min_rate_is_ignored():
+    growth, found = detector(min_rate=500 * MB)
+    for second in range(20):
+        feed(growth, second, 1024)
+    for second in range(20, 25):
+        feed(growth, second, 100 * MB)
+    growth.tick(now=START + 25)
+    assert found == []
+
+
+def test_old_and_shrinking_changes_are_ignored():
+    growth, _ = detector()
+    growth.observe(StorageChange("/data/a", 100 * MB, 'modified', datetime.fromtimestamp(START)),
+                   now=START + 3600)
+    feed(growth, 0, -100 * MB)
+    assert not growth.streams['directory']
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+from storage_bus import ChangeBus, COALESCE, DROP_OLDEST, BLOCK
+from storage_engine import StorageChange
+
+
+def change(path, size_change, change_type='modified', process_name="app", old_path=None, size=None):
+    return StorageChange(path, size_change, change_type, datetime(2024, 1, 1), process_name,
+                         old_path, size)
+
+
+def test_drop_oldest_keeps_the_newest_changes():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=2, policy=DROP_OLDEST)
+    for i in range(5):
+        bus.publish(change(f"/data/{i}.bin", i))
+    assert [c.path for c in subscription.get_batch()] == ["/data/3.bin", "/data/4.bin"]
+    assert subscription.dropped == 3
+    assert subscription.delivered == 2
+
+
+def test_coalesce_merges_changes_to_the_same_path():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=10, policy=COALESCE)
+    bus.publish(change("/data/a.log", 100, 'created', size=100))
+    bus.publish(change("/data/a.log", 50, size=150))
+    bus.publish(change("/data/a.log", 25, process_name="Unknown", size=175))
+    [merged] = subscription.get_batch()
+    assert merged.change_type == 'created'
+    assert merged.size_change == 175
+    assert merged.size == 175
+    assert merged.process_name == "app"
+    assert subscription.coalesced == 2
+
+
+def test_coalesce_follows_a_file_that_moves():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=10, policy=COALESCE)
+    bus.publish(change("/data/a.tmp", 10, size=110))
+    bus.publish(change("/data/b.bin", 0, 'moved', old_path="/data/a.tmp", size=110))
+    [merged] = subscription.get_batch()
+    assert (merged.path, merged.old_path) == ("/data/b.bin", "/data/a.tmp")
+    assert merged.change_type == 'moved'
+    assert merged.size_change == 10
+
+
+def test_coalesce_move_then_delete_is_a_delete_at_the_source():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=10, policy=COALESCE)
+    bus.publish(change("/data/b.bin", 0, 'moved', old_path="/data/a.bin", size=100))
+    bus.publish(change("/data/b.bin", -100, 'deleted', process_name="Unknown", size=0))
+    [merged] = subscription.get_batch()
+    assert merged.path == "/data/a.bin"
+    assert merged.change_type == 'deleted'
+    assert merged.old_path is None
+    assert merged.size_change == -100
+    assert merged.process_name == "app"
+    assert subscription.lag == 0
+
+
+def test_coalesce_create_then_delete_nets_out():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=10, policy=COALESCE)
+    bus.publish(change("/data/a.tmp", 100, 'created', size=100))
+    bus.publish(change("/data/a.tmp", -100, 'deleted', size=0))
+    [merged] = subscription.get_batch()
+    assert merged.change_type == 'deleted'
+    assert merged.size_change == 0
+
+
+def test_coalesce_drops_the_oldest_path_when_full():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=2, policy=COALESCE)
+    for path in ("/data/a", "/data/b", "/data/a", "/data/c"):
+        bus.publish(change(path, 1))
+    assert [c.path for c in subscription.get_batch()] == ["/data/b", "/data/c"]
+    assert subscription.dropped == 1
+
+
+def test_block_falls_back_to_dropping_after_the_timeout():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test", maxsize=1, policy=BLOCK, block_timeout=0.05)
+    bus.publish(change("/data/a", 1))
+    bus.publish(change("/data/b", 1))
+    assert [c.path for c in subscription.get_batch()] == ["/data/b"]
+    assert subscription.dropped == 1
+    assert subscription.blocked_seconds > 0
+
+
+def test_closed_subscriptions_stop_receiving():
+    bus = ChangeBus()
+    subscription = bus.subscribe("test")
+    subscription.close()
+    bus.publish(change("/data/a", 1))
+    assert subscription.lag == 0
+    assert bus.stats() == []
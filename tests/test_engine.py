@@ -0,0 +1,37 @@
+import os
+
+from storage_engine import PollingScanner
+
+
+def path(*parts):
+    return os.path.join(os.sep, "data", *parts)
+
+
+def match(deleted, created, old_ids=None, new_ids=None):
+    old_sizes = {source: 100 for source in deleted}
+    new_sizes = {target: 100 for target in created}
+    return PollingScanner.match_moves(deleted, created, old_sizes, new_sizes,
+                                      old_ids or {}, new_ids or {})
+
+
+def test_inodes_pair_unrelated_names():
+    assert match([path("a", "x.bin")], [path("b", "y.bin")],
+                 {path("a", "x.bin"): 7}, {path("b", "y.bin"): 7}) == {path("b", "y.bin"): path("a", "x.bin")}
+
+
+def test_without_inodes_size_alone_is_not_a_move():
+    assert match([path("a", "x.bin")], [path("b", "y.bin")]) == {}
+
+
+def test_without_inodes_moves_keep_the_name_and_renames_the_directory():
+    assert match([path("a", "x.bin")], [path("b", "x.bin")]) == {path("b", "x.bin"): path("a", "x.bin")}
+    assert match([path("a", "x.bin")], [path("a", "y.bin")]) == {path("a", "y.bin"): path("a", "x.bin")}
+
+
+def test_moves_are_matched_before_renames():
+    moves = match([path("a", "x.bin"), path("b", "y.bin")], [path("a", "z.bin"), path("c", "x.bin")])
+    assert moves == {path("c", "x.bin"): path("a", "x.bin")}
+
+
+def test_ambiguous_names_are_not_paired():
+    assert match([path("a", "x.bin"), path("b", "x.bin")], [path("c", "x.bin")]) == {}
@@ -0,0 +1,64 @@
+import csv
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage_engine import StorageChange
+from storage_export import export_changes, format_for_path, ExportError
+from storage_journal import ChangeJournal
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ChangeJournal(str(tmp_path / "journal.jsonl"))
+    journal.write_many([
+        StorageChange(f"/data/{i}.log", 100 * i, 'modified', START + timedelta(minutes=i), "app")
+        for i in range(10)
+    ])
+    journal.flush()
+    yield journal
+    journal.close()
+
+
+def test_unfiltered_jsonl_copies_every_line(journal, tmp_path):
+    output = tmp_path / "all.jsonl"
+    assert export_changes(journal, str(output)) == 10
+    assert output.read_bytes() == (tmp_path / "journal.jsonl").read_bytes()
+
+
+def test_time_filter_includes_since_and_excludes_until(journal, tmp_path):
+    output = tmp_path / "window.jsonl"
+    count = export_changes(journal, str(output), since=START + timedelta(minutes=3),
+                           until=START + timedelta(minutes=6))
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert count == 3
+    assert [record['path'] for record in records] == ["/data/3.log", "/data/4.log", "/data/5.log"]
+
+
+def test_csv_export_is_filtered_and_chunked(journal, tmp_path):
+    output = tmp_path / "changes.csv"
+    count = export_changes(journal, str(output), since=START + timedelta(minutes=8), chunk_size=1)
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert count == 2
+    assert [row['path'] for row in rows] == ["/data/8.log", "/data/9.log"]
+    assert rows[0]['size_change'] == "800"
+
+
+def test_damaged_lines_are_skipped(journal, tmp_path):
+    with open(journal.path, "ab") as f:
+        f.write(b'{"timestamp": "2024-05-01T13:00:00", "path": \n')
+    output = tmp_path / "changes.csv"
+    assert export_changes(journal, str(output), since=START) == 10
+
+
+def test_format_comes_from_the_extension():
+    assert format_for_path("out.ndjson") == "jsonl"
+    assert format_for_path("out.PQ") == "parquet"
+    with pytest.raises(ExportError):
+        format_for_path("out.txt")
+    with pytest.raises(ExportError):
+        export_changes(None, "out.csv", fmt="xml")
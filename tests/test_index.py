@@ -0,0 +1,79 @@
+import os
+import random
+
+from storage_index import SortedBuckets, LargestFilesIndex
+
+MB = 1024 * 1024
+
+
+def path(*parts):
+    return os.path.join(os.sep, "data", *parts)
+
+
+def test_sorted_buckets_match_a_sorted_list():
+    rng = random.Random(1)
+    buckets = SortedBuckets(load=8)
+    expected = []
+    for _ in range(2000):
+        item = rng.randrange(500)
+        if expected and rng.random() < 0.4:
+            item = rng.choice(expected)
+            buckets.discard(item)
+            expected.remove(item)
+        else:
+            buckets.add(item)
+            expected.append(item)
+    expected.sort()
+    assert len(buckets) == len(expected)
+    assert all(len(bucket) <= 8 for bucket in buckets.buckets)
+    assert list(buckets.descending()) == expected[::-1]
+    assert list(buckets.descending(250)) == [item for item in expected[::-1] if item >= 250]
+    assert buckets.count_from(250) == sum(1 for item in expected if item >= 250)
+
+
+def test_sorted_buckets_bulk_load_and_missing_items():
+    buckets = SortedBuckets(range(100), load=10)
+    buckets.discard(1000)
+    buckets.discard(-1)
+    assert len(buckets) == 100
+    assert buckets.count_from(90) == 10
+    assert buckets.count_from(100) == 0
+    assert list(SortedBuckets().descending()) == []
+
+
+def test_largest_files_top_and_over():
+    index = LargestFilesIndex(min_size=MB)
+    index.update(path("small.txt"), 10)
+    index.update(path("a.bin"), 5 * MB)
+    index.update(path("b.bin"), 50 * MB)
+    index.update(path("c.bin"), 20 * MB)
+    assert len(index) == 3
+    assert index.top(2) == [(path("b.bin"), 50 * MB), (path("c.bin"), 20 * MB)]
+    assert index.over(10 * MB) == [(path("b.bin"), 50 * MB), (path("c.bin"), 20 * MB)]
+    assert index.count_over(5 * MB) == 3
+    assert index.top(0) == []
+
+
+def test_largest_files_updates_and_removals():
+    index = LargestFilesIndex(min_size=MB)
+    index.update(path("a.bin"), 5 * MB)
+    index.update(path("a.bin"), 60 * MB)
+    index.update(path("b.bin"), 10 * MB)
+    index.update(path("b.bin"), 10)  # shrank below the minimum
+    assert index.top() == [(path("a.bin"), 60 * MB)]
+    index.remove(path("a.bin"))
+    index.remove(path("missing.bin"))
+    assert len(index) == 0
+
+
+def test_largest_files_replace_prefix_keeps_nested_roots():
+    index = LargestFilesIndex(min_size=MB)
+    index.update(path("root", "old.bin"), 5 * MB)
+    index.update(path("root", "nested", "kept.bin"), 6 * MB)
+    index.update(path("other", "kept.bin"), 7 * MB)
+    index.replace_prefix(path("root"), {path("root", "new.bin"): 8 * MB, path("root", "tiny"): 1},
+                         keep=[path("root", "nested")])
+    assert sorted(p for p, _ in index.top()) == sorted(
+        [path("root", "new.bin"), path("root", "nested", "kept.bin"), path("other", "kept.bin")])
+    index.remove_prefix(path("other"))
+    assert index.count_over(0) == 2
@@ -0,0 +1,71 @@
+import time
+
+from storage_io import MockProcessSource, ProcessIOSampler
+
+
+def sampler_with_writes(start):
+    source = MockProcessSource()
+    sampler = ProcessIOSampler(source, interval=2.0, history=10)
+    source.write(1, "game.exe", 0)
+    source.write(2, "backup.exe", 0)
+    sampler.sample_once(now=start)
+    source.write(1, "game.exe", 4000)
+    source.write(2, "backup.exe", 1000)
+    sampler.sample_once(now=start + 2)
+    source.write(2, "backup.exe", 1000)
+    sampler.sample_once(now=start + 4)
+    return source, sampler
+
+
+def test_first_sample_only_sets_the_baseline():
+    source = MockProcessSource()
+    source.write(1, "game.exe", 5000)
+    sampler = ProcessIOSampler(source)
+    sampler.sample_once(now=1000.0)
+    assert sampler.written(60, end=1000.0) == {}
+
+
+def test_written_and_top_writers():
+    start = time.time() - 4
+    _, sampler = sampler_with_writes(start)
+    assert sampler.written(10, end=start + 4) == {"game.exe": 4000, "backup.exe": 2000}
+    assert sampler.written(1, end=start + 4) == {"backup.exe": 1000}
+    assert sampler.top_writers(60, count=1) == [("game.exe", 4000)]
+    assert sampler.series("backup.exe") == [(start + 2, 1000), (start + 4, 1000)]
+
+
+def test_pids_of_one_program_are_summed():
+    source = MockProcessSource()
+    sampler = ProcessIOSampler(source)
+    source.write(1, "chrome.exe", 0)
+    source.write(2, "chrome.exe", 0)
+    sampler.sample_once(now=1000.0)
+    source.write(1, "chrome.exe", 300)
+    source.write(2, "chrome.exe", 200)
+    sampler.sample_once(now=1002.0)
+    assert sampler.written(10, end=1002.0) == {"chrome.exe": 500}
+
+
+def test_steady_rates_are_sampled():
+    source = MockProcessSource({7: ("writer.exe", 1e9)})
+    sampler = ProcessIOSampler(source)
+    sampler.sample_once()
+    time.sleep(0.01)
+    sampler.sample_once()
+    assert sampler.written(60).get("writer.exe", 0) > 0
+
+
+def test_guess_writer_needs_enough_bytes():
+    _, sampler = sampler_with_writes(1000.0)
+    assert sampler.guess_writer(1002.0, 3000, window=4) == "game.exe"
+    assert sampler.guess_writer(1002.0, 10000, window=4) is None
+    assert sampler.guess_writer(2000.0, 1, window=4) is None
+
+
+def test_idle_processes_are_forgotten():
+    source, sampler = sampler_with_writes(1000.0)
+    for i in range(10):
+        source.write(2, "backup.exe", 10)
+        sampler.sample_once(now=1006.0 + 2 * i)
+    assert "game.exe" not in sampler.writes
+    assert "backup.exe" in sampler.writes
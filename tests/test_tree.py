@@ -0,0 +1,118 @@
+import os
+from datetime import datetime
+
+from storage_engine import StorageChange
+from storage_tree import DirectoryTree, TreemapLayout, squarify
+
+ROOT = os.path.join(os.sep, "data")
+
+
+def path(*parts):
+    return os.path.join(ROOT, *parts)
+
+
+def sample_tree():
+    return DirectoryTree.from_files([
+        (path("games", "a.pak"), 600, None),
+        (path("games", "b.pak"), 200, None),
+        (path("docs", "c.txt"), 150, None),
+        (path("d.bin"), 50, None),
+    ])
+
+
+def test_sizes_roll_up_to_every_ancestor():
+    tree = sample_tree()
+    assert tree.node(path("games")).size == 800
+    assert tree.node(path("games")).own == 800
+    assert tree.node(ROOT).size == 1000
+    assert tree.node(ROOT).own == 50
+    assert tree.top() is tree.node(ROOT)
+    assert not tree.dirty
+
+
+def test_emptied_directories_are_dropped():
+    tree = sample_tree()
+    tree.add(path("docs"), -150)
+    assert tree.node(path("docs")) is None
+    assert "docs" not in tree.node(ROOT).children
+    assert tree.node(ROOT).size == 850
+
+
+def test_moves_shift_bytes_between_directories():
+    tree = sample_tree()
+    tree.apply(StorageChange(path("docs", "a.pak"), 10, 'moved', datetime.now(), None,
+                             path("games", "a.pak"), 610))
+    assert tree.node(path("games")).size == 200
+    assert tree.node(path("docs")).size == 760
+    assert tree.node(ROOT).size == 1010
+
+
+def test_flush_passes_dirty_directories_once():
+    tree = sample_tree()
+    seen = []
+    tree.add_listener(seen.append)
+    tree.apply(StorageChange(path("games", "a.pak"), 5, 'modified', datetime.now()))
+    tree.flush()
+    tree.flush()
+    assert len(seen) == 1
+    assert {node.path for node in seen[0]} >= {path("games"), ROOT}
+
+
+def test_squarify_fills_the_area():
+    rects = squarify([6, 6, 4, 3, 2, 2, 1], 0, 0, 600, 400)
+    assert abs(sum(w * h for _, _, w, h in rects) - 600 * 400) < 1e-6
+    assert all(x >= 0 and y >= 0 and x + w <= 600 + 1e-6 and y + h <= 400 + 1e-6
+               for x, y, w, h in rects)
+
+
+def test_flat_layout_reports_only_changed_cells():
+    layout = TreemapLayout()
+    items = [("a", "a", 500), ("b", "b", 300), ("c", "c", 200)]
+    assert len(layout.set_items(items, 400, 300)) == 3
+    assert layout.set_items(items, 400, 300) == []
+    assert [cell.key for cell in layout.cells()] == ["a", "b", "c"]
+    rects = layout.set_items([("a", "a", 500), ("b", "b", 300), ("c", "c-renamed", 200)], 400, 300)
+    assert rects == [layout.top.children[2].rect]
+
+
+def test_small_growth_repaints_without_a_new_layout():
+    tree = sample_tree()
+    layout = TreemapLayout(depth=1)
+    layout.set_node(tree.node(ROOT), 800, 600)
+    games = layout.by_node[tree.node(path("games"))]
+    tree.add(path("games"), 1)
+    dirty, tree.dirty = tree.dirty, set()
+    rects = layout.update(dirty)
+    assert rects == [games.rect]
+    assert layout.by_node[tree.node(path("games"))] is games
+    assert games.size == 801
+
+
+def test_large_growth_lays_out_the_container_again():
+    tree = sample_tree()
+    layout = TreemapLayout(depth=1)
+    layout.set_node(tree.node(ROOT), 800, 600)
+    docs = layout.by_node[tree.node(path("docs"))]
+    tree.add(path("docs"), 2000)
+    dirty, tree.dirty = tree.dirty, set()
+    layout.update(dirty)
+    relaid = layout.by_node[tree.node(path("docs"))]
+    assert relaid is not docs
+    assert layout.top.children[0] is relaid
+
+
+def test_zoomed_directory_shows_its_largest_files():
+    tree = sample_tree()
+    loads = []
+
+    def load(directory):
+        loads.append(directory)
+        return [(600, path("games", "a.pak"), "a.pak")]
+
+    layout = TreemapLayout(depth=1, file_loader=load)
+    layout.set_node(tree.node(path("games")), 400, 300)
+    names = [cell.name for cell in layout.cells()]
+    assert names == ["a.pak", "(other files)"]
+    layout.set_node(tree.node(ROOT), 400, 300)
+    layout.set_node(tree.node(path("games")), 400, 300)
+    assert loads == [path("games"), ROOT]  # going back reuses the cached file list